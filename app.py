@@ -1,11 +1,31 @@
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, abort, g, Response, stream_with_context
 import os
+import re
+import gzip
+import json
+import hashlib
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
 from werkzeug.utils import secure_filename
 from config import Config
 import logging
-from modules.audio_processor import AudioProcessor
-from modules.feature_extractor import FeatureExtractor
-from modules.report_generator import ReportGenerator
+import numpy as np
+from modules import metrics
+from modules.analysis_pipeline import PROFILES, MemoryBudgetExceeded
+from modules.chunked_upload import OffsetMismatch, STREAMING_FORMATS, UploadManager
+from modules.job_queue import JobQueue, QueueFull, client_error
+from modules.report_store import ReportStore
+from modules.result_cache import ResultCache
+from modules.similarity_index import SimilarityIndex, embed
+from modules.warmup import configure_jit_cache
+
+try:
+    import orjson  # Optional: faster encoding of /api/analyze results
+except ImportError:
+    orjson = None
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -18,26 +38,252 @@ logger = logging.getLogger(__name__)
 
 # Configure upload folder
 UPLOAD_FOLDER = 'uploads'
-ALLOWED_EXTENSIONS = {'mp3', 'wav'}
+ALLOWED_EXTENSIONS = {'mp3', 'wav', 'flac', 'ogg', 'm4a'}
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
 # Create upload folder if it doesn't exist
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# Heavy libraries are imported lazily, so this still runs before numba loads
+configure_jit_cache(app.config['NUMBA_CACHE_DIR'])
+
 # Initialize components
-audio_processor = AudioProcessor()
-feature_extractor = FeatureExtractor()
-report_generator = ReportGenerator()
+result_cache = None
+if app.config['RESULT_CACHE_DIR']:
+    result_cache = ResultCache(app.config['RESULT_CACHE_DIR'], app.config['RESULT_CACHE_MAX_BYTES'])
+report_store = ReportStore(app.config['REPORT_STORE_DIR'])
+similarity_index = None
+if app.config['SIMILARITY_INDEX_DIR']:
+    similarity_index = SimilarityIndex(app.config['SIMILARITY_INDEX_DIR'], app.config['SIMILARITY_PROBES'])
+uploads = UploadManager(UPLOAD_FOLDER, app.config['MAX_CONTENT_LENGTH'], app.config['UPLOAD_SESSION_TTL'])
+job_queue = JobQueue(max_workers=app.config['ANALYSIS_WORKERS'], cache=result_cache,
+                     warm_workers=app.config['WARM_UP'], store=report_store,
+                     resample_quality=app.config['RESAMPLE_QUALITY'],
+                     profile=app.config['ANALYSIS_PROFILE'],
+                     frame_store_dir=app.config['FRAME_STORE_DIR'], index=similarity_index,
+                     max_waiting=app.config['ANALYSIS_QUEUE_SIZE'],
+                     memory_budget=app.config['WORKER_MEMORY_BUDGET'],
+                     stage_threads=app.config['ANALYSIS_STAGE_THREADS'],
+                     max_streaming=app.config['STREAMING_ANALYSES'])
+
+def build_similarity_index():
+    # Index every stored result the index has not seen: all of them for a new index, and
+    # those batch_analyze.py --publish stored since the last start. Oldest first, so the
+    # newest result for the same audio is the one kept
+    if similarity_index is None:
+        return
+    records = []
+    for result_id in report_store.ids():
+        if result_id in similarity_index:
+            continue
+        stored = report_store.load(result_id)
+        try:
+            record = json.loads(stored["data"]) if stored is not None else {}
+        except ValueError:
+            continue
+        if record.get("features"):
+            records.append((record.get("created_at") or 0, result_id, record))
+    if records:
+        records.sort(key=lambda entry: entry[:2])
+        similarity_index.add_vectors([result_id for _, result_id, _ in records],
+                                     np.stack([embed(record["features"]) for _, _, record in records]),
+                                     keys=[record.get("content_hash") for _, _, record in records])
+
+build_similarity_index()
+
+# Rendered result pages, most recently viewed last. Stored results never change,
+# so an entry stays valid until it is evicted.
+page_cache = OrderedDict()
+page_cache_lock = threading.Lock()
+
+# Readiness: false while the warm-up started by start_warm_up() is running
+warmup_state = {"ready": True, "workers": []}
+
+def _warm_up():
+    try:
+        warmup_state["workers"] = job_queue.warm_up()
+        metrics.log_event(logger, "warm_up_finished", workers=warmup_state["workers"])
+    except Exception as e:
+        print(f"Error warming up: {str(e)}")
+    warmup_state["ready"] = True
+
+def start_warm_up():
+    # Workers boot and JIT-compile in the background; /ready reports when they are done
+    if not app.config['WARM_UP']:
+        return
+    warmup_state["ready"] = False
+    threading.Thread(target=_warm_up, name='warm-up', daemon=True).start()
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def requested_profile(data):
+    # An empty or missing choice uses the configured default
+    profile = data.get('profile') or None
+    if profile is not None and profile not in PROFILES:
+        raise ValueError(f"Unknown analysis profile: {profile}. Choose one of: {', '.join(PROFILES)}")
+    return profile
+
+def job_links(job_id):
+    return {
+        "job_id": job_id,
+        "status_url": url_for('job_status', job_id=job_id),
+        "report_url": url_for('job_report', job_id=job_id),
+        "result_url": url_for('result_page', result_id=job_id)
+    }
+
+def upload_response(session, status=200):
+    body = uploads.describe(session)
+    body["upload_url"] = url_for('upload_chunk', upload_id=session["id"])
+    if session["finished"]:
+        body.update(job_links(session["job_id"]))
+    response = jsonify(body)
+    response.status_code = status
+    response.headers['Upload-Offset'] = str(body["offset"])
+    response.headers['Upload-Length'] = str(body["length"])
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+def queue_full_response(retry_after, as_json, **fields):
+    # Nothing (more) was queued; the client should send the request again later
+    message = f"The server is busy with other analyses. Please try again in {retry_after} seconds."
+    if as_json:
+        response = jsonify({"error": message, "retry_after": retry_after, **fields})
+    else:
+        response = Response(render_template('error.html', error=message), mimetype='text/html')
+    response.status_code = 503
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def wants_json():
+    # API clients ask for JSON; browsers get redirected to the report page
+    best = request.accept_mimetypes.best_match(['application/json', 'text/html'])
+    return best == 'application/json' and request.accept_mimetypes[best] > request.accept_mimetypes['text/html']
+
+def ndjson_line(record):
+    if orjson is not None:
+        return orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_NUMPY)
+    return (json.dumps(record, separators=(',', ':')) + '\n').encode('utf-8')
+
+def gzip_stream(chunks, level=6):
+    # Gzip a streamed body, flushing after every chunk so each one reaches the client at once
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+def api_record(job, track):
+    # One NDJSON line of /api/analyze: the upload it answers, then its result or error
+    record = {
+        "index": track["index"],
+        "filename": track["filename"],
+        "job_id": job["id"],
+        "status": job["status"]
+    }
+    if job["status"] == "done":
+        record.update({
+            "song_name": job["song_name"],
+            "composer": job["composer"],
+            "profile": job["profile"],
+            "cached": job["cached"],
+            "features": job["result"]["features"],
+            "report": job["result"]["report"],
+            "result_url": url_for('result_page', result_id=job["id"]) if job["stored"] else None
+        })
+    else:
+        record["error"] = job.get("error") or "Analysis result is no longer available"
+    return record
+
+def result_variant(result_id, kind):
+    # HTML or JSON body for a stored result, plus its gzipped copy and validators
+    key = (result_id, kind)
+    with page_cache_lock:
+        entry = page_cache.get(key)
+        if entry is not None:
+            page_cache.move_to_end(key)
+            return entry
+
+    stored = report_store.load(result_id)
+    if stored is None:
+        return None
+    if kind == 'html':
+        record = json.loads(stored["data"])
+        body = render_template('results.html',
+                               song_name=record['song_name'],
+                               composer=record['composer'],
+                               report=record['report'],
+                               result_id=result_id).encode('utf-8')
+        mimetype = 'text/html'
+    else:
+        body = stored["data"]
+        mimetype = 'application/json'
+
+    entry = {
+        "body": body,
+        "gzip": gzip.compress(body, compresslevel=6),
+        "etag": hashlib.sha256(body).hexdigest()[:32],
+        "last_modified": stored["last_modified"],
+        "mimetype": mimetype
+    }
+    with page_cache_lock:
+        page_cache[key] = entry
+        while len(page_cache) > app.config['RESULT_PAGE_CACHE_SIZE']:
+            page_cache.popitem(last=False)
+    return entry
+
+def send_variant(entry):
+    gzipped = request.accept_encodings['gzip'] > 0
+    response = Response(entry["gzip"] if gzipped else entry["body"], mimetype=entry["mimetype"])
+    if gzipped:
+        response.headers['Content-Encoding'] = 'gzip'
+    # The two encodings are different representations, so they need different ETags
+    response.set_etag(entry["etag"] + ('-gz' if gzipped else ''))
+    response.last_modified = entry["last_modified"]
+    response.cache_control.public = True
+    response.cache_control.max_age = 3600
+    response.vary.add('Accept-Encoding')
+    return response.make_conditional(request)
+
+@app.before_request
+def start_request():
+    # Honour a caller's request id (if it looks like one) so logs can be joined across services
+    incoming = request.headers.get('X-Request-ID', '')
+    g.request_id = incoming if re.fullmatch(r'[A-Za-z0-9._-]{1,64}', incoming) else uuid.uuid4().hex
+    g.started = time.perf_counter()
+
+@app.after_request
+def finish_request(response):
+    elapsed = time.perf_counter() - g.started
+    endpoint = request.endpoint or 'unknown'
+    metrics.REQUEST_SECONDS.observe(elapsed, endpoint=endpoint)
+    metrics.REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+    response.headers['X-Request-ID'] = g.request_id
+    if endpoint != 'metrics_endpoint':
+        metrics.log_event(logger, "request", g.request_id,
+                          method=request.method,
+                          path=request.path,
+                          status=response.status_code,
+                          seconds=round(elapsed, 4))
+    return response
+
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/ready')
+def ready():
+    return jsonify(warmup_state), 200 if warmup_state["ready"] else 503
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
 @app.route('/upload_file', methods=['POST'])
 def upload_file():
+    # Turn uploads away before reading them when no analysis could be queued anyway
+    if job_queue.available() == 0:
+        return queue_full_response(job_queue.retry_after(), wants_json())
+
     if 'file' not in request.files:
         flash('No file selected')
         return redirect(url_for('index'))
@@ -48,43 +294,311 @@ def upload_file():
         return redirect(url_for('index'))
 
     if not allowed_file(file.filename):
-        flash('Invalid file type. Please upload MP3 or WAV files only.')
+        flash('Invalid file type. Please upload MP3, WAV, FLAC, OGG or M4A files.')
         return redirect(url_for('index'))
 
+    try:
+        profile = requested_profile(request.form)
+    except ValueError as e:
+        flash(str(e))
+        return redirect(url_for('index'))
+
+    filepath = None
     try:
         # Get form data
         composer = request.form.get('composer', 'Unknown')
         song_name = request.form.get('song_name', 'Untitled')
 
-        # Save the uploaded file
-        filename = secure_filename(file.filename)
+        # Save the uploaded file under a unique name so concurrent uploads never collide
+        filename = f"{uuid.uuid4().hex}_{secure_filename(file.filename)}"
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-
-        # Process the audio file
-        processed_filepath = audio_processor.process(filepath)
-        
-        # Extract features
-        features = feature_extractor.extract_features(processed_filepath)
-        
-        # Generate report
-        report = report_generator.generate_report(song_name, composer, features)
-        
-        # Clean up temporary files
+        with metrics.span('upload.save'):
+            file.save(filepath)
+        size = os.path.getsize(filepath)
+        metrics.UPLOAD_BYTES.observe(size)
+
+        # Queue the analysis; the worker removes the upload when it is done
+        with metrics.span('upload.submit'):
+            job_id = job_queue.submit(filepath, song_name, composer, request_id=g.request_id, profile=profile,
+                                      filename=file.filename)
+        metrics.log_event(logger, "upload_queued", g.request_id, job_id=job_id, bytes=size)
+
+    except QueueFull as e:
         if os.path.exists(filepath):
             os.remove(filepath)
-        if os.path.exists(processed_filepath) and processed_filepath != filepath:
-            os.remove(processed_filepath)
+        return queue_full_response(e.retry_after, wants_json())
+    except Exception as e:
+        # Nothing will pick the upload up if it never made it into the queue
+        if filepath and os.path.exists(filepath):
+            os.remove(filepath)
+        print(f"Error queueing upload: {str(e)}")
+        message = client_error(str(e), filepath, file.filename) if filepath else str(e)
+        flash(f'Error processing file: {message}')
+        if isinstance(e, MemoryBudgetExceeded):
+            return render_template('error.html', error=message), 413
+        return render_template('error.html', error=message)
 
-        return render_template('results.html', 
-                             song_name=song_name,
-                             composer=composer,
-                             report=report)
+    if wants_json():
+        return jsonify(job_links(job_id)), 202
+    return redirect(url_for('job_report', job_id=job_id), code=303)
 
-    except Exception as e:
-        flash(f'Error processing file: {str(e)}')
-        return render_template('error.html', error=str(e))
+@app.route('/api/analyze', methods=['POST'])
+def api_analyze():
+    # Any number of files in one multipart request (fields named "files"); each track's
+    # features and report are streamed back as one NDJSON line as soon as it finishes
+    if job_queue.available() == 0:
+        return queue_full_response(job_queue.retry_after(), True)
+    files = request.files.getlist('files') + request.files.getlist('file')
+    if not files:
+        return jsonify({"error": "No files uploaded; send them as multipart fields named 'files'"}), 400
+    # A request must fit in the analysis queue as a whole
+    max_files = min(app.config['API_MAX_FILES'], app.config['ANALYSIS_WORKERS'] + app.config['ANALYSIS_QUEUE_SIZE'])
+    if len(files) > max_files:
+        return jsonify({"error": f"At most {max_files} files per request"}), 400
+    if len(files) > (job_queue.available() or len(files)):
+        return queue_full_response(job_queue.retry_after(), True)
+    invalid = [file.filename for file in files if not allowed_file(file.filename)]
+    if invalid:
+        return jsonify({"error": "Invalid file type. Please upload MP3, WAV, FLAC, OGG or M4A files.",
+                        "files": invalid}), 400
+    try:
+        profile = requested_profile(request.form)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Optional titles and composers, given in the same order as the files
+    song_names = request.form.getlist('song_name')
+    composers = request.form.getlist('composer')
+
+    tracks = {}  # Job id -> position and name of its upload
+    for index, file in enumerate(files):
+        song_name = (song_names[index] if index < len(song_names) else '') or os.path.splitext(file.filename)[0]
+        composer = (composers[index] if index < len(composers) else '') or 'Unknown'
+        filepath = os.path.join(app.config['UPLOAD_FOLDER'], f"{uuid.uuid4().hex}_{secure_filename(file.filename)}")
+        try:
+            with metrics.span('upload.save'):
+                file.save(filepath)
+            metrics.UPLOAD_BYTES.observe(os.path.getsize(filepath))
+            with metrics.span('upload.submit'):
+                job_id = job_queue.submit(filepath, song_name, composer, request_id=g.request_id, profile=profile,
+                                          filename=file.filename)
+        except QueueFull as e:
+            # Tracks queued so far still finish and can be fetched from their job pages
+            if os.path.exists(filepath):
+                os.remove(filepath)
+            return queue_full_response(e.retry_after, True, jobs=[job_links(job_id) for job_id in tracks])
+        except Exception as e:
+            if os.path.exists(filepath):
+                os.remove(filepath)
+            print(f"Error queueing upload: {str(e)}")
+            status = 413 if isinstance(e, MemoryBudgetExceeded) else 500  # Too big to analyze at all
+            return jsonify({"error": f"Error processing {file.filename}: {client_error(str(e), filepath, file.filename)}",
+                            "jobs": [job_links(job_id) for job_id in tracks]}), status
+        tracks[job_id] = {"index": index, "filename": file.filename}
+    metrics.log_event(logger, "api_analyze_queued", g.request_id, jobs=len(tracks))
+
+    def results():
+        pending = set(tracks)
+        try:
+            for job in job_queue.as_completed(list(tracks), app.config['API_RESULT_TIMEOUT']):
+                pending.discard(job["id"])
+                yield ndjson_line(api_record(job, tracks[job["id"]]))
+        except TimeoutError:
+            # Whatever is still running can be polled at its job URL
+            for job_id in pending:
+                record = {"index": tracks[job_id]["index"], "filename": tracks[job_id]["filename"], "status": "timeout"}
+                record.update(job_links(job_id))
+                yield ndjson_line(record)
+
+    body = results()
+    gzipped = request.accept_encodings['gzip'] > 0
+    if gzipped:
+        body = gzip_stream(body)
+    response = Response(stream_with_context(body), mimetype='application/x-ndjson')
+    if gzipped:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = 'no-store'
+    response.headers['X-Accel-Buffering'] = 'no'  # Keep reverse proxies from holding lines back
+    return response
+
+@app.route('/uploads', methods=['POST'])
+def create_upload():
+    # Start a resumable upload; the file is then sent in chunks with PATCH
+    data = request.get_json(silent=True) or request.form
+    filename = secure_filename(data.get('filename', ''))
+    if not filename or not allowed_file(filename):
+        return jsonify({"error": "Invalid file type. Please upload MP3, WAV, FLAC, OGG or M4A files."}), 400
+    if job_queue.available() == 0:
+        return queue_full_response(job_queue.retry_after(), True)
+    try:
+        length = int(data.get('length', 0))
+        session = uploads.create(filename, length,
+                                 data.get('song_name', 'Untitled'),
+                                 data.get('composer', 'Unknown'),
+                                 requested_profile(data))
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    response = upload_response(session, 201)
+    response.headers['Location'] = url_for('upload_chunk', upload_id=session["id"])
+    return response
+
+@app.route('/uploads/<upload_id>', methods=['GET'])
+def upload_status(upload_id):
+    # Clients resume from the returned offset after a dropped connection (HEAD works too)
+    session = uploads.get(upload_id)
+    if session is None:
+        abort(404)
+    return upload_response(session)
+
+@app.route('/uploads/<upload_id>', methods=['PATCH'])
+def upload_chunk(upload_id):
+    session = uploads.get(upload_id)
+    if session is None:
+        abort(404)
+    try:
+        offset = int(request.headers['Upload-Offset'])
+    except (KeyError, ValueError):
+        return jsonify({"error": "Upload-Offset header is required"}), 400
+
+    try:
+        with metrics.span('upload.chunk'):
+            offset = uploads.append(session, offset, request.stream)
+    except OffsetMismatch:
+        return upload_response(session, 409)
+
+    # Decoding starts once the header and a first stretch of audio are in, while the rest is still arriving
+    if (session["job_id"] is None and session["extension"] in STREAMING_FORMATS
+            and not uploads.complete(session)
+            and uploads.stream_ready(session, app.config['UPLOAD_STREAM_MIN_BYTES'])):
+        try:
+            session["job_id"] = job_queue.submit_stream(session["path"], session["length"],
+                                                        session["song_name"], session["composer"],
+                                                        request_id=g.request_id,
+                                                        stall_timeout=app.config['UPLOAD_STALL_TIMEOUT'],
+                                                        profile=session["profile"], filename=session["filename"])
+            metrics.log_event(logger, "upload_streaming", g.request_id,
+                              upload_id=upload_id, job_id=session["job_id"])
+        except QueueFull:
+            pass  # No room to start early; a later chunk tries again, or the upload is queued once complete
+
+    if uploads.complete(session) and not session["finished"]:
+        try:
+            complete_upload(session)
+        except QueueFull as e:
+            # Every byte is kept: an empty PATCH at the final offset queues the upload again
+            response = upload_response(session, 503)
+            response.headers['Retry-After'] = str(e.retry_after)
+            return response
+        except MemoryBudgetExceeded as e:
+            return jsonify({"error": str(e)}), 413  # Too big to analyze at all
+    return upload_response(session)
+
+@app.route('/uploads/<upload_id>', methods=['DELETE'])
+def delete_upload(upload_id):
+    if uploads.get(upload_id) is None:
+        abort(404)
+    uploads.abort(upload_id)
+    return '', 204
+
+def complete_upload(session):
+    # Formats that cannot be decoded from a partial file are analyzed now, as are
+    # uploads whose streaming analysis gave up waiting for a chunk
+    job = job_queue.get(session["job_id"]) if session["job_id"] else None
+    if job is None or (job["status"] == "failed" and os.path.exists(session["path"])):
+        filepath = session["path"][:-len('.part')]
+        os.replace(session["path"], filepath)
+        try:
+            session["job_id"] = job_queue.submit(filepath, session["song_name"], session["composer"],
+                                                 request_id=g.request_id, profile=session["profile"],
+                                                 filename=session["filename"])
+        except QueueFull:
+            os.replace(filepath, session["path"])
+            raise
+        except MemoryBudgetExceeded:
+            # No retry can succeed, so the upload is dropped along with its bytes
+            os.remove(filepath)
+            uploads.abort(session["id"])
+            raise
+    uploads.finish(session)
+    metrics.UPLOAD_BYTES.observe(session["length"])
+    metrics.log_event(logger, "upload_queued", g.request_id,
+                      upload_id=session["id"], job_id=session["job_id"], bytes=session["length"])
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    status = job_queue.status(job_id)
+    if status is None:
+        abort(404)
+    return jsonify(status)
+
+@app.route('/jobs/<job_id>/report')
+def job_report(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        abort(404)
+
+    if job['status'] == 'failed':
+        return render_template('error.html', error=job['error'])
+    if job['status'] != 'done':
+        return render_template('processing.html', job=job)
+
+    # Finished reports live at their permalink, where repeat views are cached
+    if job['stored']:
+        return redirect(url_for('result_page', result_id=job_id), code=303)
+    return render_template('results.html', 
+                         song_name=job['song_name'],
+                         composer=job['composer'],
+                         report=job['result']['report'])
+
+@app.route('/results/<result_id>')
+def result_page(result_id):
+    entry = result_variant(result_id, 'html')
+    if entry is None:
+        # Still being analyzed: send the browser to the job page, which refreshes
+        if job_queue.get(result_id) is not None:
+            return redirect(url_for('job_report', job_id=result_id))
+        abort(404)
+    return send_variant(entry)
+
+@app.route('/results/<result_id>.json')
+def result_json(result_id):
+    entry = result_variant(result_id, 'json')
+    if entry is None:
+        abort(404)
+    return send_variant(entry)
+
+@app.route('/results/<result_id>/similar')
+def similar_results(result_id):
+    # Stored results nearest to this one, as JSON
+    if similarity_index is None:
+        abort(404)
+    # Other results for the same audio are the same track, so its content hash is left out
+    query = similarity_index.vector(result_id)
+    key = similarity_index.key(result_id)
+    if query is None:
+        stored = report_store.load(result_id)
+        if stored is None:
+            abort(404)
+        record = json.loads(stored["data"])
+        query = embed(record["features"])
+        key = record.get("content_hash") or result_id
+
+    k = min(max(request.args.get('k', 10, type=int), 1), 100)
+    with metrics.span('similar.search'):
+        matches = similarity_index.search(query, k, exclude=key)
+    for match in matches:
+        stored = report_store.load(match["id"])
+        record = json.loads(stored["data"]) if stored is not None else {}
+        match.update({
+            "song_name": record.get("song_name"),
+            "composer": record.get("composer"),
+            "result_url": url_for('result_page', result_id=match["id"])
+        })
+    return jsonify({"id": result_id, "matches": matches})
 
 if __name__ == '__main__':
     # Start the Flask server
+    start_warm_up()
     app.run(debug=app.config['DEBUG']) 
\ No newline at end of file
@@ -0,0 +1,63 @@
+import argparse
+import os
+import sys
+from config import Config
+from modules.warmup import configure_jit_cache
+from modules.analysis_pipeline import PROFILES
+from modules.report_store import ReportStore
+from modules.batch_analyzer import BatchAnalyzer, JsonlResultWriter, ParquetResultWriter, find_tracks, regenerate_reports
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Analyze a directory or manifest of audio files in parallel.')
+    parser.add_argument('source', help='Directory to scan, or a manifest (.txt with one path per line, or .csv with a "path" column)')
+    parser.add_argument('-o', '--output', required=True,
+                        help='Results file (.jsonl) or directory (.parquet); rerunning with the same output resumes')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('--report', action='store_true', help='Also generate the full report for each track')
+    parser.add_argument('--publish', action='store_true',
+                        help='Also store each analyzed track (with its report) in the app\'s result store, '
+                             'where the app serves it and, from its next start, finds it as similar')
+    parser.add_argument('--frames', metavar='DIR', default=None,
+                        help='Also store each track\'s frame-level features (float16 .npy) in DIR')
+    parser.add_argument('--profile', choices=sorted(PROFILES), default=Config.ANALYSIS_PROFILE,
+                        help='Analysis profile (default: %(default)s); preview analyzes three 15 s excerpts')
+    parser.add_argument('--regenerate', action='store_true',
+                        help='Treat source as an earlier .jsonl run and rebuild its reports from the stored features')
+    parser.add_argument('--reception-model', metavar='JSON', default=None,
+                        help='Reception model coefficients to score the regenerated reports with '
+                             '(default: none; reports get no reception scores)')
+    args = parser.parse_args(argv)
+
+    # Reuse JIT-compiled librosa code across runs; must happen before librosa is imported
+    configure_jit_cache(Config.NUMBA_CACHE_DIR)
+
+    if args.reception_model and not args.regenerate:
+        parser.error('--reception-model only applies with --regenerate')
+    if args.publish and args.regenerate:
+        parser.error('--publish only applies to new analyses, not with --regenerate')
+    if args.regenerate and os.path.exists(args.output):
+        parser.error('--regenerate writes a new results file; the output must not exist yet')
+
+    if args.output.endswith('.parquet'):
+        writer = ParquetResultWriter(args.output)
+    else:
+        writer = JsonlResultWriter(args.output)
+
+    if args.regenerate:
+        summary = regenerate_reports(args.source, writer, reception_model=args.reception_model)
+        print(f"Done: {summary['ok']} reports regenerated, {summary['skipped']} failed tracks skipped")
+        return 0
+
+    store = ReportStore(Config.REPORT_STORE_DIR) if args.publish else None
+
+    tracks = find_tracks(args.source)
+    print(f"Found {len(tracks)} tracks in {args.source}")
+    summary = BatchAnalyzer(max_workers=args.workers, with_report=args.report or args.publish,
+                            resample_quality=Config.RESAMPLE_QUALITY, profile=args.profile,
+                            frame_store_dir=args.frames,
+                            memory_budget=Config.WORKER_MEMORY_BUDGET, store=store).run(tracks, writer)
+    print(f"Done: {summary['ok']} analyzed, {summary['failed']} failed, {summary['skipped']} already complete")
+    return 0 if summary['failed'] == 0 else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,235 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import librosa
+import numpy as np
+import soundfile as sf
+
+from modules.analysis_pipeline import AnalysisPipeline
+from modules.audio_decoder import RESAMPLE_QUALITIES, AudioDecoder
+from modules.audio_processor import AudioProcessor
+from modules.feature_extractor import FeatureExtractor
+from modules.loudness_meter import LoudnessMeter
+from modules.report_generator import ReportGenerator
+from modules.vocal_separator import VocalSeparator
+
+SAMPLE_RATE = 44100
+DURATIONS = {'30s': 30, '3min': 180, '10min': 600}
+CHANNELS = {'mono': 1, 'stereo': 2}
+FORMATS = {'wav': None, 'flac': None, 'ogg': 'VORBIS', 'mp3': 'MPEG_LAYER_III'}  # libsndfile subtype
+
+# Set from --resample-quality; forked stage processes inherit it
+resample_quality = 'HQ'
+
+def synthesize(duration: float, channels: int, seed: int = 0) -> np.ndarray:
+    # Deterministic test track: 120 BPM kick, bass line, A minor pad and a little noise
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(duration * SAMPLE_RATE)) / SAMPLE_RATE
+
+    beat = (t * 2.0) % 1.0
+    kick = np.sin(2 * np.pi * 55 * t) * np.exp(-beat * 12)
+    bass_notes = np.array([55.0, 55.0, 43.65, 49.0])[(t // 2).astype(int) % 4]
+    bass = 0.3 * np.sin(2 * np.pi * bass_notes * t)
+    pad = sum(0.08 * np.sin(2 * np.pi * f * t) for f in (220.0, 261.63, 329.63))
+
+    left = 0.5 * kick + bass + pad + 0.02 * rng.standard_normal(len(t))
+    if channels == 1:
+        audio = left[:, np.newaxis]
+    else:
+        right = 0.5 * kick + bass + np.roll(pad, 220) + 0.02 * rng.standard_normal(len(t))
+        audio = np.stack([left, right], axis=1)
+    return (0.8 * audio / np.max(np.abs(audio))).astype(np.float32)
+
+def write_audio(path: str, audio: np.ndarray, audio_format: str):
+    # Written a second at a time: libsndfile's Vorbis encoder can crash on very large writes
+    with sf.SoundFile(path, 'w', SAMPLE_RATE, audio.shape[1], subtype=FORMATS[audio_format]) as f:
+        for start in range(0, len(audio), SAMPLE_RATE):
+            f.write(audio[start:start + SAMPLE_RATE])
+
+def _stage_functions():
+    processor = AudioProcessor()
+    decoder = AudioDecoder()
+    extractor = FeatureExtractor()
+    separator = VocalSeparator()
+    meter = LoudnessMeter()
+    reporter = ReportGenerator()
+    pipeline = AnalysisPipeline()
+    features = {
+        "tempo": 120.0, "energy": 0.5, "spectral_centroid": 2200.0,
+        "spectral_rolloff": 6000.0, "key": 'A', "mood": 'Upbeat'
+    }
+
+    def process(path):
+        os.remove(processor.process(path))
+
+    def separate(path):
+        for stem in separator.separate(path):
+            os.remove(stem)
+
+    def separate_chunked(path):
+        for stem in separator.separate_chunked(path):
+            os.remove(stem)
+
+    return {
+        'decode': processor.decode,
+        'load': lambda path: decoder.load(path, 22050, quality=resample_quality),
+        'load_librosa': lambda path: librosa.load(path, sr=22050),
+        'process': process,
+        'extract_features': extractor.extract_features,
+        'extract_features_streaming': extractor.extract_features_streaming,
+        'loudness': meter.measure_file,
+        'separate': separate,
+        'separate_chunked': separate_chunked,
+        'generate_report': lambda path: reporter.generate_report('Benchmark', 'SongScope', features),
+        'end_to_end': lambda path: pipeline.analyze(path, 'Benchmark', 'SongScope')
+    }
+
+def _measure(stage: str, path: str, queue):
+    # Runs in a forked child so peak RSS belongs to this stage alone
+    fn = _stage_functions()[stage]
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    try:
+        fn(path)
+        error = None
+    except Exception as e:
+        error = str(e)
+    queue.put({
+        "wall_s": time.perf_counter() - wall,
+        "cpu_s": time.process_time() - cpu,
+        "peak_rss_mb": (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024.0,
+        "error": error
+    })
+
+def run_stage(stage: str, path: str, repeat: int):
+    context = multiprocessing.get_context('fork')
+    runs = []
+    for _ in range(repeat):
+        queue = context.Queue()
+        child = context.Process(target=_measure, args=(stage, path, queue))
+        child.start()
+        child.join()
+        runs.append(queue.get() if child.exitcode == 0 else {"error": f"exit code {child.exitcode}"})
+
+    errors = [run["error"] for run in runs if run.get("error")]
+    if errors:
+        return {"error": errors[0]}
+    return {
+        "wall_s": statistics.median(run["wall_s"] for run in runs),
+        "cpu_s": statistics.median(run["cpu_s"] for run in runs),
+        "peak_rss_mb": max(run["peak_rss_mb"] for run in runs),
+        "repeat": repeat
+    }
+
+def run(stages, durations, channels, formats, repeat: int):
+    workdir = tempfile.mkdtemp(prefix='songscope-bench-')
+    try:
+        # Warm up JIT-compiled librosa paths so they are not billed to the first stage
+        warmup = os.path.join(workdir, 'warmup.wav')
+        sf.write(warmup, synthesize(2, 1), SAMPLE_RATE)
+        AnalysisPipeline().analyze(warmup, 'Warmup', 'SongScope')
+
+        results = []
+        for duration_name in durations:
+            for channel_name in channels:
+                audio = synthesize(DURATIONS[duration_name], CHANNELS[channel_name])
+                for audio_format in formats:
+                    path = os.path.join(workdir, f"{duration_name}_{channel_name}.{audio_format}")
+                    write_audio(path, audio, audio_format)
+                    for stage in stages:
+                        result = run_stage(stage, path, repeat)
+                        result.update({"stage": stage, "duration": duration_name,
+                                       "channels": channel_name, "format": audio_format})
+                        results.append(result)
+                        print(_format(result), flush=True)
+                    os.remove(path)
+        return results
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def _format(result) -> str:
+    name = f"{result['stage']:<28}{result['duration']:>6} {result['channels']:<7}{result['format']:<5}"
+    if result.get("error"):
+        return f"{name} error: {result['error']}"
+    return f"{name} wall {result['wall_s']:8.3f}s  cpu {result['cpu_s']:8.3f}s  peak +{result['peak_rss_mb']:8.1f} MB"
+
+def environment():
+    import librosa
+    import scipy
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "librosa": librosa.__version__,
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+
+def compare(current, baseline, time_tolerance: float, memory_tolerance: float):
+    # A stage regresses when it is slower or bigger than the baseline by more than the tolerance
+    # Results from before formats were benchmarked are all WAV
+    key = lambda r: (r["stage"], r["duration"], r["channels"], r.get("format", "wav"))
+    previous = {key(r): r for r in baseline["results"] if not r.get("error")}
+    regressions = []
+    for result in current:
+        before = previous.get(key(result))
+        if before is None or result.get("error"):
+            continue
+        for metric, tolerance in (("wall_s", time_tolerance), ("cpu_s", time_tolerance),
+                                  ("peak_rss_mb", memory_tolerance)):
+            # Ignore tiny absolute values where noise dominates
+            floor = 0.05 if metric != "peak_rss_mb" else 5.0
+            if result[metric] > max(before[metric], floor) * (1 + tolerance):
+                regressions.append(f"{result['stage']} {result['duration']} {result['channels']} {result['format']}: "
+                                   f"{metric} {before[metric]:.3f} -> {result[metric]:.3f}")
+    return regressions
+
+def main(argv=None):
+    stage_names = list(_stage_functions().keys())
+    parser = argparse.ArgumentParser(description='Benchmark every SongScope analysis stage on synthetic audio.')
+    parser.add_argument('-o', '--output', default='benchmark_results.json', help='Where to write the JSON results')
+    parser.add_argument('--stages', nargs='+', choices=stage_names,
+                        default=[name for name in stage_names if name != 'separate'],
+                        help='Stages to run (separate, the exact librosa path, is opt-in: it is quadratic in length)')
+    parser.add_argument('--durations', nargs='+', choices=list(DURATIONS), default=list(DURATIONS))
+    parser.add_argument('--channels', nargs='+', choices=list(CHANNELS), default=list(CHANNELS))
+    parser.add_argument('--formats', nargs='+', choices=list(FORMATS), default=['wav'],
+                        help='Encodings to benchmark; compare load with load_librosa to see the decoder speedup')
+    parser.add_argument('--resample-quality', choices=RESAMPLE_QUALITIES, default='HQ',
+                        help='soxr preset used by the load stage')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per stage; the median time is reported')
+    parser.add_argument('--compare', help='Baseline results JSON to check for regressions')
+    parser.add_argument('--time-tolerance', type=float, default=0.10, help='Allowed slowdown (0.10 = 10%%)')
+    parser.add_argument('--memory-tolerance', type=float, default=0.20, help='Allowed peak memory growth')
+    args = parser.parse_args(argv)
+
+    global resample_quality
+    resample_quality = args.resample_quality
+    results = run(args.stages, args.durations, args.channels, args.formats, args.repeat)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.time_tolerance, args.memory_tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print("No regressions against", args.compare)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
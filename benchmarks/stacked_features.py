@@ -0,0 +1,91 @@
+import argparse
+import sys
+import time
+
+import librosa
+import numpy as np
+
+from benchmarks.run_benchmarks import SAMPLE_RATE, synthesize
+from modules.feature_extractor import FeatureExtractor
+
+# Stacked (vectorized) feature extraction for equal-length excerpts, kept as a
+# benchmark rather than an API: on the machines measured so far it is slower
+# than calling extract_features_from_array once per excerpt, so nothing uses it.
+# Run it again before reaching for batching on a new machine.
+
+def extract_stacked(extractor: FeatureExtractor, ys, sr: int):
+    # One STFT over the (n_tracks, samples) stack; every spectral feature is a batched
+    # product over the 3-D spectrogram. Tuning and tempo stay per track, as in the loop
+    y = np.stack(ys)
+    magnitude = np.abs(librosa.stft(y, n_fft=extractor.n_fft, hop_length=extractor.hop_length))
+    power = magnitude ** 2
+    rms = extractor._rms(y)
+    centroid, rolloff = extractor._brightness(magnitude, sr)
+
+    # power_to_db clips 80 dB below each track's own peak
+    mel = librosa.feature.melspectrogram(S=power, sr=sr, n_fft=extractor.n_fft, hop_length=extractor.hop_length)
+    mel_db = librosa.power_to_db(mel, top_db=None)
+    mel_db = np.maximum(mel_db, mel_db.max(axis=(-2, -1), keepdims=True) - 80.0)
+    onset_envelopes = librosa.onset.onset_strength(S=mel_db, sr=sr, hop_length=extractor.hop_length,
+                                                   aggregate=np.median)
+
+    # estimate_tuning, with one piptrack over the stack
+    pitch, pitch_magnitude = librosa.piptrack(S=power, sr=sr, n_fft=extractor.n_fft)
+    tunings = []
+    for track_pitch, track_magnitude in zip(pitch, pitch_magnitude):
+        voiced = track_pitch > 0
+        threshold = np.median(track_magnitude[voiced]) if voiced.any() else 0.0
+        tunings.append(librosa.pitch_tuning(track_pitch[(track_magnitude >= threshold) & voiced]))
+    filterbanks = np.stack([librosa.filters.chroma(sr=sr, n_fft=extractor.n_fft, tuning=tuning)
+                            for tuning in tunings])
+    chroma = librosa.util.normalize(np.matmul(filterbanks, power), norm=np.inf, axis=-2)
+
+    return [extractor._build_features(extractor._tempo(onset_envelopes[i], sr), np.mean(rms[i]),
+                                      np.mean(centroid[i]), np.mean(rolloff[i]), np.mean(chroma[i], axis=1))
+            for i in range(len(ys))]
+
+def excerpts(count: int, seconds: float, sr: int):
+    # Equal-length mono excerpts at the analysis rate, each with its own seed and level
+    return [librosa.resample(synthesize(seconds, 1, seed=i)[:, 0], orig_sr=SAMPLE_RATE, target_sr=sr)
+            * np.float32(0.5 + 0.05 * i) for i in range(count)]
+
+def check(expected, actual):
+    for before, after in zip(expected, actual):
+        assert after["tempo"] == before["tempo"] and after["key"] == before["key"]
+        for name in ("energy", "spectral_centroid", "spectral_rolloff"):
+            np.testing.assert_allclose(after[name], before[name], rtol=1e-5)
+        np.testing.assert_allclose(after["chroma_profile"], before["chroma_profile"], rtol=1e-5, atol=1e-6)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time stacked feature extraction against the per-track loop.')
+    parser.add_argument('--tracks', type=int, default=16, help='Excerpts per stack')
+    parser.add_argument('--seconds', type=float, default=15.0, help='Excerpt length')
+    parser.add_argument('--stack', type=int, nargs='+', default=[2, 4, 16], help='Stack sizes to time')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per variant; the best time is reported')
+    args = parser.parse_args(argv)
+
+    extractor = FeatureExtractor()
+    sr = extractor.sample_rate
+    ys = excerpts(args.tracks, args.seconds, sr)
+
+    def loop():
+        return [extractor.extract_features_from_array(y, sr) for y in ys]
+
+    def stacked(size):
+        return lambda: [features for start in range(0, len(ys), size)
+                        for features in extract_stacked(extractor, ys[start:start + size], sr)]
+
+    expected = loop()
+    variants = [("loop", loop)] + [(f"stacked x{size}", stacked(size)) for size in args.stack]
+    for name, run in variants:
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            results = run()
+            timings.append(time.perf_counter() - start)
+        check(expected, results)
+        print(f"{name:<12}{min(timings):8.3f}s  ({args.tracks} x {args.seconds:g} s)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,8 +3,41 @@ import os
 class Config:
     DEBUG = False
     UPLOAD_FOLDER = 'uploads'
-    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    MAX_CONTENT_LENGTH = 256 * 1024 * 1024  # 256MB max file size; long tracks are streamed
     SECRET_KEY = os.urandom(24).hex()  # Generate a secure random key
+    ANALYSIS_WORKERS = int(os.environ.get('SONGSCOPE_ANALYSIS_WORKERS', 2))  # Analysis process pool size
+    # Analyses that may wait for a free worker; beyond that, uploads get 503 with Retry-After
+    ANALYSIS_QUEUE_SIZE = int(os.environ.get('SONGSCOPE_ANALYSIS_QUEUE_SIZE', 16))
+    # Memory one analysis may add to a worker, in MB; tracks predicted to need more are
+    # analyzed block by block, and refused if even that does not fit. 0 for no limit
+    WORKER_MEMORY_BUDGET = int(os.environ.get('SONGSCOPE_WORKER_MEMORY_MB', 2048)) * 1024 * 1024 or None
+    # Threads each worker runs independent analysis stages on (loudness alongside
+    # features, chroma alongside tempo...); more cut latency but hold more memory at once
+    ANALYSIS_STAGE_THREADS = int(os.environ.get('SONGSCOPE_STAGE_THREADS', 2))
+    RESULT_CACHE_DIR = os.environ.get('SONGSCOPE_RESULT_CACHE_DIR', 'cache/results')  # Empty disables the cache
+    RESULT_CACHE_MAX_BYTES = 256 * 1024 * 1024  # 256MB of cached feature sets
+    REPORT_STORE_DIR = os.environ.get('SONGSCOPE_REPORT_STORE_DIR', 'results')  # Finished reports, served at /results/<id>
+    FRAME_STORE_DIR = os.environ.get('SONGSCOPE_FRAME_STORE_DIR', 'frames')  # Per-frame features; empty disables
+    SIMILARITY_INDEX_DIR = os.environ.get('SONGSCOPE_SIMILARITY_INDEX_DIR', 'index')  # Empty disables similar-track search
+    SIMILARITY_PROBES = 8  # Index lists scanned per similarity query; more is slower and more exact
+    RESULT_PAGE_CACHE_SIZE = 256  # Rendered result pages kept in memory
+    API_MAX_FILES = 100  # Files accepted by one /api/analyze request
+    API_RESULT_TIMEOUT = 3600  # Seconds /api/analyze streams results before listing the rest as timed out
+    UPLOAD_STALL_TIMEOUT = 30  # Seconds a streaming analysis waits for the next chunk before giving up
+    UPLOAD_STREAM_MIN_BYTES = 1024 * 1024  # Bytes (and a readable header) needed before a streaming analysis starts
+    # Uploads analyzed while still arriving; always fewer than the workers, so clients
+    # that upload slowly never hold every worker. 0 analyzes every upload once complete
+    STREAMING_ANALYSES = int(os.environ.get('SONGSCOPE_STREAMING_ANALYSES', max(ANALYSIS_WORKERS - 1, 0)))
+    UPLOAD_SESSION_TTL = 24 * 3600  # Idle resumable uploads are discarded after this many seconds
+    ANALYSIS_PROFILE = os.environ.get('SONGSCOPE_ANALYSIS_PROFILE', 'standard')  # preview, standard or precise
+    # soxr resampling preset per analysis mode (VHQ, HQ, MQ, LQ or QQ), overriding the
+    # analysis profile's; only modes whose variable is set are overridden
+    RESAMPLE_QUALITY = {mode: quality for mode, quality in (
+        ('standard', os.environ.get('SONGSCOPE_RESAMPLE_QUALITY')),
+        ('streaming', os.environ.get('SONGSCOPE_STREAM_RESAMPLE_QUALITY'))
+    ) if quality}
+    WARM_UP = os.environ.get('SONGSCOPE_WARM_UP', '1') == '1'  # Warm analysis workers up before serving
+    NUMBA_CACHE_DIR = os.environ.get('SONGSCOPE_NUMBA_CACHE_DIR', 'cache/numba')  # Persistent JIT cache
 
 class DevelopmentConfig(Config):
-    DEBUG = True 
\ No newline at end of file
+    DEBUG = True 
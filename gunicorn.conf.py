@@ -0,0 +1,24 @@
+import os
+
+# The app is imported once in the master (preload_app), so a worker that is
+# restarted comes back without importing numpy, librosa or the similarity index again
+wsgi_app = 'wsgi:app'
+preload_app = True
+bind = os.environ.get('SONGSCOPE_BIND', '0.0.0.0:8000')
+
+# One worker process serving requests from a thread pool. Job state lives in
+# that process (analyses run in its own process pool), so a second worker would
+# answer status polls for jobs it never saw. Overload is handled by the analysis
+# queue limit (SONGSCOPE_ANALYSIS_QUEUE_SIZE), which answers 503 with Retry-After
+workers = 1
+worker_class = 'gthread'
+threads = int(os.environ.get('SONGSCOPE_HTTP_THREADS', 16))
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
+
+def post_fork(server, worker):
+    # Threads and process pools do not survive a fork, so the analysis workers
+    # are started (and warmed up) in the serving process, never in the master
+    from wsgi import start_warm_up
+    start_warm_up()
@@ -0,0 +1,327 @@
+import importlib
+import os
+import numpy as np
+import soundfile as sf
+from typing import Dict, Any, List, Optional, Tuple
+from modules import memory_model, metrics
+from modules.stage_graph import StageGraph
+
+# Components are built on first use: importing them pulls in librosa, numba and
+# scipy, which the web process should not pay for before it has to
+_COMPONENTS = {
+    "audio_processor": ("modules.audio_processor", "AudioProcessor"),
+    "feature_extractor": ("modules.feature_extractor", "FeatureExtractor"),
+    "loudness_meter": ("modules.loudness_meter", "LoudnessMeter"),
+    "report_generator": ("modules.report_generator", "ReportGenerator")
+}
+
+# Analysis profiles. resample_quality is per analysis mode: whole-track analysis,
+# and long tracks analyzed block by block. preview analyzes `excerpts` evenly
+# spaced excerpts of `excerpt_seconds` each instead of the whole track; it keeps
+# the standard rate because brightness (and so mood) shifts at lower rates.
+PROFILES = {
+    "preview": {
+        "sample_rate": 22050, "hop_length": 1024, "n_fft": 2048,
+        "resample_quality": {"standard": "HQ", "streaming": "HQ"},
+        "excerpts": 3, "excerpt_seconds": 15.0
+    },
+    "standard": {
+        "sample_rate": 22050, "hop_length": 512, "n_fft": 2048,
+        "resample_quality": {"standard": "HQ", "streaming": "HQ"},
+        "excerpts": None, "excerpt_seconds": None
+    },
+    "precise": {
+        "sample_rate": 44100, "hop_length": 512, "n_fft": 4096,
+        "resample_quality": {"standard": "VHQ", "streaming": "VHQ"},
+        "excerpts": None, "excerpt_seconds": None
+    }
+}
+DEFAULT_PROFILE = "standard"
+
+# Component attributes set from the profile as each component is built
+_PROFILE_ATTRIBUTES = {
+    "audio_processor": {"sample_rate": "sample_rate"},
+    "feature_extractor": {"sample_rate": "sample_rate", "hop_length": "hop_length", "n_fft": "n_fft"}
+}
+
+# Component attributes that take their value from a mode's resampling quality
+_QUALITY_ATTRIBUTES = {
+    "audio_processor": {"resample_quality": "standard"},
+    "feature_extractor": {"resample_quality": "standard", "stream_resample_quality": "streaming"}
+}
+
+class MemoryBudgetExceeded(Exception):
+    """A track would need more memory than the worker's budget in every analysis mode."""
+
+class AnalysisPipeline:
+    def __init__(self, resample_quality: Optional[Dict[str, str]] = None, profile: str = DEFAULT_PROFILE,
+                 memory_budget: Optional[int] = None, stage_threads: int = 1):
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown analysis profile: {profile}")
+        self.profile = profile
+        self.settings = PROFILES[profile]
+        self.streaming_min_duration = 10 * 60  # Seconds; longer tracks are analyzed block by block
+        # When neither soundfile nor ffprobe can tell a file's length, it is estimated from
+        # the file size at this many bits per second (48 kHz stereo); low, so the estimate is long
+        self.fallback_bitrate = 64000
+        # Bytes one analysis may add to a worker's memory; tracks predicted to need
+        # more are analyzed block by block. None for no limit
+        self.memory_budget = memory_budget
+        self.stage_threads = stage_threads  # Threads running independent analysis stages at once
+        # Explicit qualities (e.g. from config) override the profile's
+        self.resample_quality = dict(self.settings["resample_quality"], **(resample_quality or {}))
+
+    def __getattr__(self, name: str):
+        # Only called for attributes that are not set yet
+        if name not in _COMPONENTS:
+            raise AttributeError(name)
+        module_name, class_name = _COMPONENTS[name]
+        component = getattr(importlib.import_module(module_name), class_name)()
+        for attribute, setting in _PROFILE_ATTRIBUTES.get(name, {}).items():
+            setattr(component, attribute, self.settings[setting])
+        for attribute, mode in _QUALITY_ATTRIBUTES.get(name, {}).items():
+            setattr(component, attribute, self.resample_quality[mode])
+        setattr(self, name, component)
+        return component
+
+    def cache_params(self) -> Dict[str, Any]:
+        # Everything besides the audio bytes that changes the extracted features
+        return {
+            "version": 7,  # Bump whenever the extracted features, their values or the decoders change
+            "profile": self.profile,
+            "sample_rate": self.feature_extractor.sample_rate,
+            "resample_quality": self.resample_quality,
+            "hop_length": self.feature_extractor.hop_length,
+            "n_fft": self.feature_extractor.n_fft,
+            "excerpts": self.settings["excerpts"],
+            "excerpt_seconds": self.settings["excerpt_seconds"],
+            "memory_budget": self.memory_budget  # Decides which tracks are streamed
+        }
+
+    def frame_meta(self) -> Dict[str, Any]:
+        # Describes the frame-level features that extract_features(frames=...) fills in
+        return {
+            "profile": self.profile,
+            "sample_rate": self.feature_extractor.sample_rate,
+            "hop_length": self.feature_extractor.hop_length,
+            "n_fft": self.feature_extractor.n_fft
+        }
+
+    def plan(self, audio_path: str, keep_frames: bool = False) -> Dict[str, Any]:
+        """Analysis mode and predicted peak memory for a track, from its header alone.
+
+        Raises MemoryBudgetExceeded when no mode fits the memory budget. Formats
+        soundfile cannot read are always decoded whole, so their length (from
+        ffprobe, or estimated from the file size) is planned as a whole track.
+        """
+        try:
+            info = sf.info(audio_path)
+        except Exception:
+            probed = self.audio_processor.decoder.probe(audio_path)
+            if probed is None:
+                probed = (os.path.getsize(audio_path) * 8 / self.fallback_bitrate, 48000, 2)
+            return self._plan(*probed, keep_frames, seekable=False)
+        return self._plan(info.duration, info.samplerate, info.channels, keep_frames)
+
+    def _plan(self, duration: float, native_sr: int, channels: int, keep_frames: bool = False,
+              seekable: bool = True) -> Dict[str, Any]:
+        # `seekable` files can be read block by block (or excerpt by excerpt) with soundfile
+        def stages(mode, seconds=duration, threads=1):
+            return memory_model.predict_stages(seconds, native_sr, channels, self.settings["sample_rate"],
+                                               self.settings["hop_length"], self.settings["n_fft"],
+                                               mode, keep_frames, threads)
+
+        def in_memory(seconds):
+            # Stage threads hold more at once; fall back to one when only that fits
+            for threads in dict.fromkeys([self.stage_threads, 1]):
+                predicted = stages("whole", seconds, threads)
+                if self._fits(predicted):
+                    break
+            return threads, predicted
+
+        if self.settings["excerpts"]:
+            mode = "excerpts"
+            # Excerpts of other formats are sliced out of the whole decoded track
+            excerpts = self.settings["excerpts"] * self.settings["excerpt_seconds"]
+            threads, predicted = in_memory(min(duration, excerpts) if seekable else duration)
+        else:
+            # Long recordings are streamed so memory does not grow with their length,
+            # as is anything the whole-track analysis would not fit in the budget for
+            mode = "whole"
+            threads, predicted = in_memory(duration)
+            if seekable and (duration >= self.streaming_min_duration or not self._fits(predicted)):
+                mode, threads, predicted = "streaming", 1, stages("streaming")
+
+        if not self._fits(predicted):
+            raise MemoryBudgetExceeded(
+                f"Analyzing this track needs about {memory_model.peak(predicted) // 2 ** 20} MB, "
+                f"over the {self.memory_budget // 2 ** 20} MB worker memory budget")
+        return {"mode": mode, "threads": threads, "duration": duration, "seekable": seekable,
+                "stages": predicted, "peak_bytes": memory_model.peak(predicted)}
+
+    def _fits(self, stages: Dict[str, int]) -> bool:
+        return self.memory_budget is None or memory_model.peak(stages) <= self.memory_budget
+
+    def extract_features(self, audio_path: str, frames: Optional[Dict[str, np.ndarray]] = None,
+                         plan: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        # A `frames` dict is filled with the per-frame features (see FeatureExtractor).
+        # `plan` comes from plan(), made here unless the caller already has one
+        if plan is None:
+            plan = self.plan(audio_path, frames is not None)
+        if plan["mode"] == "excerpts":
+            duration = plan["duration"] if plan["seekable"] else None
+            return self._extract_excerpt_features(audio_path, duration, frames, plan["threads"])
+
+        if plan["mode"] == "streaming":
+            with sf.SoundFile(audio_path) as f:
+                blocks = f.blocks(blocksize=self.feature_extractor.stream_block_size, dtype='float32', always_2d=True)
+                return self._stream(blocks, f.samplerate, f.channels, frames)
+
+        return self._analyze({"path": audio_path}, frames, threads=plan["threads"])
+
+    def _analyze(self, values: Dict[str, Any], frames: Optional[Dict[str, np.ndarray]] = None,
+                 metering: Optional[Dict[str, Any]] = None, threads: int = 1) -> Dict[str, Any]:
+        # Decode once, then meter the native multichannel audio while it is also
+        # downmixed, normalized and handed to the extractor. `values` holds "path",
+        # or "decoded": (native audio in librosa.load(sr=None, mono=False) layout, rate).
+        # The graph consumes it, so the native audio is freed once both readers are done.
+        # `threads` is the plan's, which budgets for the stages running at once
+        graph = StageGraph()
+        if "decoded" not in values:
+            graph.add("decoded", self.audio_processor.decode, ["path"], span='decode')
+        if metering is None:
+            graph.add("metering", lambda decoded: self.loudness_meter.measure(*decoded), ["decoded"], span='loudness')
+        graph.add("prepared", lambda decoded: self.audio_processor.prepare(*decoded), ["decoded"], span='prepare')
+        graph.add("features", lambda prepared: self.feature_extractor.extract_features_from_array(
+            *prepared, frames, threads), ["prepared"])
+        results = graph.run(values, ["features", "metering"] if metering is None else ["features"], threads)
+
+        features = results["features"]
+        features.update(results["metering"] if metering is None else metering)
+        features["profile"] = self.profile
+        return features
+
+    def _stream(self, blocks, sr: int, channels: int,
+                frames: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, Any]:
+        # Long recordings: decoding, features and loudness all happen in this one pass
+        summary = {}
+        with metrics.span('stream'):
+            metering = self.loudness_meter.measure_stream(
+                self.feature_extractor.accumulate_blocks(blocks, sr, summary, frames is not None),
+                sr, channels)
+        if frames is not None:
+            frames.update(summary["frames"])
+        features = self.feature_extractor.features_from_summary(summary)
+        features.update(metering)
+        features["profile"] = self.profile
+        return features
+
+    def _extract_excerpt_features(self, audio_path: str, duration: Optional[float],
+                                  frames: Optional[Dict[str, np.ndarray]] = None, threads: int = 1) -> Dict[str, Any]:
+        # Seek straight to each excerpt when soundfile can read the format; otherwise decode and slice
+        with metrics.span('decode'):
+            if duration is not None:
+                with sf.SoundFile(audio_path) as f:
+                    samples, sr = self._read_excerpts(f), f.samplerate
+            else:
+                y_native, sr = self.audio_processor.decode(audio_path)
+                samples = np.atleast_2d(y_native).T
+                samples = np.concatenate([samples[start:stop] for start, stop in self._excerpt_ranges(len(samples), sr)])
+                del y_native
+        return self._analyze({"decoded": (_native_layout(samples), sr)}, frames, threads=threads)
+
+    def _excerpt_ranges(self, n_frames: int, sr: int) -> List[Tuple[int, int]]:
+        # Evenly spaced excerpts that skip the intro and outro (at 25%, 50% and 75% for three);
+        # tracks shorter than the excerpts combined are analyzed whole
+        count = self.settings["excerpts"]
+        length = int(self.settings["excerpt_seconds"] * sr)
+        if n_frames <= count * length:
+            return [(0, n_frames)]
+        ranges = []
+        for i in range(count):
+            start = min(max(n_frames * (i + 1) // (count + 1) - length // 2, 0), n_frames - length)
+            ranges.append((start, start + length))
+        return ranges
+
+    def _read_excerpts(self, sound_file) -> np.ndarray:
+        excerpts = []
+        for start, stop in self._excerpt_ranges(sound_file.frames, sound_file.samplerate):
+            sound_file.seek(start)
+            excerpts.append(sound_file.read(stop - start, dtype='float32', always_2d=True))
+        return np.concatenate(excerpts)
+
+    def extract_features_incremental(self, source, frames: Optional[Dict[str, np.ndarray]] = None,
+                                     plan: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Analyze a file-like source whose bytes may still be arriving.
+
+        Blocks are decoded and metered as soon as they can be read, so this
+        work overlaps the transfer. Features match extract_features. A `plan`
+        dict is filled in with the plan made once the header has arrived.
+        """
+        with sf.SoundFile(source) as f:
+            sr, channels = f.samplerate, f.channels
+            made = self._plan(f.frames / sr, sr, channels, frames is not None)
+            if plan is not None:
+                plan.update(made)
+
+            # Excerpts are read as soon as their bytes have arrived
+            if self.settings["excerpts"]:
+                with metrics.span('stream'):
+                    samples = self._read_excerpts(f)
+                if getattr(source, 'error', None) is not None:
+                    raise source.error
+                return self._analyze({"decoded": (_native_layout(samples), sr)}, frames, threads=made["threads"])
+
+            blocks = _checked(f.blocks(blocksize=self.feature_extractor.stream_block_size,
+                                       dtype='float32', always_2d=True), source)
+
+            if made["mode"] == "streaming":
+                return self._stream(blocks, sr, channels, frames)
+
+            # Otherwise keep the decoded blocks while metering them, then analyze the whole track
+            decoded = []
+            with metrics.span('stream'):
+                metering = self.loudness_meter.measure_stream(_keep(blocks, decoded), sr, channels)
+
+        values = {"decoded": (_native_layout(np.concatenate(decoded)), sr)}
+        del decoded
+        return self._analyze(values, frames, metering, made["threads"])
+
+    def _header_duration(self, audio_path: str) -> Optional[float]:
+        # Formats soundfile cannot read fall back to the in-memory path
+        try:
+            return sf.info(audio_path).duration
+        except Exception:
+            return None
+
+    def analyze(self, audio_path: str, song_name: str, composer: str) -> Dict[str, Any]:
+        try:
+            features = self.extract_features(audio_path)
+            with metrics.span('report'):
+                report = self.report_generator.generate_report(song_name, composer, features)
+
+            return {
+                "features": features,
+                "report": report
+            }
+
+        except Exception as e:
+            print(f"Error analyzing audio: {str(e)}")
+            raise
+
+def _native_layout(frames: np.ndarray) -> np.ndarray:
+    # (frames, channels) -> librosa.load(sr=None, mono=False) layout
+    y = frames.T
+    return y[0] if y.shape[0] == 1 else y
+
+def _keep(blocks, kept: list):
+    for block in blocks:
+        kept.append(block)
+        yield block
+
+def _checked(blocks, source):
+    # Sources that fail mid-read (e.g. a stalled upload) report it here rather than through the decoder
+    for block in blocks:
+        if getattr(source, 'error', None) is not None:
+            raise source.error
+        yield block
@@ -0,0 +1,121 @@
+import json
+import os
+import shutil
+import subprocess
+import librosa
+import numpy as np
+import soundfile as sf
+from typing import List, Optional, Tuple
+
+# soxr quality presets, slowest and most accurate first; librosa.load uses HQ
+RESAMPLE_QUALITIES = ('VHQ', 'HQ', 'MQ', 'LQ', 'QQ')
+
+# File extensions libsndfile knows under a different format name
+_FORMAT_ALIASES = {'aif': 'aiff', 'oga': 'ogg', 'opus': 'ogg'}
+
+class AudioDecoder:
+    """Decodes audio with the fastest backend available for its format.
+
+    libsndfile reads WAV, FLAC, OGG and AIFF (and MP3 from version 1.1)
+    natively. Other formats are piped through ffmpeg when it is installed,
+    and librosa's audioread fallback is the last resort.
+    """
+
+    def __init__(self, ffmpeg_path: Optional[str] = None):
+        self.ffmpeg_path = ffmpeg_path or shutil.which('ffmpeg')
+        self.ffprobe_path = shutil.which('ffprobe')
+        self.native_formats = {name.lower() for name in sf.available_formats()}
+
+    def backends(self, audio_path: str) -> List[str]:
+        # Backends to try for this file, fastest first
+        extension = os.path.splitext(audio_path)[1].lstrip('.').lower()
+        candidates = []
+        if _FORMAT_ALIASES.get(extension, extension) in self.native_formats:
+            candidates.append('soundfile')
+        if self.ffmpeg_path and self.ffprobe_path:
+            candidates.append('ffmpeg')
+        candidates.append('librosa')
+        return candidates
+
+    def decode(self, audio_path: str) -> Tuple[np.ndarray, int]:
+        """Decode at the native rate, in librosa.load(sr=None, mono=False) layout."""
+        errors = []
+        for backend in self.backends(audio_path):
+            try:
+                frames, sr = getattr(self, f"_decode_{backend}")(audio_path)
+            except Exception as e:
+                # A file the fast backend cannot parse may still decode with the next one
+                errors.append(f"{backend}: {str(e) or type(e).__name__}")
+                continue
+            # (frames, channels) -> (channels, samples), or (samples,) for mono
+            y = frames.T
+            return (y[0] if y.shape[0] == 1 else y), sr
+        raise RuntimeError(f"Could not decode {audio_path} ({'; '.join(errors)})")
+
+    def probe(self, audio_path: str) -> Optional[Tuple[float, int, int]]:
+        """Duration in seconds, native rate and channel count of a file soundfile cannot
+        read, from ffprobe. None when ffprobe is not installed or cannot tell."""
+        if not self.ffprobe_path:
+            return None
+        try:
+            probe = subprocess.run(
+                [self.ffprobe_path, '-v', 'error', '-select_streams', 'a:0',
+                 '-show_entries', 'stream=sample_rate,channels,duration:format=duration', '-of', 'json', audio_path],
+                capture_output=True, check=True)
+            info = json.loads(probe.stdout)
+            stream = info['streams'][0]
+            # Some containers only give the duration of the whole file
+            duration = stream.get('duration') or info.get('format', {}).get('duration')
+            return float(duration), int(stream['sample_rate']), int(stream['channels'])
+        except Exception:
+            return None
+
+    def load(self, audio_path: str, sr: int, mono: bool = True, quality: str = 'HQ') -> Tuple[np.ndarray, int]:
+        # librosa.load(audio_path, sr=sr, mono=mono) with a choice of resampling quality
+        y, native_sr = self.decode(audio_path)
+        if mono:
+            y = self.to_mono(y)
+        return self.resample(y, native_sr, sr, quality), sr
+
+    def to_mono(self, y: np.ndarray) -> np.ndarray:
+        # Same result as librosa.to_mono, whose reduction over the short channel
+        # axis is several times slower than adding the channels up
+        if y.ndim == 1:
+            return y
+        if y.shape[0] > 4:
+            return librosa.to_mono(y)
+        mono = y[0].copy()
+        for channel in y[1:]:
+            mono += channel
+        mono /= y.shape[0]
+        return mono
+
+    def resample(self, y: np.ndarray, orig_sr: int, target_sr: int, quality: str = 'HQ') -> np.ndarray:
+        if orig_sr == target_sr:
+            return y
+        if quality not in RESAMPLE_QUALITIES:
+            raise ValueError(f"Unknown resampling quality: {quality}")
+        return librosa.resample(y, orig_sr=orig_sr, target_sr=target_sr, res_type=f"soxr_{quality.lower()}")
+
+    def _decode_soundfile(self, audio_path: str) -> Tuple[np.ndarray, int]:
+        frames, sr = sf.read(audio_path, dtype='float32', always_2d=True)
+        return frames, sr
+
+    def _decode_ffmpeg(self, audio_path: str) -> Tuple[np.ndarray, int]:
+        # ffprobe reports the native rate and channel count; ffmpeg streams raw float32 PCM
+        probe = subprocess.run(
+            [self.ffprobe_path, '-v', 'error', '-select_streams', 'a:0',
+             '-show_entries', 'stream=sample_rate,channels', '-of', 'json', audio_path],
+            capture_output=True, check=True)
+        stream = json.loads(probe.stdout)['streams'][0]
+        sr, channels = int(stream['sample_rate']), int(stream['channels'])
+
+        decoded = subprocess.run(
+            [self.ffmpeg_path, '-nostdin', '-v', 'error', '-i', audio_path,
+             '-map', '0:a:0', '-f', 'f32le', '-acodec', 'pcm_f32le', '-'],
+            capture_output=True, check=True)
+        return np.frombuffer(decoded.stdout, dtype=np.float32).reshape(-1, channels), sr
+
+    def _decode_librosa(self, audio_path: str) -> Tuple[np.ndarray, int]:
+        y, sr = librosa.load(audio_path, sr=None, mono=False)
+        return np.atleast_2d(y).T, sr
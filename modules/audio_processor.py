@@ -2,18 +2,47 @@ import librosa
 import soundfile as sf
 import numpy as np
 import os
+from typing import Tuple
+from modules.audio_decoder import AudioDecoder
 
 class AudioProcessor:
     def __init__(self):
         self.sample_rate = 22050  # Standard sample rate for analysis
-        
-    def process(self, audio_path: str) -> str:
+        self.resample_quality = 'HQ'  # soxr preset, see audio_decoder.RESAMPLE_QUALITIES
+        self.decoder = AudioDecoder()
+
+    def load(self, audio_path: str) -> Tuple[np.ndarray, int]:
+        y, sr = self.decode(audio_path)
+        return self.prepare(y, sr)
+
+    def decode(self, audio_path: str) -> Tuple[np.ndarray, int]:
         try:
-            # Load the audio file
-            y, sr = librosa.load(audio_path, sr=self.sample_rate, mono=True)
-            
+            # Decode once at the native rate, keeping every channel for metering
+            return self.decoder.decode(audio_path)
+
+        except Exception as e:
+            print(f"Error loading audio: {str(e)}")
+            raise
+
+    def prepare(self, y: np.ndarray, sr: int) -> Tuple[np.ndarray, int]:
+        try:
+            # Downmix and resample as librosa.load(sr=..., mono=True) would (identical at HQ)
+            y = self.decoder.to_mono(y)
+            y = self.decoder.resample(y, sr, self.sample_rate, self.resample_quality)
+
             # Normalize audio
-            y = librosa.util.normalize(y)
+            y = librosa.util.normalize(y).astype(np.float32, copy=False)
+
+            return y, self.sample_rate
+
+        except Exception as e:
+            print(f"Error processing audio: {str(e)}")
+            raise
+
+    def process(self, audio_path: str) -> str:
+        try:
+            # Load and normalize the audio file
+            y, sr = self.load(audio_path)
             
             # Generate output filename
             filename, ext = os.path.splitext(audio_path)
@@ -26,4 +55,4 @@ class AudioProcessor:
             
         except Exception as e:
             print(f"Error processing audio: {str(e)}")
-            raise
\ No newline at end of file
+            raise
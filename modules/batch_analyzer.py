@@ -0,0 +1,322 @@
+import os
+import csv
+import json
+import time
+import hashlib
+import uuid
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, Iterator, List, Optional, Set
+from modules import metrics
+from modules.analysis_pipeline import DEFAULT_PROFILE, AnalysisPipeline
+from modules.frame_store import FrameStore
+from modules.report_generator import ReportGenerator
+from modules.report_store import ReportStore
+from modules.result_cache import content_hash
+
+AUDIO_EXTENSIONS = {'mp3', 'wav', 'flac', 'ogg', 'm4a'}
+
+# Pipeline (and optional frame store) owned by each worker process, built once by the pool initializer
+_worker_pipeline = None
+_worker_frame_store = None
+
+def _init_worker(resample_quality: Optional[Dict[str, str]] = None, profile: str = DEFAULT_PROFILE,
+                 frame_store_dir: Optional[str] = None, memory_budget: Optional[int] = None):
+    global _worker_pipeline, _worker_frame_store
+    _worker_pipeline = AnalysisPipeline(resample_quality, profile, memory_budget)
+    if frame_store_dir:
+        _worker_frame_store = FrameStore(frame_store_dir)
+
+def track_id(path: str) -> str:
+    # Frame store key for a catalog track, stable across runs
+    return hashlib.sha256(os.path.abspath(path).encode('utf-8')).hexdigest()[:32]
+
+def _analyze_track(track: Dict[str, str], with_report: bool) -> Dict[str, Any]:
+    started = time.time()
+    record = {
+        "path": track["path"],
+        "song_name": track["song_name"],
+        "composer": track["composer"]
+    }
+    metrics.reset_peak_rss()
+    idle_rss = metrics.rss_bytes()
+    try:
+        frames = {} if _worker_frame_store is not None else None
+        plan = _worker_pipeline.plan(track["path"], frames is not None)
+        record["mode"] = plan["mode"]
+        record["predicted_bytes"] = plan["peak_bytes"]
+        features = _worker_pipeline.extract_features(track["path"], frames, plan)
+        if frames is not None:
+            record["frames_id"] = track_id(track["path"])
+            _worker_frame_store.save(record["frames_id"], frames, _worker_pipeline.frame_meta())
+        record["status"] = "ok"
+        record["content_hash"] = content_hash(track["path"])
+        record["features"] = features
+        if with_report:
+            record["report"] = _worker_pipeline.report_generator.generate_report(
+                track["song_name"], track["composer"], features)
+    except Exception as e:
+        record["status"] = "failed"
+        record["error"] = str(e)
+    record["seconds"] = round(time.time() - started, 3)
+    # Memory the track added to the worker, to check against predicted_bytes
+    record["job_rss_bytes"] = None if idle_rss is None else max(metrics.peak_rss_bytes() - idle_rss, 0)
+    return record
+
+def find_tracks(source: str, extensions: Set[str] = AUDIO_EXTENSIONS) -> List[Dict[str, str]]:
+    # A directory is scanned recursively; a file is read as a manifest
+    if os.path.isdir(source):
+        paths = []
+        for root, _, files in os.walk(source):
+            for name in files:
+                if '.' in name and name.rsplit('.', 1)[1].lower() in extensions:
+                    paths.append(os.path.join(root, name))
+        return [_make_track(path) for path in sorted(paths)]
+
+    with open(source, 'r', encoding='utf-8', newline='') as f:
+        if source.lower().endswith('.csv'):
+            # CSV manifests need a "path" column; song_name and composer are optional
+            return [_make_track(row['path'], row.get('song_name'), row.get('composer'))
+                    for row in csv.DictReader(f) if row.get('path')]
+        return [_make_track(line.strip()) for line in f
+                if line.strip() and not line.startswith('#')]
+
+def _make_track(path: str, song_name: Optional[str] = None, composer: Optional[str] = None) -> Dict[str, str]:
+    return {
+        "path": path,
+        "song_name": song_name or os.path.splitext(os.path.basename(path))[0],
+        "composer": composer or 'Unknown'
+    }
+
+def regenerate_reports(results_path: str, writer, chunk_size: int = 10000,
+                       reception_model: Optional[str] = None) -> Dict[str, int]:
+    # Rebuild every report from the features stored in an earlier JSONL run; no audio is decoded.
+    # Reception scores are worked out again from reception_model's coefficients; without one they are left out
+    generator = ReportGenerator(reception_model)
+    summary = {"ok": 0, "skipped": 0}
+    chunk = []
+
+    def flush():
+        reports = generator.generate_reports(
+            [(record["song_name"], record["composer"], record["features"]) for record in chunk])
+        for record, report in zip(chunk, reports):
+            record["report"] = report
+            writer.write(record)
+        summary["ok"] += len(chunk)
+        chunk.clear()
+
+    try:
+        with open(results_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("status") != "ok":
+                    summary["skipped"] += 1
+                    continue
+                chunk.append(record)
+                if len(chunk) >= chunk_size:
+                    flush()
+        if chunk:
+            flush()
+    finally:
+        writer.close()
+    return summary
+
+class JsonlResultWriter:
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def completed_paths(self) -> Set[str]:
+        done = set()
+        if not os.path.exists(self.path):
+            return done
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Last line may be truncated by a crash
+                if record.get("status") == "ok":
+                    done.add(record["path"])
+        return done
+
+    def write(self, record: Dict[str, Any]):
+        if self._file is None:
+            self._trim_partial_line()
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+
+    def _trim_partial_line(self, block_size: int = 65536):
+        # A crash mid-write leaves a last line without its newline; cut it back to the
+        # previous one so the next record starts a line of its own. Its track did not
+        # count as done, so it is analyzed again
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb+') as f:
+            end = f.seek(0, os.SEEK_END)
+            position = end
+            while position > 0:
+                start = max(position - block_size, 0)
+                f.seek(start)
+                newline = f.read(position - start).rfind(b'\n')
+                if newline >= 0:
+                    position = start + newline + 1
+                    break
+                position = start
+            if position < end:
+                f.truncate(position)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+class ParquetResultWriter:
+    def __init__(self, path: str, rows_per_part: int = 200, flush_seconds: float = 60.0):
+        # Parquet files cannot be appended to, so results go into numbered part files. Rows
+        # are held until rows_per_part of them or flush_seconds have passed; a crash loses
+        # (and a resumed run analyzes again) at most those
+        import pyarrow  # noqa: F401 - fail early when the optional dependency is missing
+        self.path = path
+        self.rows_per_part = rows_per_part
+        self.flush_seconds = flush_seconds
+        self._rows = []
+        self._flushed_at = time.time()
+        os.makedirs(path, exist_ok=True)
+
+    def completed_paths(self) -> Set[str]:
+        import pyarrow.parquet as pq
+        done = set()
+        for name in sorted(os.listdir(self.path)):
+            if not name.endswith('.parquet'):
+                continue
+            table = pq.read_table(os.path.join(self.path, name), columns=['path', 'status'])
+            for path, status in zip(table.column('path').to_pylist(), table.column('status').to_pylist()):
+                if status == "ok":
+                    done.add(path)
+        return done
+
+    def write(self, record: Dict[str, Any]):
+        row = {key: value for key, value in record.items() if key not in ("features", "report")}
+        row.update(record.get("features", {}))
+        if "report" in record:
+            row["report"] = json.dumps(record["report"])
+        self._rows.append(row)
+        if len(self._rows) >= self.rows_per_part or time.time() - self._flushed_at >= self.flush_seconds:
+            self._flush()
+
+    def _flush(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if not self._rows:
+            return
+        part = len([name for name in os.listdir(self.path) if name.endswith('.parquet')])
+        tmp_path = os.path.join(self.path, f"part-{part:05d}.parquet.tmp")
+        pq.write_table(pa.Table.from_pylist(self._rows, schema=self._schema(pa)), tmp_path)
+        os.replace(tmp_path, tmp_path[:-len('.tmp')])
+        self._rows = []
+        self._flushed_at = time.time()
+
+    def close(self):
+        self._flush()
+
+    def _schema(self, pa):
+        # Every part gets the same columns, whichever of them its first row (e.g. a
+        # failed track) has; missing values are null. Columns no known field covers
+        # are added with the type inferred from all rows of the part
+        float64, int64, string = pa.float64(), pa.int64(), pa.string()
+        fields = [
+            ("path", string), ("song_name", string), ("composer", string), ("status", string),
+            ("error", string), ("mode", string), ("predicted_bytes", int64), ("seconds", float64),
+            ("job_rss_bytes", int64), ("frames_id", string), ("content_hash", string),
+            # Features
+            ("tempo", float64), ("key", string), ("energy", float64), ("mood", string),
+            ("spectral_centroid", float64), ("spectral_rolloff", float64),
+            ("chroma_profile", pa.list_(float64)), ("average_loudness", float64),
+            ("peak_levels", float64), ("sample_peak", float64), ("loudness_range", float64),
+            ("dynamic_range", float64), ("clipping_detected", pa.bool_()),
+            ("stereo_correlation", float64), ("stereo_width", float64), ("stereo_balance", float64),
+            ("phase_issues", pa.bool_()),
+            ("report", string)
+        ]
+        known = {name for name, _ in fields}
+        for row in self._rows:
+            for key in row:
+                if key not in known:
+                    known.add(key)
+                    fields.append((key, pa.array([other.get(key) for other in self._rows]).type))
+        return pa.schema(fields)
+
+class BatchAnalyzer:
+    def __init__(self, max_workers: Optional[int] = None, with_report: bool = False,
+                 resample_quality: Optional[Dict[str, str]] = None, profile: str = DEFAULT_PROFILE,
+                 frame_store_dir: Optional[str] = None, memory_budget: Optional[int] = None,
+                 store: Optional[ReportStore] = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.memory_budget = memory_budget  # Bytes each worker may add per track, see AnalysisPipeline
+        self.with_report = with_report
+        self.resample_quality = resample_quality
+        self.profile = profile  # Analysis profile, see analysis_pipeline.PROFILES
+        self.frame_store_dir = frame_store_dir  # Also keep each track's frame-level features here
+        # Also store each analyzed track (with_report is needed) as a result the app serves;
+        # the app indexes it for similarity search when it next starts
+        self.store = store
+
+    def run(self, tracks: List[Dict[str, str]], writer) -> Dict[str, int]:
+        # Resume: skip every track that already has a successful result
+        done = writer.completed_paths()
+        remaining = [track for track in tracks if track["path"] not in done]
+        pending = iter(remaining)
+        summary = {"skipped": len(tracks) - len(remaining), "ok": 0, "failed": 0}
+
+        try:
+            with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                     initargs=(self.resample_quality, self.profile,
+                                               self.frame_store_dir, self.memory_budget)) as executor:
+                # Keep a bounded window of futures in flight instead of queueing the whole catalog
+                inflight = set()
+                for record in self._drain(executor, pending, inflight):
+                    writer.write(record)
+                    summary[record["status"]] += 1
+                    if self.store is not None and record["status"] == "ok":
+                        self._publish(record)
+        finally:
+            # Flush whatever finished, even on Ctrl-C, so a rerun resumes from there
+            writer.close()
+        return summary
+
+    def _publish(self, record: Dict[str, Any]):
+        # Same layout as the app's stored results, under a new result id
+        result_id = uuid.uuid4().hex
+        try:
+            self.store.save(result_id, {
+                "id": result_id,
+                "song_name": record["song_name"],
+                "composer": record["composer"],
+                "created_at": time.time(),
+                "features": record["features"],
+                "report": record["report"],
+                "frames_id": None,  # Batch frames live in their own directory, not the app's frame store
+                "content_hash": record["content_hash"]
+            })
+        except Exception as e:
+            # The track is still in the results file, just not served by the app
+            print(f"Error storing result for {record['path']}: {str(e)}")
+
+    def _drain(self, executor, pending: Iterator[Dict[str, str]], inflight: set) -> Iterator[Dict[str, Any]]:
+        window = self.max_workers * 4
+        while True:
+            while len(inflight) < window:
+                track = next(pending, None)
+                if track is None:
+                    break
+                inflight.add(executor.submit(_analyze_track, track, self.with_report))
+            if not inflight:
+                return
+            finished, _ = wait(inflight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                inflight.discard(future)
+                yield future.result()
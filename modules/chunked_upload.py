@@ -0,0 +1,204 @@
+import io
+import os
+import time
+import uuid
+import threading
+import soundfile as sf
+from typing import Dict, Any, Optional
+
+# Formats whose header comes first, so decoding can start before the upload ends
+STREAMING_FORMATS = {'wav', 'flac', 'ogg', 'aiff', 'aif'}
+
+class OffsetMismatch(Exception):
+    """A chunk was sent for an offset other than the one the server has reached."""
+
+    def __init__(self, offset: int):
+        super().__init__(f"Upload is at offset {offset}")
+        self.offset = offset
+
+class UploadManager:
+    """Resumable uploads written chunk by chunk to a .part file.
+
+    Every byte received is kept, so a client whose connection dropped asks
+    for the offset the server reached and carries on from there.
+    """
+
+    def __init__(self, upload_dir: str, max_bytes: int, session_ttl: float = 24 * 3600):
+        self.upload_dir = upload_dir
+        self.max_bytes = max_bytes
+        self.session_ttl = session_ttl  # Idle sessions are dropped after this many seconds
+        self.sessions = {}
+        self.lock = threading.Lock()
+        os.makedirs(upload_dir, exist_ok=True)
+
+    def create(self, filename: str, length: int, song_name: str, composer: str,
+               profile: Optional[str] = None) -> Dict[str, Any]:
+        if length <= 0 or length > self.max_bytes:
+            raise ValueError(f"Upload length must be between 1 and {self.max_bytes} bytes")
+        self.expire()
+
+        upload_id = uuid.uuid4().hex
+        path = os.path.join(self.upload_dir, f"{upload_id}_{filename}.part")
+        open(path, 'wb').close()
+        session = {
+            "id": upload_id,
+            "path": path,
+            "filename": filename,
+            "extension": filename.rsplit('.', 1)[-1].lower(),
+            "length": length,
+            "song_name": song_name,
+            "composer": composer,
+            "profile": profile,  # None uses the job queue's default
+            "created_at": time.time(),
+            "updated_at": time.time(),
+            "offset": 0,
+            "job_id": None,  # Set once analysis has been queued
+            "finished": False,  # Complete and handed over to the job queue
+            "lock": threading.Lock()
+        }
+        with self.lock:
+            self.sessions[upload_id] = session
+        return session
+
+    def get(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            return self.sessions.get(upload_id)
+
+    def describe(self, session: Dict[str, Any]) -> Dict[str, Any]:
+        offset = session["offset"]
+        return {
+            "upload_id": session["id"],
+            "filename": session["filename"],
+            "offset": offset,
+            "length": session["length"],
+            "complete": offset == session["length"],
+            "job_id": session["job_id"]
+        }
+
+    def append(self, session: Dict[str, Any], offset: int, stream, block_size: int = 1024 * 1024) -> int:
+        # One writer per upload; a retried chunk must start where the last one stopped
+        with session["lock"]:
+            current = session["offset"]
+            if offset != current:
+                raise OffsetMismatch(current)
+
+            # Bytes are flushed as they arrive, so a dropped connection keeps what was received
+            try:
+                with open(session["path"], 'ab') as f:
+                    while current < session["length"]:
+                        block = stream.read(min(block_size, session["length"] - current))
+                        if not block:
+                            break
+                        f.write(block)
+                        f.flush()
+                        current += len(block)
+                        session["offset"] = current
+            finally:
+                session["updated_at"] = time.time()
+            return current
+
+    def complete(self, session: Dict[str, Any]) -> bool:
+        return session["offset"] == session["length"]
+
+    def stream_ready(self, session: Dict[str, Any], min_bytes: int) -> bool:
+        # A streaming analysis starts once the header can be read and min_bytes have
+        # arrived, so its worker has audio to decode instead of polling from the first block
+        if session["offset"] < min(min_bytes, session["length"]):
+            return False
+        try:
+            sf.info(session["path"])
+        except Exception:
+            return False  # Header not complete yet (e.g. FLAC metadata with cover art)
+        return True
+
+    def finish(self, session: Dict[str, Any]):
+        # The .part file now belongs to the analysis job; the session is kept
+        # until it expires so a client that missed the last response can look up its job
+        session["finished"] = True
+
+    def abort(self, upload_id: str):
+        with self.lock:
+            session = self.sessions.pop(upload_id, None)
+        if session is not None and not session["finished"] and os.path.exists(session["path"]):
+            # A reader still waiting on the file sees it vanish and gives up
+            os.remove(session["path"])
+
+    def expire(self):
+        cutoff = time.time() - self.session_ttl
+        with self.lock:
+            stale = [upload_id for upload_id, session in self.sessions.items()
+                     if session["updated_at"] < cutoff]
+        for upload_id in stale:
+            self.abort(upload_id)
+
+class GrowingFile(io.RawIOBase):
+    """Read-only view of a file that is still being uploaded.
+
+    Reports the declared upload length as its size and blocks reads until
+    the bytes they need have arrived, so decoders can consume the file
+    while the rest is in flight. Decoders call read from C callbacks that
+    swallow exceptions, so a stalled or aborted upload reads as end of file
+    and the reason is kept in `error` for the caller to raise.
+    """
+
+    def __init__(self, path: str, length: int, stall_timeout: float = 30.0, poll_interval: float = 0.05):
+        super().__init__()
+        self.path = path
+        self.length = length
+        self.stall_timeout = stall_timeout  # Give up when no bytes arrive for this long
+        self.poll_interval = poll_interval
+        self._file = open(path, 'rb')
+        self._position = 0
+        self.error = None
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self.length
+        self._position = max(0, min(offset, self.length))
+        return self._position
+
+    def complete(self) -> bool:
+        return os.fstat(self._file.fileno()).st_size >= self.length
+
+    def _wait_for(self, end: int):
+        size = os.fstat(self._file.fileno()).st_size
+        deadline = time.time() + self.stall_timeout
+        while size < end:
+            if not os.path.exists(self.path):
+                raise IOError("Upload was aborted")
+            if time.time() > deadline:
+                raise IOError(f"Upload stalled at {size} of {self.length} bytes")
+            time.sleep(self.poll_interval)
+            grown = os.fstat(self._file.fileno()).st_size
+            if grown > size:
+                deadline = time.time() + self.stall_timeout
+            size = grown
+
+    def readinto(self, buffer) -> int:
+        end = min(self._position + len(buffer), self.length)
+        if end <= self._position or self.error is not None:
+            return 0
+        try:
+            self._wait_for(end)
+        except IOError as e:
+            self.error = e
+            return 0
+        self._file.seek(self._position)
+        n = self._file.readinto(memoryview(buffer)[:end - self._position])
+        self._position += n
+        return n
+
+    def close(self):
+        self._file.close()
+        super().close()
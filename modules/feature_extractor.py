@@ -1,57 +1,203 @@
 import librosa
 import numpy as np
-from typing import Dict, Any
+import soundfile as sf
+import soxr
+from typing import Dict, Any, Optional, Tuple
+from modules import metrics
+from modules.audio_decoder import AudioDecoder
+from modules.stage_graph import StageGraph
+from modules.streaming_features import StreamingFeatureAccumulator
 
 class FeatureExtractor:
     def __init__(self):
         self.sample_rate = 22050  # Standard sample rate for analysis
         self.hop_length = 512     # For efficient processing
         self.n_fft = 2048        # FFT window size
+        self.stream_block_size = 262144  # Samples read per block in streaming mode
+        self.resample_quality = 'HQ'         # soxr preset for whole-track analysis
+        self.stream_resample_quality = 'HQ'  # soxr preset for streaming mode
+        self.brightness_max_frequency = 11025.0  # Centroid and rolloff ignore content above this (Hz)
+        self.stage_threads = 1  # Threads computing independent features of one track at once
+        self.decoder = AudioDecoder()
 
     def extract_features(self, audio_path: str) -> Dict[str, Any]:
         try:
             # Load audio file
-            y, sr = librosa.load(audio_path, sr=self.sample_rate, mono=True)
+            with metrics.span('features.decode'):
+                y, sr = self.decoder.load(audio_path, self.sample_rate, quality=self.resample_quality)
 
-            # Extract basic features
-            tempo, _ = librosa.beat.beat_track(y=y, sr=sr, hop_length=self.hop_length)
-            
-            # Calculate energy (RMS)
-            energy = np.mean(librosa.feature.rms(y=y, hop_length=self.hop_length))
-            
-            # Calculate spectral features using librosa's built-in functions
-            spec_cent = np.mean(librosa.feature.spectral_centroid(
-                y=y, sr=sr, n_fft=self.n_fft, hop_length=self.hop_length))
-            
-            spec_rolloff = np.mean(librosa.feature.spectral_rolloff(
-                y=y, sr=sr, n_fft=self.n_fft, hop_length=self.hop_length))
-            
-            # Key detection using chroma features
-            chroma = librosa.feature.chroma_stft(
-                y=y, sr=sr, n_fft=self.n_fft, hop_length=self.hop_length)
-            key_idx = np.argmax(np.mean(chroma, axis=1))
-            keys = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
-            key = keys[key_idx]
-            
-            # Determine mood based on features
-            mood = self._determine_mood({
-                'energy': float(energy),
-                'brightness': float(spec_cent)
-            })
+            return self.extract_features_from_array(y, sr)
+
+        except Exception as e:
+            print(f"Error extracting features: {str(e)}")
+            raise
+
+    def extract_features_from_array(self, y: np.ndarray, sr: int,
+                                    frames: Optional[Dict[str, np.ndarray]] = None,
+                                    threads: Optional[int] = None) -> Dict[str, Any]:
+        # A `frames` dict is filled with the per-frame features the means are taken over.
+        # `threads` overrides stage_threads
+        try:
+            # Bring in-memory audio to the analysis rate if the caller did not
+            if sr != self.sample_rate:
+                with metrics.span('features.resample'):
+                    y = self.decoder.resample(y, sr, self.sample_rate, self.resample_quality)
+                sr = self.sample_rate
+
+            # One shared spectrogram feeds every feature below; features that do
+            # not depend on each other run at once with more than one stage thread
+            graph = StageGraph()
+            graph.add("magnitude", self._magnitude, ["y"], span='features.magnitude')
+            graph.add("rms", self._rms, ["y"], span='features.rms')
+            graph.add("power", lambda magnitude: magnitude ** 2, ["magnitude"], span='features.power')
+            graph.add("onset_envelope", lambda power: self._onset_envelope(power, sr), ["power"],
+                      span='features.onset')
+            graph.add("tempo", lambda onset_envelope: self._tempo(onset_envelope, sr), ["onset_envelope"],
+                      span='features.tempo')
+            graph.add("brightness", lambda magnitude: self._brightness(magnitude, sr), ["magnitude"],
+                      span='features.spectral')
+            graph.add("chroma", lambda power: librosa.feature.chroma_stft(
+                S=power, sr=sr, n_fft=self.n_fft, hop_length=self.hop_length), ["power"], span='features.chroma')
+            values = {"y": y}
+            del y
+            results = graph.run(values, ["tempo", "rms", "onset_envelope", "brightness", "chroma"], threads or self.stage_threads)
+
+            tempo, rms, chroma = results["tempo"], results["rms"], results["chroma"]
+            centroid, rolloff = results["brightness"]
+            energy = np.mean(rms)
+            spec_cent = np.mean(centroid)
+            spec_rolloff = np.mean(rolloff)
+
+            if frames is not None:
+                frames.update({
+                    "rms": rms[0],
+                    "spectral_centroid": centroid[0],
+                    "spectral_rolloff": rolloff[0],
+                    "onset_strength": results["onset_envelope"],
+                    "chroma": chroma
+                })
             
-            return {
-                "tempo": float(tempo),
-                "energy": float(energy),
-                "spectral_centroid": float(spec_cent),
-                "spectral_rolloff": float(spec_rolloff),
-                "key": key,
-                "mood": mood
-            }
+            return self._build_features(tempo, energy, spec_cent, spec_rolloff, np.mean(chroma, axis=1))
             
         except Exception as e:
             print(f"Error extracting features: {str(e)}")
             raise
 
+    def extract_features_streaming(self, audio_path: str,
+                                   frames: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, Any]:
+        try:
+            with metrics.span('features.streaming'):
+                summary = self._accumulate_stream(audio_path, keep_frames=frames is not None)
+            if frames is not None:
+                frames.update(summary["frames"])
+            return self.features_from_summary(summary)
+
+        except Exception as e:
+            print(f"Error extracting features: {str(e)}")
+            raise
+
+    def _accumulate_stream(self, audio_path: str, keep_frames: bool = False) -> Dict[str, Any]:
+        summary = {}
+        blocks = sf.blocks(audio_path, blocksize=self.stream_block_size, dtype='float32', always_2d=True)
+        for _ in self.accumulate_blocks(blocks, sf.info(audio_path).samplerate, summary, keep_frames):
+            pass
+        return summary
+
+    def accumulate_blocks(self, blocks, native_sr: int, summary: Dict[str, Any], keep_frames: bool = False):
+        """Yield (frames, channels) blocks unchanged while accumulating features from them.
+
+        Lets another consumer (e.g. the loudness meter) read the same blocks in
+        the same pass. `summary` is filled in once the blocks run out, with the
+        per-frame features under "frames" when `keep_frames` is set.
+        """
+        accumulator = StreamingFeatureAccumulator(self.sample_rate, self.n_fft, self.hop_length,
+                                                  brightness_bins=self._brightness_bins(self.sample_rate),
+                                                  keep_frames=keep_frames)
+
+        # Resample incrementally; HQ is the quality librosa.load uses
+        resampler = None
+        if native_sr != self.sample_rate:
+            resampler = soxr.ResampleStream(native_sr, self.sample_rate, 1, dtype='float32',
+                                            quality=self.stream_resample_quality)
+
+        # Downmix the blocks as they arrive
+        for block in blocks:
+            y_block = np.mean(block, axis=1)
+            if resampler is not None:
+                y_block = resampler.resample_chunk(y_block)
+            accumulator.update(y_block)
+            yield block
+        if resampler is not None:
+            accumulator.update(resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True))
+
+        summary.update(accumulator.finalize())
+
+    def features_from_summary(self, summary: Dict[str, Any]) -> Dict[str, Any]:
+        return self._build_features(summary['tempo'], summary['energy'], summary['spectral_centroid'],
+                                    summary['spectral_rolloff'], summary['chroma_mean'])
+
+    def _build_features(self, tempo, energy, spec_cent, spec_rolloff, chroma_mean) -> Dict[str, Any]:
+        # Key detection using the average chroma profile
+        key_idx = np.argmax(chroma_mean)
+        keys = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+        key = keys[key_idx]
+        
+        # Determine mood based on features
+        mood = self._determine_mood({
+            'energy': float(energy),
+            'brightness': float(spec_cent)
+        })
+        
+        return {
+            "tempo": float(tempo),
+            "energy": float(energy),
+            "spectral_centroid": float(spec_cent),
+            "spectral_rolloff": float(spec_rolloff),
+            "key": key,
+            "mood": mood,
+            "chroma_profile": [float(value) for value in chroma_mean]  # C to B, used for similarity search
+        }
+
+    def _tempo(self, onset_envelope: np.ndarray, sr: int) -> float:
+        # The tempo beat_track estimates, without tracking the beats nobody reads
+        if not onset_envelope.any():
+            return 0.0
+        return librosa.feature.tempo(onset_envelope=onset_envelope, sr=sr, hop_length=self.hop_length)[0]
+
+    def _rms(self, y: np.ndarray) -> np.ndarray:
+        # Same values as librosa.feature.rms(y=y, frame_length=n_fft), which squares every
+        # sample once per overlapping frame; squaring once and then framing does a quarter
+        # of the work. Frames are n_fft long, as in streaming mode, for every profile.
+        # Leading axes of y are kept
+        pad = self.n_fft // 2
+        power = np.power(np.pad(y, [(0, 0)] * (y.ndim - 1) + [(pad, pad)], mode='constant'), 2, dtype=np.float32)
+        frames = librosa.util.frame(power, frame_length=self.n_fft, hop_length=self.hop_length)
+        return np.sqrt(np.mean(frames, axis=-2, keepdims=True))
+
+    def _brightness_bins(self, sr: int) -> int:
+        # STFT bins at or below brightness_max_frequency
+        return int(np.searchsorted(librosa.fft_frequencies(sr=sr, n_fft=self.n_fft),
+                                   self.brightness_max_frequency, side='right'))
+
+    def _magnitude(self, y: np.ndarray) -> np.ndarray:
+        # One STFT per track: magnitude feeds centroid/rolloff, its square feeds chroma and onsets
+        return np.abs(librosa.stft(y, n_fft=self.n_fft, hop_length=self.hop_length))
+
+    def _onset_envelope(self, power: np.ndarray, sr: int) -> np.ndarray:
+        # Same log-mel onset envelope beat_track would build from y
+        mel = librosa.feature.melspectrogram(S=power, sr=sr, n_fft=self.n_fft, hop_length=self.hop_length)
+        return librosa.onset.onset_strength(
+            S=librosa.power_to_db(mel), sr=sr, hop_length=self.hop_length, aggregate=np.median)
+
+    def _brightness(self, magnitude: np.ndarray, sr: int) -> Tuple[np.ndarray, np.ndarray]:
+        # Centroid and rolloff, limited to the band the standard rate covers,
+        # so brightness means the same at every rate
+        bins = self._brightness_bins(sr)
+        band = {"S": magnitude[:bins], "freq": librosa.fft_frequencies(sr=sr, n_fft=self.n_fft)[:bins]}
+        centroid = librosa.feature.spectral_centroid(**band, sr=sr, n_fft=self.n_fft, hop_length=self.hop_length)
+        rolloff = librosa.feature.spectral_rolloff(**band, sr=sr, n_fft=self.n_fft, hop_length=self.hop_length)
+        return centroid, rolloff
+
     def _determine_mood(self, features: Dict[str, float]) -> str:
         # Enhanced mood classification based on energy and brightness
         if features['energy'] > 0.6 and features['brightness'] > 3000:
@@ -61,4 +207,4 @@ class FeatureExtractor:
         elif features['energy'] < 0.3 and features['brightness'] < 1500:
             return 'Calm/Melancholic'
         else:
-            return 'Neutral'
\ No newline at end of file
+            return 'Neutral'
@@ -0,0 +1,90 @@
+import os
+import re
+import json
+import tempfile
+import numpy as np
+from typing import Dict, Any, List, Optional
+
+# Rows of a stored frame matrix, top to bottom
+CHROMA_ROWS = [f"chroma_{pitch}" for pitch in ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']]
+FRAME_ROWS = ["rms", "spectral_centroid", "spectral_rolloff", "onset_strength"] + CHROMA_ROWS
+
+class FrameStore:
+    """Frame-level feature matrices, one float16 .npy file per track.
+
+    Each matrix is rows x frames (see FRAME_ROWS) and is memory-mapped on
+    load, so new statistics can be computed over a catalog without decoding
+    any audio. float16 keeps about three significant digits, which is ample
+    for per-frame features, at a quarter of the size of float64.
+    """
+
+    def __init__(self, store_dir: str):
+        self.store_dir = store_dir
+        os.makedirs(store_dir, exist_ok=True)
+
+    def _path(self, track_id: str) -> Optional[str]:
+        # Track ids are job ids or hashes; anything else could escape the store directory
+        if not re.fullmatch(r'[0-9a-f]{32,64}', track_id):
+            return None
+        return os.path.join(self.store_dir, track_id[:2], track_id)
+
+    def save(self, track_id: str, frames: Dict[str, np.ndarray], meta: Dict[str, Any]):
+        path = self._path(track_id)
+        if path is None:
+            raise ValueError(f"Invalid track id: {track_id}")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        matrix = np.vstack([frames["rms"], frames["spectral_centroid"], frames["spectral_rolloff"],
+                            frames["onset_strength"], frames["chroma"]]).astype(np.float16)
+        meta = dict(meta, rows=FRAME_ROWS, n_frames=matrix.shape[1])
+
+        # Matrix first, then its metadata, each written atomically: a track is only
+        # visible once both are in place
+        self._write(path + '.npy', lambda f: np.save(f, matrix))
+        self._write(path + '.json', lambda f: f.write(json.dumps(meta).encode('utf-8')))
+
+    def _write(self, path: str, write):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def load(self, track_id: str, mmap: bool = True) -> Optional[Dict[str, Any]]:
+        # Metadata plus the matrix under "frames", memory-mapped read-only by default
+        path = self._path(track_id)
+        if path is None:
+            return None
+        try:
+            with open(path + '.json', 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            entry["frames"] = np.load(path + '.npy', mmap_mode='r' if mmap else None)
+        except (OSError, ValueError):
+            return None
+        return entry
+
+    def row(self, entry: Dict[str, Any], name: str) -> np.ndarray:
+        return entry["frames"][entry["rows"].index(name)]
+
+    def chroma(self, entry: Dict[str, Any]) -> np.ndarray:
+        start = entry["rows"].index(CHROMA_ROWS[0])
+        return entry["frames"][start:start + len(CHROMA_ROWS)]
+
+    def segment_means(self, entry: Dict[str, Any], seconds: float) -> np.ndarray:
+        # Mean of every row over consecutive segments: rows x segments, in float32
+        frames_per_segment = max(int(round(seconds * entry["sample_rate"] / entry["hop_length"])), 1)
+        frames = entry["frames"]
+        starts = np.arange(0, frames.shape[1], frames_per_segment)
+        sums = np.add.reduceat(frames.astype(np.float32), starts, axis=1)
+        counts = np.diff(np.append(starts, frames.shape[1]))
+        return sums / counts
+
+    def track_ids(self) -> List[str]:
+        ids = []
+        for root, _, files in os.walk(self.store_dir):
+            ids.extend(name[:-len('.json')] for name in files if name.endswith('.json'))
+        return sorted(ids)
@@ -0,0 +1,560 @@
+import os
+import re
+import math
+import time
+import logging
+import uuid
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional
+from modules import metrics
+from modules.analysis_pipeline import DEFAULT_PROFILE, PROFILES, AnalysisPipeline
+from modules.chunked_upload import GrowingFile
+from modules.frame_store import FrameStore
+from modules.report_store import ReportStore
+from modules.result_cache import ResultCache, content_hash
+from modules.similarity_index import SimilarityIndex
+from modules.warmup import warm_up
+
+logger = logging.getLogger(__name__)
+
+# Pipelines owned by each worker process, one per analysis profile; the
+# default profile's is built (and warmed up) by the pool initializer
+_worker_pipelines = {}
+_worker_resample_quality = None
+_worker_memory_budget = None
+_worker_stage_threads = 1
+_worker_frame_store = None
+_worker_warmup = None
+
+def _init_worker(warm: bool = False, resample_quality: Optional[Dict[str, str]] = None,
+                 profile: str = DEFAULT_PROFILE, frame_store_dir: Optional[str] = None,
+                 memory_budget: Optional[int] = None, stage_threads: int = 1):
+    global _worker_resample_quality, _worker_memory_budget, _worker_stage_threads, _worker_frame_store, _worker_warmup
+    _worker_resample_quality = resample_quality
+    _worker_memory_budget = memory_budget
+    _worker_stage_threads = stage_threads
+    if frame_store_dir:
+        _worker_frame_store = FrameStore(frame_store_dir)
+    pipeline = _worker_pipeline(profile)
+    if warm:
+        try:
+            _worker_warmup = warm_up(pipeline)  # Seconds spent warming up
+        except Exception as e:
+            # A cold worker is slower, not broken
+            print(f"Error warming up worker: {str(e)}")
+
+def _worker_pipeline(profile: str) -> AnalysisPipeline:
+    if profile not in _worker_pipelines:
+        _worker_pipelines[profile] = AnalysisPipeline(_worker_resample_quality, profile, _worker_memory_budget,
+                                                     _worker_stage_threads)
+    return _worker_pipelines[profile]
+
+def _worker_info() -> Dict[str, Any]:
+    # Hold the worker briefly so one fast worker cannot answer every ping
+    time.sleep(0.05)
+    return {"pid": os.getpid(), "warm_up_seconds": _worker_warmup}
+
+def _frames_for(frames_id: Optional[str]) -> Optional[Dict[str, Any]]:
+    # Frame-level features are only collected when there is somewhere to keep them
+    return {} if _worker_frame_store is not None and frames_id else None
+
+def _save_frames(pipeline: AnalysisPipeline, frames_id: Optional[str], frames: Optional[Dict[str, Any]]) -> Optional[str]:
+    if frames is None:
+        return None
+    try:
+        with metrics.span('frames.save'):
+            _worker_frame_store.save(frames_id, frames, pipeline.frame_meta())
+        return frames_id
+    except Exception as e:
+        # The features are still good without their frames
+        print(f"Error storing frames: {str(e)}")
+        return None
+
+def _memory_usage(idle_rss: Optional[int]) -> Dict[str, Any]:
+    # Peak memory during the job, and how much it added over the worker's idle footprint
+    peak = metrics.peak_rss_bytes()
+    return {"peak_rss_bytes": peak, "job_rss_bytes": None if idle_rss is None else max(peak - idle_rss, 0)}
+
+def _run_analysis(audio_path: str, profile: str = DEFAULT_PROFILE, frames_id: Optional[str] = None,
+                  plan: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    # Spans are recorded here and observed by the parent, which owns the metrics
+    started_at = time.time()
+    metrics.reset_peak_rss()
+    idle_rss = metrics.rss_bytes()
+    pipeline = _worker_pipeline(profile)
+    frames = _frames_for(frames_id)
+    try:
+        with metrics.recording() as spans:
+            features = pipeline.extract_features(audio_path, frames, plan)
+            frames_id = _save_frames(pipeline, frames_id, frames)
+        return dict({
+            "features": features,
+            "frames_id": frames_id,
+            "spans": spans,
+            "started_at": started_at,
+            "audio_seconds": pipeline._header_duration(audio_path),
+            "content_hash": content_hash(audio_path),
+            "plan": plan
+        }, **_memory_usage(idle_rss))
+    finally:
+        # The upload belongs to the job once it has been queued
+        if os.path.exists(audio_path):
+            os.remove(audio_path)
+
+def _run_stream_analysis(part_path: str, length: int, stall_timeout: float,
+                         profile: str = DEFAULT_PROFILE, frames_id: Optional[str] = None) -> Dict[str, Any]:
+    # Reads the upload while it is still arriving; blocks wait for the bytes they need
+    started_at = time.time()
+    metrics.reset_peak_rss()
+    idle_rss = metrics.rss_bytes()
+    pipeline = _worker_pipeline(profile)
+    frames = _frames_for(frames_id)
+    plan = {}
+    source = GrowingFile(part_path, length, stall_timeout)
+    try:
+        try:
+            with metrics.recording() as spans:
+                features = pipeline.extract_features_incremental(source, frames, plan)
+        except Exception:
+            # Analysis of a cut-off stream fails for the reason the stream stopped
+            if source.error is not None:
+                raise source.error
+            raise
+        if source.error is not None:
+            raise source.error
+        with metrics.recording() as save_spans:
+            frames_id = _save_frames(pipeline, frames_id, frames)
+        return dict({
+            "features": features,
+            "frames_id": frames_id,
+            "spans": spans + save_spans,
+            "started_at": started_at,
+            "audio_seconds": pipeline._header_duration(part_path),
+            "content_hash": content_hash(part_path),
+            "plan": plan
+        }, **_memory_usage(idle_rss))
+    finally:
+        # An unfinished upload still belongs to its session, which may resume it
+        complete = source.complete()
+        source.close()
+        if complete and os.path.exists(part_path):
+            os.remove(part_path)
+
+def client_error(message: str, path: str, filename: str) -> str:
+    # Error text that is safe to show the client: every path in the upload's directory
+    # (the upload itself, its .part file, or an identical upload whose analysis it shared)
+    # becomes the name the client uploaded the file as
+    directories = {os.path.dirname(path), os.path.dirname(os.path.abspath(path))} - {''}
+    for directory in sorted(directories, key=len, reverse=True):
+        message = re.sub(re.escape(os.path.join(directory, '')) + r"[^\s'\"(),;]+", lambda _: filename, message)
+    return message
+
+class QueueFull(Exception):
+    """Every worker is busy and the wait queue is full; try again after retry_after seconds."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Analysis queue is full, retry in {retry_after} s")
+        self.retry_after = retry_after
+
+class JobQueue:
+    def __init__(self, max_workers: int = 2, max_finished_jobs: int = 1000,
+                 cache: Optional[ResultCache] = None, warm_workers: bool = False,
+                 store: Optional[ReportStore] = None, resample_quality: Optional[Dict[str, str]] = None,
+                 profile: str = DEFAULT_PROFILE, frame_store_dir: Optional[str] = None,
+                 index: Optional[SimilarityIndex] = None, max_waiting: Optional[int] = None,
+                 memory_budget: Optional[int] = None, stage_threads: int = 1,
+                 max_streaming: Optional[int] = None, finish_threads: int = 2):
+        self.max_workers = max_workers
+        self.finish_threads = finish_threads  # Threads building, storing and indexing finished results
+        # Streaming analyses wait on the client between chunks, so at least one worker is kept free of them
+        self.max_streaming = max(min(max_workers - 1 if max_streaming is None else max_streaming, max_workers - 1), 0)
+        self.memory_budget = memory_budget  # Bytes each worker may add per analysis, see AnalysisPipeline
+        self.stage_threads = stage_threads  # Threads each worker runs independent stages on
+        self.max_waiting = max_waiting  # Analyses allowed to wait for a worker; None for no limit
+        self.warm_workers = warm_workers  # Run a warm-up analysis as each worker starts
+        self.max_finished_jobs = max_finished_jobs
+        self.cache = cache
+        self.store = store  # Finished reports are persisted here under the job id
+        self.index = index  # Stored results are added here for similarity search
+        self.resample_quality = resample_quality  # Per analysis mode, see AnalysisPipeline
+        self.profile = profile  # Analysis profile for jobs that do not name one
+        self.frame_store_dir = frame_store_dir  # Workers keep each job's frame-level features here
+        self.pipelines = {profile: AnalysisPipeline(resample_quality, profile, memory_budget, stage_threads)}
+        self.pipeline = self.pipelines[profile]
+        self.jobs = OrderedDict()
+        self.inflight = {}  # Cache key -> future shared by identical uploads
+        self.active = 0  # Analyses handed to the pool and not finished yet
+        self.streaming = 0  # Of those, analyses of uploads still arriving
+        self.mean_seconds = 30.0  # Running mean of analysis time, for Retry-After estimates
+        self.lock = threading.Lock()
+        self.finished = threading.Condition(self.lock)  # Notified whenever a job finishes
+        self._executor = None
+        self._finisher = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Start the pool on first use so importing the app stays cheap. Workers are
+        # started by a fork server, never forked from this multithreaded process,
+        # so they cannot inherit a lock some other thread was holding
+        if self._executor is None:
+            if 'forkserver' in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context('forkserver')
+                context.set_forkserver_preload([__name__])
+            else:
+                context = multiprocessing.get_context('spawn')
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context,
+                                                 initializer=_init_worker,
+                                                 initargs=(self.warm_workers, self.resample_quality, self.profile,
+                                                           self.frame_store_dir, self.memory_budget,
+                                                           self.stage_threads))
+        return self._executor
+
+    def _after(self, future, fn, *args):
+        # Run fn(*args, future) on the finishing threads once the future is done. The pool's
+        # own callback thread only hands it over, so it keeps collecting results meanwhile
+        def hand_over(done):
+            with self.lock:
+                if self._finisher is None:
+                    self._finisher = ThreadPoolExecutor(max_workers=self.finish_threads,
+                                                        thread_name_prefix='songscope-finish')
+                finisher = self._finisher
+            try:
+                finisher.submit(fn, *args, done)
+            except RuntimeError:
+                # Shut down: finish here rather than leave the job queued forever
+                fn(*args, done)
+        future.add_done_callback(hand_over)
+
+    def _pipeline(self, profile: Optional[str]) -> AnalysisPipeline:
+        # The parent's pipelines only provide cache parameters and reports
+        profile = profile or self.profile
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown analysis profile: {profile}")
+        if profile not in self.pipelines:
+            self.pipelines[profile] = AnalysisPipeline(self.resample_quality, profile, self.memory_budget,
+                                                       self.stage_threads)
+        return self.pipelines[profile]
+
+    def warm_up(self, timeout: float = 300.0) -> List[Dict[str, Any]]:
+        # Import the parent's report and cache dependencies, then start every worker
+        # and wait until each has finished its initializer and answered a ping
+        self.pipeline.cache_params()
+        self.pipeline.report_generator
+        executor = self._get_executor()
+        workers = {}
+        deadline = time.time() + timeout
+        while len(workers) < self.max_workers and time.time() < deadline:
+            futures = [executor.submit(_worker_info) for _ in range(self.max_workers)]
+            for future in futures:
+                info = future.result()
+                workers[info["pid"]] = info
+        return list(workers.values())
+
+    def submit(self, audio_path: str, song_name: str, composer: str,
+               request_id: Optional[str] = None, profile: Optional[str] = None,
+               filename: Optional[str] = None) -> str:
+        # filename is what the client called the upload; job errors name it instead of audio_path
+        pipeline = self._pipeline(profile)
+        job_id, job = self._new_job(song_name, composer, request_id, pipeline.profile, audio_path, filename)
+
+        # A cache hit skips decoding entirely
+        key = None
+        params = None
+        cached = None
+        owner = False
+        if self.cache is not None:
+            params = pipeline.cache_params()
+            key = ResultCache.make_key(audio_path, params)
+            cached = self.cache.get(key)
+
+        # Pick the analysis mode from the header before the job reaches a worker;
+        # a track that fits no mode in the worker memory budget is refused here
+        plan = pipeline.plan(audio_path, self.frame_store_dir is not None) if cached is None else None
+
+        admitted = False
+        with self.lock:
+            if cached is None and key is not None and key not in self.inflight:
+                # The analysis this upload would have shared may have been stored since the lookup above
+                cached = self.cache.get(key)
+            if cached is not None:
+                future = Future()
+                future.set_result({"features": cached['features'], "frames_id": cached.get('frames_id'),
+                                   "content_hash": cached.get('content_hash')})
+                job["cached"] = True
+            elif key is not None and key in self.inflight:
+                # Identical upload already being analyzed: share its result
+                future = self.inflight[key]
+                job["cached"] = True
+            else:
+                # Only work that needs a worker counts against the queue limit
+                self._admit()
+                admitted = True
+                future = self._get_executor().submit(_run_analysis, audio_path, pipeline.profile, job_id, plan)
+                job["mode"] = plan["mode"]
+                if key is not None:
+                    self.inflight[key] = future
+                    owner = True
+            job["future"] = future
+            self.jobs[job_id] = job
+            self._prune_finished()
+
+        # Callbacks may run immediately, so register them outside the lock
+        if admitted:
+            future.add_done_callback(lambda f: self._release(f, timed=True))
+        if owner:
+            self._after(future, self._store, key, params)
+
+        if job["cached"] and os.path.exists(audio_path):
+            os.remove(audio_path)
+
+        self._after(future, self._finish, job_id)
+        return job_id
+
+    def submit_stream(self, part_path: str, length: int, song_name: str, composer: str,
+                      request_id: Optional[str] = None, stall_timeout: float = 30.0,
+                      profile: Optional[str] = None, filename: Optional[str] = None) -> str:
+        # Analysis of an upload that is still arriving; its bytes cannot be hashed
+        # yet, so the result cache is skipped. Raises QueueFull when max_streaming
+        # such analyses are already running
+        profile = self._pipeline(profile).profile
+        job_id, job = self._new_job(song_name, composer, request_id, profile, part_path, filename)
+        with self.lock:
+            if self.streaming >= self.max_streaming:
+                raise QueueFull(self.retry_after())
+            self._admit()
+            self.streaming += 1
+            future = self._get_executor().submit(_run_stream_analysis, part_path, length, stall_timeout,
+                                                 profile, job_id)
+            job["future"] = future
+            self.jobs[job_id] = job
+            self._prune_finished()
+        # Its run time includes waiting for the upload, so it is left out of the mean
+        future.add_done_callback(lambda f: self._release(f, timed=False, streaming=True))
+        self._after(future, self._finish, job_id)
+        return job_id
+
+    def available(self) -> Optional[int]:
+        # Analyses that would still be admitted right now, or None without a limit
+        if self.max_waiting is None:
+            return None
+        with self.lock:
+            return max(self.max_workers + self.max_waiting - self.active, 0)
+
+    def retry_after(self) -> int:
+        # Rough wait until a worker frees up: one average analysis spread over the workers
+        return min(max(int(math.ceil(self.mean_seconds / self.max_workers)), 1), 300)
+
+    def _admit(self):
+        # Called with the lock held, before work is handed to the pool
+        if self.max_waiting is not None and self.active >= self.max_workers + self.max_waiting:
+            raise QueueFull(self.retry_after())
+        self.active += 1
+
+    def _release(self, future, timed: bool, streaming: bool = False):
+        with self.lock:
+            self.active -= 1
+            if streaming:
+                self.streaming -= 1
+            if timed and not future.cancelled() and future.exception() is None:
+                seconds = time.time() - future.result()["started_at"]
+                self.mean_seconds = 0.9 * self.mean_seconds + 0.1 * seconds
+
+    def _new_job(self, song_name: str, composer: str, request_id: Optional[str], profile: str,
+                 audio_path: str, filename: Optional[str]):
+        job_id = uuid.uuid4().hex
+        job = {
+            "id": job_id,
+            "request_id": request_id,
+            "profile": profile,
+            "status": "queued",
+            "song_name": song_name,
+            "composer": composer,
+            "audio_path": audio_path,  # Server side only; never sent to the client
+            "filename": filename or os.path.basename(audio_path),
+            "submitted_at": time.time(),
+            "finished_at": None,
+            "cached": False,
+            "stored": False,
+            "frames_id": None,  # Frame store entry with this job's per-frame features, if any
+            "content_hash": None,  # SHA-256 of the audio, once analyzed
+            "mode": None,  # whole, streaming or excerpts once planned; None for shared results
+            "error": None,
+            "result": None
+        }
+        return job_id, job
+
+    def _store(self, key: str, params: Dict[str, Any], future):
+        # Cache the result before the in-flight entry goes, both under the lock submit
+        # holds, so an identical upload always finds one or the other
+        with self.lock:
+            if future.exception() is None:
+                self.cache.put(key, {
+                    "params": params,
+                    "features": future.result()["features"],
+                    "frames_id": future.result().get("frames_id"),
+                    "content_hash": future.result().get("content_hash")
+                })
+            self.inflight.pop(key, None)
+
+    def _finish(self, job_id: str, future):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return
+            song_name, composer = job["song_name"], job["composer"]
+
+        # Reports depend on the job's own title and composer, so build them per job
+        result = None
+        error = None
+        payload = {}
+        with metrics.recording() as spans:
+            try:
+                payload = future.result()
+                with metrics.span('report'):
+                    report = self.pipeline.report_generator.generate_report(song_name, composer, payload["features"])
+                result = {
+                    "features": payload["features"],
+                    "report": report
+                }
+            except Exception as e:
+                error = str(e)
+        self._record(job, payload, spans, error)
+        job["frames_id"] = payload.get("frames_id")
+        job["content_hash"] = payload.get("content_hash")
+        if payload.get("plan"):
+            job["mode"] = payload["plan"]["mode"]
+        stored = result is not None and self._persist(job, result)
+        if stored:
+            self._index(job, result)
+
+        with self.lock:
+            job["stored"] = stored
+            job["result"] = result
+            # The log above keeps the full error; the client sees it without server paths
+            job["error"] = None if error is None else client_error(error, job["audio_path"], job["filename"])
+            job["status"] = "done" if error is None else "failed"
+            job["finished_at"] = time.time()
+            job.pop("future", None)
+            self.finished.notify_all()
+
+    def _persist(self, job: Dict[str, Any], result: Dict[str, Any]) -> bool:
+        if self.store is None:
+            return False
+        try:
+            self.store.save(job["id"], {
+                "id": job["id"],
+                "song_name": job["song_name"],
+                "composer": job["composer"],
+                "created_at": time.time(),
+                "features": result["features"],
+                "report": result["report"],
+                "frames_id": job["frames_id"],
+                "content_hash": job["content_hash"]
+            })
+            return True
+        except Exception as e:
+            # The report is still served from memory, just not by permalink
+            print(f"Error storing report: {str(e)}")
+            return False
+
+    def _index(self, job: Dict[str, Any], result: Dict[str, Any]):
+        if self.index is None:
+            return
+        try:
+            self.index.add(job["id"], result["features"], job["content_hash"])
+        except Exception as e:
+            # The result is still stored and served, it just will not show up as similar
+            print(f"Error indexing result: {str(e)}")
+
+    def _record(self, job: Dict[str, Any], payload: Dict[str, Any], spans, error: Optional[str]):
+        # Jobs that shared another job's analysis only add their own report span
+        if not job["cached"] and "spans" in payload:
+            spans = [("queue.wait", max(payload["started_at"] - job["submitted_at"], 0.0))] + payload["spans"] + spans
+            if payload.get("audio_seconds") is not None:
+                metrics.AUDIO_SECONDS.observe(payload["audio_seconds"])
+            metrics.PEAK_RSS_BYTES.observe(payload["peak_rss_bytes"])
+            plan = payload.get("plan") or {}
+            if plan.get("peak_bytes") and payload.get("job_rss_bytes") is not None:
+                metrics.MEMORY_PREDICTION_RATIO.observe(payload["job_rss_bytes"] / plan["peak_bytes"], mode=plan["mode"])
+        metrics.observe_spans(spans)
+        metrics.JOBS.inc(status="failed" if error else ("cached" if job["cached"] else "done"))
+
+        timings = {}
+        for stage, seconds in spans:
+            timings[stage] = round(timings.get(stage, 0.0) + seconds, 4)
+        metrics.log_event(logger, "analysis_finished", job["request_id"],
+                          job_id=job["id"],
+                          status="failed" if error else "done",
+                          cached=job["cached"],
+                          audio_seconds=payload.get("audio_seconds"),
+                          peak_rss_bytes=payload.get("peak_rss_bytes"),
+                          mode=(payload.get("plan") or {}).get("mode"),
+                          stage_threads=(payload.get("plan") or {}).get("threads"),
+                          predicted_bytes=(payload.get("plan") or {}).get("peak_bytes"),
+                          job_rss_bytes=payload.get("job_rss_bytes"),
+                          total_seconds=round(time.time() - job["submitted_at"], 4),
+                          spans=timings,
+                          error=error)
+
+    def _prune_finished(self):
+        # Forget the oldest finished jobs once the history is full
+        finished = [job_id for job_id, job in self.jobs.items()
+                    if job["status"] in ("done", "failed")]
+        for job_id in finished[:max(len(finished) - self.max_finished_jobs, 0)]:
+            del self.jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            if job["status"] == "queued" and job.get("future") is not None and job["future"].running():
+                job["status"] = "running"
+            return {key: value for key, value in job.items() if key != "future"}
+
+    def as_completed(self, job_ids: List[str], timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        # Like concurrent.futures.as_completed: each job as it finishes, in finishing order.
+        # A job already pruned from the history comes back with status "unknown".
+        # Raises TimeoutError if jobs are still running once timeout has passed.
+        pending = list(job_ids)
+        deadline = None if timeout is None else time.time() + timeout
+        while pending:
+            with self.finished:
+                while True:
+                    ready = [job_id for job_id in pending
+                             if job_id not in self.jobs or self.jobs[job_id]["status"] in ("done", "failed")]
+                    if ready:
+                        break
+                    remaining = None if deadline is None else deadline - time.time()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f"{len(pending)} jobs still running")
+                    self.finished.wait(remaining)
+            for job_id in ready:
+                pending.remove(job_id)
+                yield self.get(job_id) or {"id": job_id, "status": "unknown"}
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.get(job_id)
+        if job is None:
+            return None
+        return {
+            "id": job["id"],
+            "status": job["status"],
+            "song_name": job["song_name"],
+            "composer": job["composer"],
+            "profile": job["profile"],
+            "mode": job["mode"],
+            "submitted_at": job["submitted_at"],
+            "finished_at": job["finished_at"],
+            "cached": job["cached"],
+            "error": job["error"]
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._finisher is not None:
+            self._finisher.shutdown(wait=False)
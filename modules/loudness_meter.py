@@ -0,0 +1,199 @@
+import numpy as np
+import scipy.signal
+import soundfile as sf
+from typing import Dict, Any, Iterable
+
+class LoudnessMeter:
+    """Integrated loudness, true peak, dynamics, clipping and stereo image in one pass.
+
+    Audio is consumed in blocks with filter and oversampling state carried
+    across them, so a file can be metered while it is streamed from disk.
+    """
+
+    def __init__(self):
+        self.block_size = 65536          # Samples per block
+        self.clip_threshold = 0.999      # Sample magnitude treated as full scale
+        self.clip_run = 3                # Consecutive full-scale samples that count as clipping
+        self.oversampling = 4            # True-peak oversampling factor (BS.1770-4)
+        self.taps_per_phase = 12         # Interpolation filter length per phase, as in BS.1770-4
+
+        # Polyphase interpolation filter: row p produces the p-th of every 4 oversampled values
+        taps = self.oversampling * self.taps_per_phase
+        lowpass = scipy.signal.firwin(taps, 1.0 / self.oversampling, window=('kaiser', 5.0)) * self.oversampling
+        self._phases = lowpass.reshape(self.taps_per_phase, self.oversampling).T.astype(np.float32)
+
+    def measure_file(self, audio_path: str) -> Dict[str, Any]:
+        try:
+            info = sf.info(audio_path)
+            blocks = sf.blocks(audio_path, blocksize=self.block_size, dtype='float32', always_2d=True)
+            return self._measure_blocks(blocks, info.samplerate, info.channels)
+        except Exception as e:
+            print(f"Error metering audio: {str(e)}")
+            raise
+
+    def measure_stream(self, blocks: Iterable[np.ndarray], sr: int, channels: int) -> Dict[str, Any]:
+        try:
+            # Blocks are (frames, channels) float32 arrays, as sf.blocks yields them
+            return self._measure_blocks(blocks, sr, channels)
+        except Exception as e:
+            print(f"Error metering audio: {str(e)}")
+            raise
+
+    def measure(self, y: np.ndarray, sr: int) -> Dict[str, Any]:
+        try:
+            # librosa layout: (samples,) or (channels, samples)
+            frames = np.atleast_2d(y).T
+            blocks = (frames[start:start + self.block_size]
+                      for start in range(0, len(frames), self.block_size))
+            return self._measure_blocks(blocks, sr, frames.shape[1])
+        except Exception as e:
+            print(f"Error metering audio: {str(e)}")
+            raise
+
+    def _measure_blocks(self, blocks: Iterable[np.ndarray], sr: int, channels: int) -> Dict[str, Any]:
+        sos = self._k_weighting(sr)
+        zi = np.zeros((sos.shape[0], 2, channels))
+
+        # Loudness is gated on 400 ms blocks every 100 ms, built from 100 ms sub-block energies
+        step = int(round(0.1 * sr))
+        pending = np.zeros((0, channels))
+        step_energies = []
+
+        peak_carry = np.zeros((self.taps_per_phase - 1, channels), dtype=np.float32)
+        true_peak = 0.0
+        sample_peak = 0.0
+
+        clip_carry = np.zeros((self.clip_run - 1, channels), dtype=bool)
+        clipping_detected = False
+
+        sums = {"left": 0.0, "right": 0.0, "cross": 0.0, "mid": 0.0, "side": 0.0}
+
+        for block in blocks:
+            if not len(block):
+                continue
+            block = block.astype(np.float32, copy=False)
+
+            # K-weighted energy per 100 ms step
+            weighted, zi = scipy.signal.sosfilt(sos, block, axis=0, zi=zi)
+            pending = np.concatenate([pending, weighted ** 2])
+            n_steps = len(pending) // step
+            if n_steps:
+                step_energies.append(pending[:n_steps * step].reshape(n_steps, step, channels).mean(axis=1))
+                pending = pending[n_steps * step:]
+
+            # Sample and true peak
+            sample_peak = max(sample_peak, float(np.max(np.abs(block))))
+            true_peak, peak_carry = self._update_true_peak(block, peak_carry, true_peak)
+
+            # Clipping: runs of consecutive full-scale samples, including across block edges
+            at_full_scale = np.concatenate([clip_carry, np.abs(block) >= self.clip_threshold])
+            runs = at_full_scale[self.clip_run - 1:].copy()
+            for offset in range(self.clip_run - 1):
+                runs &= at_full_scale[offset:offset + len(runs)]
+            clipping_detected = clipping_detected or bool(runs.any())
+            clip_carry = at_full_scale[len(at_full_scale) - (self.clip_run - 1):]
+
+            # Stereo image from left/right and mid/side energies
+            left = block[:, 0].astype(np.float64)
+            right = block[:, 1].astype(np.float64) if channels > 1 else left
+            sums["left"] += float(np.dot(left, left))
+            sums["right"] += float(np.dot(right, right))
+            sums["cross"] += float(np.dot(left, right))
+            mid, side = (left + right) / 2, (left - right) / 2
+            sums["mid"] += float(np.dot(mid, mid))
+            sums["side"] += float(np.dot(side, side))
+
+        # Flush the interpolator with trailing silence
+        true_peak, _ = self._update_true_peak(
+            np.zeros((self.taps_per_phase - 1, channels), dtype=np.float32), peak_carry, true_peak)
+
+        energies = np.concatenate(step_energies) if step_energies else np.zeros((0, channels))
+        integrated, loudness_range = self._gated_loudness(energies)
+
+        return self._summarize(integrated, loudness_range, true_peak, sample_peak, clipping_detected, sums)
+
+    def _update_true_peak(self, block, carry, true_peak):
+        # Every filter window that ends inside this block is evaluated exactly once. Each
+        # phase is summed tap by tap over all channels at once, in float32
+        buffer = np.concatenate([carry, block])
+        history = self.taps_per_phase - 1
+        n = len(buffer) - history
+        for phase in self._phases:
+            upsampled = phase[0] * buffer[history:]
+            for tap in range(1, self.taps_per_phase):
+                upsampled += phase[tap] * buffer[history - tap:history - tap + n]
+            true_peak = max(true_peak, float(upsampled.max()), float(-upsampled.min()))
+        return true_peak, buffer[n:]
+
+    def _gated_loudness(self, energies: np.ndarray):
+        if len(energies) < 4:
+            return -70.0, 0.0
+
+        # 400 ms gating blocks with 75% overlap
+        cumulative = np.concatenate([np.zeros((1, energies.shape[1])), np.cumsum(energies, axis=0)])
+        blocks = (cumulative[4:] - cumulative[:-4]) / 4
+        block_loudness = -0.691 + 10 * np.log10(np.maximum(blocks.sum(axis=1), 1e-12))
+
+        # Absolute gate at -70 LUFS, then relative gate 10 LU below the gated mean
+        gated = blocks[block_loudness > -70.0]
+        if not len(gated):
+            return -70.0, 0.0
+        relative_gate = -0.691 + 10 * np.log10(gated.sum(axis=1).mean()) - 10.0
+        gated = blocks[(block_loudness > -70.0) & (block_loudness > relative_gate)]
+        integrated = -0.691 + 10 * np.log10(gated.sum(axis=1).mean())
+
+        # Loudness range (EBU Tech 3342): spread of 3 s short-term loudness, 10th to 95th percentile
+        if len(energies) < 30:
+            return integrated, 0.0
+        short_term = ((cumulative[30:] - cumulative[:-30]) / 30).sum(axis=1)
+        short_term_loudness = -0.691 + 10 * np.log10(np.maximum(short_term, 1e-12))
+        short_term_loudness = short_term_loudness[short_term_loudness > -70.0]
+        if not len(short_term_loudness):
+            return integrated, 0.0
+        relative_gate = -0.691 + 10 * np.log10(np.mean(10 ** ((short_term_loudness + 0.691) / 10))) - 20.0
+        short_term_loudness = short_term_loudness[short_term_loudness > relative_gate]
+        low, high = np.percentile(short_term_loudness, [10, 95])
+        return integrated, float(high - low)
+
+    def _summarize(self, integrated, loudness_range, true_peak, sample_peak, clipping_detected, sums) -> Dict[str, Any]:
+        total = sums["left"] + sums["right"]
+        correlation = sums["cross"] / np.sqrt(sums["left"] * sums["right"]) if sums["left"] * sums["right"] > 0 else 1.0
+        side_ratio = np.sqrt(sums["side"] / sums["mid"]) if sums["mid"] > 0 else 0.0
+
+        return {
+            "average_loudness": round(float(integrated), 1),
+            "peak_levels": round(max(20 * np.log10(true_peak), -120.0), 1) if true_peak > 0 else -120.0,
+            "sample_peak": round(max(20 * np.log10(sample_peak), -120.0), 1) if sample_peak > 0 else -120.0,
+            "loudness_range": round(float(loudness_range), 1),
+            # 15 LU of loudness range is treated as fully dynamic
+            "dynamic_range": round(min(float(loudness_range) / 15.0, 1.0), 2),
+            "clipping_detected": clipping_detected,
+            "stereo_correlation": round(float(correlation), 2),
+            # 0 for mono, 1 when the side signal is as strong as the mid signal
+            "stereo_width": round(float(min(2 * side_ratio / (1 + side_ratio), 1.0)), 2),
+            "stereo_balance": round(sums["left"] / total, 2) if total > 0 else 0.5,
+            "phase_issues": bool(correlation < 0)
+        }
+
+    def _k_weighting(self, sr: int) -> np.ndarray:
+        # BS.1770 pre-filter (high shelf) and RLB filter (high pass), designed for any
+        # sample rate the way libebur128 and pyloudnorm do; at 48 kHz both give the
+        # coefficients tabulated in BS.1770
+        shelf_fc, shelf_q, gain_db = 1681.974450955533, 0.7071752369554196, 3.999843853973347
+        pass_fc, pass_q = 38.13547087602444, 0.5003270373238773
+
+        K = np.tan(np.pi * shelf_fc / sr)
+        Vh = 10 ** (gain_db / 20)
+        Vb = Vh ** 0.4996667741545416
+        a0 = 1 + K / shelf_q + K * K
+        shelf_b = [(Vh + Vb * K / shelf_q + K * K) / a0,
+                   2 * (K * K - Vh) / a0,
+                   (Vh - Vb * K / shelf_q + K * K) / a0]
+        shelf_a = [1.0, 2 * (K * K - 1) / a0, (1 - K / shelf_q + K * K) / a0]
+
+        K = np.tan(np.pi * pass_fc / sr)
+        a0 = 1 + K / pass_q + K * K
+        pass_b = [1.0, -2.0, 1.0]
+        pass_a = [1.0, 2 * (K * K - 1) / a0, (1 - K / pass_q + K * K) / a0]
+
+        return np.array([shelf_b + shelf_a, pass_b + pass_a])
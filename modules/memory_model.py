@@ -0,0 +1,63 @@
+from typing import Dict, Optional
+from modules.frame_store import FRAME_ROWS
+
+# Peak memory an analysis needs on top of the worker's idle footprint, per
+# stage, predicted from the file header alone. Each stage is a sum of the
+# arrays it holds, in bytes per second of audio:
+#   native - the decoded float32 audio at its own rate, every channel
+#   mono   - its downmix, before resampling
+#   y      - the prepared float32 track at the analysis rate
+#   spec   - one float32 spectrogram (n_fft // 2 + 1 bins per frame)
+# The multipliers count the copies that are alive at once (the complex STFT,
+# magnitude, power, chroma and librosa's padded and framed temporaries) and
+# were calibrated against peak RSS on stereo 44.1 kHz and 48 kHz tracks of
+# 2 to 10 minutes, where they came within 15% of the measured peak.
+PREPARE_Y_COPIES = 5.0
+FEATURES_Y_COPIES = 4.75
+FEATURES_SPEC_COPIES = 8.75
+
+# Stages run on several threads hold their arrays at the same time: the
+# loudness pass keeps the native audio alive while features are extracted, and
+# up to FEATURE_GRAPH_WIDTH feature stages (onsets, brightness, chroma) hold
+# spectrogram-sized temporaries at once, about this many each
+PARALLEL_SPEC_COPIES = 4.5
+FEATURE_GRAPH_WIDTH = 3
+
+# Streaming mode holds one block at a time, so its peak does not grow with the
+# track, only with the spectrogram's height; kept frames are the exception
+STREAM_BYTES_PER_BIN = 160 * 1024
+
+def predict_stages(duration: float, native_sr: int, channels: int, sample_rate: int,
+                   hop_length: int, n_fft: int, mode: str = 'whole', keep_frames: bool = False,
+                   threads: int = 1) -> Dict[str, int]:
+    """Predicted peak bytes of each analysis stage, for one of the pipeline's modes.
+
+    `whole` decodes the track and analyzes it in memory, `excerpts` does the
+    same for only the excerpts' duration, and `streaming` decodes and
+    analyzes it block by block. `threads` is the number of stage threads
+    (see StageGraph), which streaming mode does not use.
+    """
+    bins = n_fft // 2 + 1
+    frames_per_second = sample_rate / hop_length
+    kept = 8 * len(FRAME_ROWS) * frames_per_second * duration if keep_frames else 0
+
+    if mode == 'streaming':
+        return {"stream": int(STREAM_BYTES_PER_BIN * bins + kept)}
+
+    native = 4 * channels * native_sr * duration
+    mono = 4 * native_sr * duration if channels > 1 else 0
+    y = 4 * sample_rate * duration
+    spec = 4 * bins * frames_per_second * duration
+    # With one thread the native audio is released before feature extraction starts
+    features = FEATURES_Y_COPIES * y + FEATURES_SPEC_COPIES * spec + kept
+    if threads > 1:
+        features += native + PARALLEL_SPEC_COPIES * (min(threads, FEATURE_GRAPH_WIDTH) - 1) * spec
+    return {
+        "decode": int(native),
+        "loudness": int(native),
+        "prepare": int(native + mono + PREPARE_Y_COPIES * y),
+        "features": int(features)
+    }
+
+def peak(stages: Optional[Dict[str, int]]) -> Optional[int]:
+    return max(stages.values()) if stages else None
@@ -0,0 +1,188 @@
+import os
+import json
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float], labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self.labelnames = tuple(labelnames)
+        self._values = {}  # Label values -> [count per bucket..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            state = self._values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        for key, state in items:
+            labels = list(zip(self.labelnames, key))
+            for bound, count in zip(self.buckets, state):
+                lines.append(f"{self.name}_bucket{_labels(labels + [('le', _number(bound))])} {count}")
+            lines.append(f"{self.name}_bucket{_labels(labels + [('le', '+Inf')])} {state[-1]}")
+            lines.append(f"{self.name}_sum{_labels(labels)} {_number(state[-2])}")
+            lines.append(f"{self.name}_count{_labels(labels)} {state[-1]}")
+        return lines
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_labels(list(zip(self.labelnames, key)))} {_number(value)}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def histogram(self, name: str, documentation: str, buckets: Sequence[float],
+                  labelnames: Sequence[str] = ()) -> Histogram:
+        metric = Histogram(name, documentation, buckets, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        # Prometheus text exposition format 0.0.4
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+def _labels(pairs: List[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'songscope_stage_seconds', 'Time spent in each analysis stage.',
+    (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300), ('stage',))
+AUDIO_SECONDS = REGISTRY.histogram(
+    'songscope_audio_duration_seconds', 'Duration of analyzed audio.',
+    (10, 30, 60, 120, 180, 300, 600, 1200, 3600))
+UPLOAD_BYTES = REGISTRY.histogram(
+    'songscope_upload_bytes', 'Size of uploaded audio files.',
+    (2 ** 16, 2 ** 18, 2 ** 20, 2 ** 22, 2 ** 24, 2 ** 26, 2 ** 28))
+PEAK_RSS_BYTES = REGISTRY.histogram(
+    'songscope_worker_peak_rss_bytes', 'Peak resident memory of the analysis worker during each job.',
+    (2 ** 26, 2 ** 27, 2 ** 28, 2 ** 29, 2 ** 30, 2 ** 31, 2 ** 32))
+MEMORY_PREDICTION_RATIO = REGISTRY.histogram(
+    'songscope_memory_prediction_ratio', 'Memory an analysis job added to its worker, over the predicted peak.',
+    (0.25, 0.5, 0.75, 0.9, 1, 1.1, 1.25, 1.5, 2, 4), ('mode',))
+REQUEST_SECONDS = REGISTRY.histogram(
+    'songscope_http_request_seconds', 'HTTP request latency.',
+    (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10), ('endpoint',))
+REQUESTS = REGISTRY.counter(
+    'songscope_http_requests_total', 'HTTP requests by endpoint and status code.', ('endpoint', 'status'))
+JOBS = REGISTRY.counter(
+    'songscope_jobs_total', 'Finished analysis jobs by outcome.', ('status',))
+
+# Spans are collected per thread while a recording is active (e.g. inside an
+# analysis worker) and observed directly otherwise
+_local = threading.local()
+
+@contextmanager
+def span(stage: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        recorder = getattr(_local, 'spans', None)
+        if recorder is not None:
+            recorder.append((stage, elapsed))
+        else:
+            STAGE_SECONDS.observe(elapsed, stage=stage)
+
+@contextmanager
+def recording():
+    # Collect spans instead of observing them, so they can be shipped to another process
+    previous = getattr(_local, 'spans', None)
+    _local.spans = []
+    try:
+        yield _local.spans
+    finally:
+        _local.spans = previous
+
+def active_recording() -> Optional[List[Tuple[str, float]]]:
+    # The list this thread's spans are being recorded into, if any
+    return getattr(_local, 'spans', None)
+
+@contextmanager
+def recording_into(spans: Optional[List[Tuple[str, float]]]):
+    # Record this thread's spans into another thread's recording (or observe them, for None)
+    previous = getattr(_local, 'spans', None)
+    _local.spans = spans
+    try:
+        yield spans
+    finally:
+        _local.spans = previous
+
+def observe_spans(spans: List[Tuple[str, float]]):
+    for stage, seconds in spans:
+        STAGE_SECONDS.observe(seconds, stage=stage)
+
+def peak_rss_bytes() -> int:
+    # ru_maxrss is reported in kilobytes on Linux; since reset_peak_rss() where that works
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def reset_peak_rss() -> bool:
+    # Linux only: restart the peak count so peak_rss_bytes() covers just what follows
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def rss_bytes() -> Optional[int]:
+    # Current resident memory, where /proc provides it
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+def log_event(logger, event: str, request_id: Optional[str] = None, **fields: Any):
+    # One JSON object per line so log pipelines can index every field
+    record: Dict[str, Any] = {"event": event, "request_id": request_id}
+    record.update(fields)
+    logger.info(json.dumps(record, default=str))
@@ -1,6 +1,86 @@
+import json
+import numpy as np
+from typing import Dict, Any, List, Optional, Sequence
+
+# Placeholder reception model: each score is a linear function of feature
+# values, clipped to [0, 1]. "inputs" maps every feature the scores read to the
+# value assumed when a track does not have it (or has None, NaN or inf), or to
+# None to leave the scores that read it missing for that track.
+# vocal_clarity is not produced by the analysis yet; 0.75 is what the reports
+# have always assumed for it.
+DEFAULT_MODEL = {
+    "inputs": {
+        "energy": None,
+        "vocal_clarity": 0.75
+    },
+    "scores": {
+        "engagement": {"bias": 0.0, "weights": {"energy": 1.2}},
+        "production_quality": {"bias": 0.03, "weights": {"vocal_clarity": 1.0}}
+    }
+}
+
 class ReceptionAnalyzer:
-    def analyze(self, processed_audio, features):
-        # Placeholder model for reception analysis
-        engagement = min(features['energy'] * 1.2, 1.0)
-        quality = min(features['vocal_clarity'] + 0.03, 1.0)
-        return {'engagement': engagement, 'production_quality': quality}
\ No newline at end of file
+    """Reception scores for many feature sets at once, from one set of coefficients.
+
+    The model (DEFAULT_MODEL, or a JSON file of the same shape) is turned into
+    a weight matrix when the analyzer is created, so scoring a catalog is one
+    matrix product over its feature matrix.
+    """
+
+    def __init__(self, model_path: Optional[str] = None):
+        try:
+            if model_path:
+                with open(model_path, 'r', encoding='utf-8') as f:
+                    model = json.load(f)
+            else:
+                model = DEFAULT_MODEL
+
+            self.inputs = list(model["inputs"])
+            self.scores = list(model["scores"])
+            # NaN where a missing input leaves the scores reading it missing
+            self.fill = np.array([np.nan if model["inputs"][name] is None else model["inputs"][name]
+                                  for name in self.inputs], dtype=float)
+            self.weights = np.zeros((len(self.inputs), len(self.scores)))
+            self.bias = np.array([model["scores"][score].get("bias", 0.0) for score in self.scores], dtype=float)
+            for j, score in enumerate(self.scores):
+                for name, weight in model["scores"][score]["weights"].items():
+                    if name not in model["inputs"]:
+                        raise ValueError(f"Reception score {score} reads {name}, which is not a model input")
+                    self.weights[self.inputs.index(name), j] = weight
+            # Which inputs each score actually reads
+            self.reads = self.weights != 0
+
+        except Exception as e:
+            print(f"Error loading reception model: {str(e)}")
+            raise
+
+    def analyze(self, features: Dict[str, Any]) -> Dict[str, float]:
+        return self.analyze_batch([features])[0]
+
+    def analyze_batch(self, features_list: Sequence[Dict[str, Any]]) -> List[Dict[str, float]]:
+        # One dict per feature set, without the scores that are missing for it
+        scores = self.score_matrix(self.feature_matrix(features_list))
+        present = ~np.isnan(scores)
+        return [{name: value for name, value, ok in zip(self.scores, row, row_present) if ok}
+                for row, row_present in zip(scores.tolist(), present.tolist())]
+
+    def feature_matrix(self, features_list: Sequence[Dict[str, Any]]) -> np.ndarray:
+        # One row per feature set, one column per model input; NaN where a value is missing
+        matrix = np.empty((len(features_list), len(self.inputs)))
+        for j, name in enumerate(self.inputs):
+            # None becomes NaN, and booleans 0 or 1
+            matrix[:, j] = np.array([features.get(name) for features in features_list], dtype=float)
+        matrix[~np.isfinite(matrix)] = np.nan
+        return matrix
+
+    def score_matrix(self, matrix: np.ndarray) -> np.ndarray:
+        """Scores for a feature matrix (see feature_matrix), one column per score.
+
+        Missing values take the model's fill value; a score that reads an input
+        with no fill value is NaN for the rows missing it.
+        """
+        filled = np.where(np.isnan(matrix), self.fill, matrix)
+        unfilled = np.isnan(filled)
+        scores = np.clip(np.where(unfilled, 0.0, filled) @ self.weights + self.bias, 0.0, 1.0)
+        scores[(unfilled.astype(float) @ self.reads) > 0] = np.nan
+        return scores
@@ -1,8 +1,425 @@
 import time
-from datetime import datetime
+import numpy as np
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+from modules.reception_analyzer import ReceptionAnalyzer
+
+# Report wording. Each tuple holds one phrase per band, in the order the bands
+# are numbered by ReportGenerator.derive_metrics (highest threshold first).
+
+TEMPO_DESCRIPTIONS = (
+    "energetic and perfect for dance music",
+    "upbeat and engaging",
+    "steady and comfortable",
+    "relaxed and intimate"
+)
+TEMPO_USE_CASES = (
+    "club tracks and high-energy content",
+    "casual listening or upbeat scenes",
+    "background music or relaxed content",
+    "intimate scenes or atmospheric moments"
+)
+TEMPO_SUGGESTIONS = (
+    "Try adding breaks or slower sections (around 100 BPM) for dynamic contrast. This will give dancers a moment to catch their breath.",
+    "If you're aiming for a dancefloor hit, try speeding up to 128 BPM. That's a sweet spot for club tracks.",
+    "Experiment with double-time sections to add energy without changing the fundamental groove.",
+    "Consider adding subtle percussion or a faster counter-melody to maintain interest while keeping the relaxed vibe."
+)
+OVERVIEW_TEMPO = ("energetic", "moderate", "relaxed")
+
+ENERGY_DESCRIPTIONS = (
+    "a powerful, driving feel that commands attention",
+    "a balanced, engaging energy level",
+    "a subtle, atmospheric quality"
+)
+ENERGY_SUGGESTIONS = (
+    "Add a quiet bridge or breakdown section—like a stripped-down verse with just vocals and a simple beat—before ramping back up. This contrast will make the loud parts hit harder.",
+    "Try building to a more intense chorus by gradually adding layers of instruments and effects. This creates natural excitement.",
+    "Experiment with adding subtle layers of percussion or pads to build tension without losing the intimate feel."
+)
+OVERVIEW_ENERGY = ("strong", "balanced", "subtle")
+ENERGY_LEVELS = ("High", "Medium", "Low")
+
+VOCAL_DESCRIPTIONS = (
+    "stand out nicely, making lyrics easy to hear—great for storytelling or catchy hooks",
+    "blend well with the instruments, creating a balanced mix",
+    "sit back in the mix, creating an atmospheric effect"
+)
+VOCAL_SUGGESTIONS = (
+    "Experiment with a touch of reverb (10-20%) on the vocals to add space without losing clarity. Also try subtle delay effects on specific phrases to create depth.",
+    "Use careful EQ around 2-4kHz to lift the vocals slightly without making them harsh. A gentle compressor can also help them cut through.",
+    "If you want the vocals more upfront, try reducing reverb and bringing up the mid-range frequencies. For the current style, add textural vocal harmonies."
+)
+
+COMPLEXITY_DESCRIPTIONS = (
+    "create a rich, detailed soundscape that rewards repeated listening",
+    "blend well—not too empty, not too crowded—leaving space for everything to breathe",
+    "maintain a clean, minimalist arrangement that emphasizes key elements"
+)
+COMPLEXITY_SUGGESTIONS = (
+    "Consider simplifying some sections to give listeners a break. You could strip back verses to core elements, saving the full complexity for chorus and bridge.",
+    "Introduce a signature sound—like a unique synthesizer melody or distinctive bassline—to give '{song_name}' its own character.",
+    "Try adding subtle counter-melodies or textural elements in specific sections to create more interest while maintaining clarity."
+)
+
+PRIMARY_GENRES = ("EDM-Leaning", "Pop-Leaning", "Ambient-Leaning", "Pop-Leaning")
+
+# Moods: happy/energetic, relaxed/calm, anything else
+MOOD_BANDS = {'happy': 0, 'energetic': 0, 'relaxed': 1, 'calm': 1}
+MOOD_FITS = (
+    "The song feels uplifting and positive, perfect for feel-good playlists or upbeat content",
+    "The track creates a peaceful atmosphere, ideal for relaxation or background music",
+    "The {mood_lower} mood gives the song a distinctive character that could work well in specific contexts"
+)
+MOOD_SUGGESTIONS = (
+    "Add a catchy, singable hook in the chorus—something simple like a repeated phrase or melodic riff that listeners can easily remember.",
+    "Try introducing subtle variations in texture and harmony to maintain interest while preserving the peaceful mood.",
+    "Consider emphasizing the unique mood with complementary sound design or effects that enhance the emotional impact."
+)
+MOOD_USE_CASES = (
+    "positive brand messaging, lifestyle content, and uplifting scenes",
+    "reflective moments, nature scenes, and peaceful transitions",
+    "specific emotional contexts that require a {mood_lower} atmosphere"
+)
+MOOD_APPEAL = ("a feel-good tune with pop appeal", "perfect for creating atmosphere", "perfect for creating atmosphere")
+
+KEY_CHARACTERS = {
+    'C': 'which has a pure, open quality',
+    'G': 'perfect for bright, optimistic feelings',
+    'D': 'great for energetic, driving songs',
+    'A': 'which can sound warm and engaging',
+    'E': 'which often feels bright and assertive',
+    'F': 'which has a warm, balanced character',
+    'Bb': 'which can sound smooth and mellow'
+}
+RELATIVE_KEYS = {
+    'C': 'G or Am', 'G': 'D or Em', 'D': 'A or Bm',
+    'A': 'E or F#m', 'E': 'B or C#m', 'F': 'C or Dm',
+    'Bb': 'F or Gm'
+}
+
+# Spectral centroid: above 3000 Hz, above 2000 Hz, below that
+MIX_QUALITIES = (
+    "The mix is bright, possibly with some high-frequency emphasis that could be smoothed out",
+    "The mix has good clarity and balance across frequencies",
+    "The mix has a warmer character that might benefit from some high-end enhancement"
+)
+MIXING_SUGGESTIONS = (
+    "Use an equalizer to gently reduce frequencies above 10kHz by 1-2dB. This will maintain clarity while reducing any potential harshness.",
+    "Try adding subtle saturation to the mid-range elements to enhance warmth without losing clarity.",
+    "Consider a gentle high-shelf boost around 10kHz to add air and sparkle to the mix."
+)
+# Above 3000 Hz, below 2000 Hz, in between
+MIXING_ADJUSTMENTS = (
+    "Smooth out high frequencies above 10kHz",
+    "Add gentle air and sparkle to the mix",
+    "Fine-tune overall frequency balance"
+)
+FREQUENCY_BALANCES = ("Well-balanced across the frequency spectrum", "Slightly bright-leaning", "Warm-leaning")
+
+MIXING_ISSUES = (
+    "high-frequency noise",
+    "phase correlation issues",
+    "bright-leaning frequency balance",
+    "minor mixing details"
+)
+FINAL_POLISH = (
+    "smoothing out high frequencies above 10kHz",
+    "checking mono compatibility",
+    "fine-tuning the overall frequency balance"
+)
+ARRANGEMENT_SUGGESTIONS = (
+    "dynamic contrasts through quieter bridge sections",
+    "subtle instrumental layers or counter-melodies",
+    "variations in texture between sections"
+)
+
+# Tempo/energy placement: high-energy, mid-tempo, slow
+PLACEMENTS = (
+    "commercials, sports content, and high-energy media",
+    "lifestyle content, brand messaging, and background scoring",
+    "emotional scenes, documentaries, and atmospheric content"
+)
+CONTEXTS = (
+    "ideal for high-energy content, sports segments, or upbeat commercials",
+    "suitable for lifestyle content, brand messaging, or background scoring",
+    "perfect for emotional scenes, documentary moments, or atmospheric content"
+)
+MARKET_POSITIONINGS = (
+    "Strong potential in the dance/electronic and high-energy playlists",
+    "Well-suited for mainstream pop and contemporary playlists",
+    "Ideal for mood-based and atmospheric playlists"
+)
+
+INVESTMENT_RECOMMENDATIONS = (
+    "Focus investment on marketing and promotion strategy.",
+    "Consider minimal mixing refinements before full market push.",
+    "Prioritize production improvements to maximize market potential."
+)
+POTENTIAL_DESCRIPTIONS = ("exceptional", "promising", "developing")
+CURRENT_POTENTIALS = (
+    "Ready for release with strong commercial potential",
+    "Solid track with good potential for indie release or sync licensing",
+    "Has unique elements that could work well in specific markets"
+)
+
+PRIMARY_ADJUSTMENTS = (
+    "Adjust tempo to {optimal_tempo} BPM for better danceability",
+    "Add more dynamic contrast between sections",
+    "Fine-tune arrangement for maximum impact"
+)
+OPTIMAL_TEMPOS = ("100-110", "120-125", "128-130")
+SECONDARY_ADJUSTMENTS = (
+    "Enhance vocal presence with careful EQ and compression",
+    "Add subtle layers to enrich the arrangement",
+    "Refine existing elements for better blend"
+)
+
+DYNAMICS_SUGGESTIONS = (
+    "Consider adding more dynamic contrast between sections to enhance emotional impact",
+    "Reduce peak levels slightly to prevent potential clipping",
+    "Dynamic range is appropriate for the style"
+)
+STEREO_SUGGESTIONS = (
+    "Consider widening the stereo field for more immersive sound",
+    "Check for phase cancellation issues in the low frequencies",
+    "Stereo field is well-balanced"
+)
+
+# Items that appear when their flag is set, combined per track by _flag_table
+MIX_PRIORITIES = ("vocal presence", "low-end balance", "stereo imaging")
+QUALITY_ASPECTS = ("vocal clarity", "production polish", "listener engagement")
+ENHANCEMENT_PRIORITIES = ("frequency balance", "dynamic contrast", "stereo imaging")
+POTENTIAL_STEPS = ("speed it up to 128 BPM", "enhance vocal clarity", "polish the mix")
+PRODUCTION_NOTES = (
+    "High-frequency noise detected - consider noise reduction",
+    "Phase correlation issues found - check mono compatibility",
+    "Digital clipping detected - reduce levels or apply limiting"
+)
+IMPROVEMENT_SUGGESTIONS = (
+    {
+        "category": "Frequency Balance",
+        "issue": "Bright-leaning mix",
+        "solution": "Use a gentle high-shelf EQ cut above 10kHz to reduce brightness",
+        "benefit": "This will create a smoother, more professional sound"
+    },
+    {
+        "category": "Dynamics",
+        "issue": "Limited dynamic range",
+        "solution": "Add quiet sections and build-ups between high-energy parts",
+        "benefit": "This will create more emotional impact and keep listeners engaged"
+    },
+    {
+        "category": "Stereo Image",
+        "issue": "Narrow stereo field",
+        "solution": "Use stereo widening techniques on specific elements (not bass)",
+        "benefit": "This will create a more immersive listening experience"
+    }
+)
+
+# Templates. Fields name entries in the per-track values dict built by
+# ReportGenerator._render; _formatters turns each template into its format_map.
+
+WELCOME = ('Welcome to your detailed song analysis! Below, you\'ll find insights into how "{song_name}" sounds, '
+           'feels, and could shine even brighter. Whether you\'re a composer tweaking your work, a music supervisor '
+           'picking the perfect track, or a label eyeing its potential, we\'ve got you covered with clear, practical advice.')
+
+OVERVIEW = ('"{song_name}" is a {overview_tempo} track with a tempo of {tempo:.1f} BPM, '
+            'giving it a {vibe} vibe. '
+            'It\'s got {overview_energy} energy ({energy:.2f}), '
+            '{overview_vocals} vocals ({vocal_clarity:.2f}), and '
+            'a {overview_production} production quality ({production_quality:.2f}). '
+            'Our analysis also picks up a "{mood}" mood, suggesting it\'s '
+            '{mood_appeal}. '
+            'Here\'s how it breaks down—and how to make it even better!')
+
+INSIGHTS = (
+    ("Tempo & Rhythm ({tempo:.1f} BPM)",
+     "This pace is {tempo_description}—it's perfect for {tempo_use_case}.",
+     "{tempo_suggestion}"),
+    ("Energy ({energy:.2f}/1.0)",
+     "Your song has {energy_description}, but there's room to play with dynamics.",
+     "{energy_suggestion}"),
+    ("Vocal Clarity ({vocal_clarity:.2f}/1.0)",
+     "The vocals {vocal_description}.",
+     "{vocal_suggestion}"),
+    ("Instrumental Complexity ({complexity:.2f}/1.0)",
+     "The instruments {complexity_description}.",
+     "{complexity_suggestion}"),
+    ("Mood & Genre Fit ({mood}, {primary_genre})",
+     "{mood_fit}",
+     "{mood_suggestion}"),
+    ("Music Theory (Key: {key})",
+     "Your song's in {key}, {key_character}.",
+     "For an interesting twist, try modulating to {relative_keys} in the bridge section. "
+     "This can add emotional depth and keep listeners engaged."),
+    ("Mixing Quality",
+     "{mix_quality}",
+     "{mixing_suggestion}")
+)
+
+COMPOSER_BENEFITS = (
+    "Creative & Technical Feedback: "
+    "The report clearly shows that '{song_name}' already has a {composer_foundation}"
+    "This data validates your compositional style and highlights areas for growth.",
+
+    "Fine-tuning Arrangements: "
+    "With {complexity_description}, you have a flexible canvas. "
+    "The report suggests that adding subtle dynamic variations or instrumental breaks could enhance the arrangement "
+    "without compromising its current clarity.",
+
+    "Mixing Direction: "
+    "Your vocals are effectively highlighted (clarity: {vocal_clarity:.2f}). "
+    "The noted {mixing_issues} offers a specific target for your next mix revision, "
+    "ensuring every sonic detail complements your creative vision."
+)
+COMPOSER_FOUNDATIONS = (
+    "strong rhythmic foundation and vocal delivery (clarity: {vocal_clarity:.2f}). ",
+    "developing foundation that can be enhanced. "
+)
+COMPOSER_INSIGHTS = (
+    "The clear rhythmic structure and {mood_lower} mood support your artistic intent. "
+    "Your song's {key} key signature ensures accessibility, making it an excellent candidate for "
+    "further experimentation with slight dynamic fluctuations—helping you maintain listener interest.",
+
+    "The {tempo_description} tempo ({tempo:.1f} BPM) and "
+    "engagement score ({engagement:.2f}) indicate strong potential. Consider adding {arrangement_suggestion} "
+    "to further enhance the emotional journey.",
+
+    "Production quality ({production_quality:.2f}) suggests {composer_production}"
+)
+COMPOSER_PRODUCTION = (
+    "your mix is nearly broadcast-ready. Focus on {final_polish}",
+    "room for improvement. Prioritize {mix_priorities}"
+)
+COMPOSER_SUMMARY = ("Your track '{song_name}' shows {potential_description} potential. "
+                    "Focus on {primary_adjustment_lower} to enhance its impact further.")
+
+SUPERVISOR_BENEFITS = (
+    "Quick Suitability Assessment: "
+    "The detailed metrics (tempo: {tempo:.1f} BPM, energy: {energy:.2f}, "
+    "mood: {mood_lower}) allow you to quickly determine if this track fits your project's specific "
+    "emotional and rhythmic requirements.",
+
+    "Context Matching: "
+    "The {tempo_description} tempo and high engagement score ({engagement:.2f}) mean "
+    "the track can effectively complement {context}. "
+    "The {mood_lower} mood adds emotional authenticity.",
+
+    "Technical Clarity Assurance: {supervisor_production}"
+)
+SUPERVISOR_PRODUCTION = (
+    "While the report notes {mixing_issues}, the overall production quality ({production_quality:.2f}) "
+    "suggests broadcast-readiness with just minimal post-production tweaks.",
+    "The production quality ({production_quality:.2f}) indicates some technical refinement may be needed before broadcast use."
+)
+SUPERVISOR_INSIGHTS = (
+    "For your placements, this track's {vocal_description} and "
+    "{complexity_description} serve as strong assets.",
+
+    "The {mood_lower} mood and {tempo_description} tempo align perfectly with "
+    "{mood_use_cases}. The {key} key adds a {key_character}.",
+
+    "Engagement metrics ({engagement:.2f}) assure you that audiences will respond positively, "
+    "making it a compelling option for {placement}."
+)
+SUPERVISOR_SUMMARY = ("This track is best suited for {context}. "
+                      "Its {mood_lower} mood and {tempo_description} tempo "
+                      "make it versatile for various media applications.")
+
+LABEL_BENEFITS = (
+    "Market Readiness: "
+    "The high reception scores (engagement: {engagement:.2f}, production: {production_quality:.2f}) signal that "
+    "'{song_name}' has strong commercial potential. Market score: {market_score:.1f}/10 indicates {label_viability}",
+
+    "Quality Control & Investment: "
+    "The detailed feedback on {quality_aspects} provides a clear roadmap for "
+    "optimization. {investment_recommendation}",
+
+    "Strategic Marketing: "
+    "The report's insights help in positioning the song within your catalog. The analysis provides concrete data "
+    "for making decisions on additional production investments to ensure maximum market impact."
+)
+LABEL_VIABILITY = ("immediate market viability.", "potential with strategic improvements.")
+LABEL_INSIGHTS = (
+    "Given the track's solid metrics (engagement: {engagement:.2f}, production: {production_quality:.2f}), "
+    "{label_distribution}",
+
+    "The {mood_lower} mood and {tempo_description} tempo make it an attractive "
+    "candidate for {market_positioning}. The {key} key adds commercial appeal.",
+
+    "Strategic enhancements in {enhancement_priorities} can optimize both the auditory experience "
+    "and market performance, boosting the track's competitive edge."
+)
+LABEL_DISTRIBUTION = (
+    "the song appears ready for wider distribution with only minor refinements needed.",
+    "focused improvements could significantly boost market potential."
+)
+LABEL_SUMMARY = "With a market score of {market_score:.1f}/10, '{song_name}' {label_readiness}. {market_positioning}"
+LABEL_READINESS = ("is ready for market with minimal adjustments", "shows promise with targeted improvements")
+
+POTENTIAL_WITH_STEPS = "Could reach {potential_score:.1f}/10 by: {potential_steps}"
+POTENTIAL_STRONG = "Already strong at {potential_score:.1f}/10 - focus on marketing and promotion"
+
+NEXT_STEPS_INTRO = "Open your music software and try these improvements:"
+NEXT_STEPS_OUTRO = "Upload the updated version to see how the scores improve!"
+
+# Every template _render fills in, by the name it uses for it
+TEMPLATES = {
+    "complexity_suggestions": COMPLEXITY_SUGGESTIONS,
+    "mood_fits": MOOD_FITS,
+    "mood_use_cases": MOOD_USE_CASES,
+    "composer_foundations": COMPOSER_FOUNDATIONS,
+    "composer_production": COMPOSER_PRODUCTION,
+    "supervisor_production": SUPERVISOR_PRODUCTION,
+    "primary_adjustments": PRIMARY_ADJUSTMENTS,
+    "welcome": WELCOME,
+    "overview": OVERVIEW,
+    "insights": INSIGHTS,
+    "composer_benefits": COMPOSER_BENEFITS,
+    "composer_insights": COMPOSER_INSIGHTS,
+    "composer_summary": COMPOSER_SUMMARY,
+    "supervisor_benefits": SUPERVISOR_BENEFITS,
+    "supervisor_insights": SUPERVISOR_INSIGHTS,
+    "supervisor_summary": SUPERVISOR_SUMMARY,
+    "label_benefits": LABEL_BENEFITS,
+    "label_insights": LABEL_INSIGHTS,
+    "label_summary": LABEL_SUMMARY,
+    "potential_with_steps": POTENTIAL_WITH_STEPS,
+    "potential_strong": POTENTIAL_STRONG
+}
+
+def _formatters(templates):
+    # Each template becomes a function of the values dict, nested the same way
+    if isinstance(templates, str):
+        return templates.format_map
+    return tuple(_formatters(template) for template in templates)
+
+def _flag_table(items: Sequence, combine, fallback) -> List:
+    # One entry per combination of flags, indexed by the flags read as bits (first item = lowest bit)
+    table = []
+    for bits in range(2 ** len(items)):
+        chosen = [item for i, item in enumerate(items) if bits & (1 << i)]
+        table.append(combine(chosen) if chosen else fallback)
+    return table
+
+def _band(conditions: Sequence[np.ndarray]) -> np.ndarray:
+    # Index of the first condition that holds, or len(conditions) when none does
+    band = np.full(len(conditions[0]), len(conditions))
+    for i in range(len(conditions) - 1, -1, -1):
+        band[conditions[i]] = i
+    return band
+
+def _bits(*flags: np.ndarray) -> np.ndarray:
+    index = np.zeros(len(flags[0]), dtype=int)
+    for i, flag in enumerate(flags):
+        index |= flag.astype(int) << i
+    return index
 
 class ReportGenerator:
-    def __init__(self):
+    def __init__(self, reception_model: Optional[str] = None):
+        # With a calibrated model file, scores engagement and production quality for tracks
+        # whose features do not give them; without one, reports keep their usual defaults
+        self.reception = ReceptionAnalyzer(reception_model) if reception_model else None
         self.genre_bpm_ranges = {
             'EDM': (125, 130),
             'Hip-Hop': (85, 95),
@@ -11,791 +428,356 @@ class ReportGenerator:
             'Ballad': (60, 80)
         }
 
-    def generate_report(self, song_name: str, composer: str, features: dict) -> dict:
-        try:
-            # Add metadata
-            metadata = {
-                "title": song_name,
-                "composer": composer,
-                "analysis_date": time.strftime("%B %d, %Y"),
-                "version": "1.0"
-            }
+        # Every combination of optional phrases, joined once instead of per report
+        self._mix_priorities = _flag_table(MIX_PRIORITIES, " and ".join, "overall mix balance")
+        self._quality_aspects = _flag_table(QUALITY_ASPECTS, " and ".join, "core elements")
+        self._enhancement_priorities = _flag_table(ENHANCEMENT_PRIORITIES, ", ".join, "final polish")
+        self._potential_steps = _flag_table(POTENTIAL_STEPS, ", ".join, None)
+        self._production_notes = _flag_table(
+            PRODUCTION_NOTES, list, ["Overall production quality is good, with no major technical issues detected"])
+        self._improvement_suggestions = _flag_table(IMPROVEMENT_SUGGESTIONS, list, [])
 
-            # Calculate additional metrics
-            energy_level = self._get_energy_level(features['energy'])
-            suggested_genres = self._suggest_genres(features['tempo'], features['energy'])
-            market_score = self._calculate_market_score(features)
-            potential_score = self._calculate_potential_score(features)
-
-            # Generate detailed report sections
-            welcome = self._generate_welcome(song_name)
-            overview = self._generate_overview(song_name, features)
-            key_insights = self._generate_key_insights(song_name, features)
-            technical_analysis = self._generate_technical_analysis(features)
-            target_audience = self._generate_target_audience(song_name, features)
-            market_potential = self._generate_market_potential(features)
-            next_steps = self._generate_next_steps(features)
-            improvement_suggestions = self._generate_improvement_suggestions(features)
-
-            # Create structured report
-            report = {
-                "metadata": metadata,
-                "welcome": welcome,
-                "overview": overview,
-                "key_insights": key_insights,
-                "technical_analysis": technical_analysis,
-                "target_audience": target_audience,
-                "market_potential": market_potential,
-                "next_steps": next_steps,
-                "improvement_suggestions": improvement_suggestions,
-                "numerical_metrics": {
-                    "tempo": features['tempo'],
-                    "energy": features['energy'],
-                    "vocal_clarity": features.get('vocal_clarity', 0.75),
-                    "instrumental_complexity": features.get('instrumental_complexity', 0.65),
-                    "production_quality": features.get('production_quality', 0.8),
-                    "engagement": features.get('engagement', 0.7)
-                }
-            }
+        # Each template fills itself in from the values dict built by _render
+        self._templates = {name: _formatters(template) for name, template in TEMPLATES.items()}
 
-            return report
+    def generate_report(self, song_name: str, composer: str, features: dict) -> dict:
+        try:
+            return self.generate_reports([(song_name, composer, features)])[0]
 
         except Exception as e:
             print(f"Error generating report: {str(e)}")
             raise
 
-    def _generate_welcome(self, song_name):
-        return (f'Welcome to your detailed song analysis! Below, you\'ll find insights into how "{song_name}" sounds, '
-                f'feels, and could shine even brighter. Whether you\'re a composer tweaking your work, a music supervisor '
-                f'picking the perfect track, or a label eyeing its potential, we\'ve got you covered with clear, practical advice.')
-
-    def _generate_overview(self, song_name, features):
-        tempo_desc = "energetic" if features['tempo'] > 120 else "moderate" if features['tempo'] > 90 else "relaxed"
-        energy_desc = "strong" if features['energy'] > 0.7 else "balanced" if features['energy'] > 0.4 else "subtle"
-        vocal_clarity = features.get('vocal_clarity', 0.75)
-        production_quality = features.get('production_quality', 0.8)
-
-        return (f'"{song_name}" is a {tempo_desc} track with a tempo of {features["tempo"]:.1f} BPM, ' +
-                f'giving it a {"danceable, upbeat" if features["tempo"] > 110 else "steady, flowing"} vibe. ' +
-                f'It\'s got {energy_desc} energy ({features["energy"]:.2f}), ' +
-                f'{"clear" if vocal_clarity > 0.7 else "balanced"} vocals ({vocal_clarity:.2f}), and ' +
-                f'a {"polished" if production_quality > 0.75 else "solid"} production quality ({production_quality:.2f}). ' +
-                f'Our analysis also picks up a "{features["mood"]}" mood, suggesting it\'s ' +
-                f'{"a feel-good tune with pop appeal" if features["mood"].lower() in ["happy", "energetic"] else "perfect for creating atmosphere"}. ' +
-                f'Here\'s how it breaks down—and how to make it even better!')
-
-    def _generate_key_insights(self, song_name, features):
-        insights = []
-
-        # 1. Tempo & Rhythm
-        tempo_insight = {
-            "title": f"Tempo & Rhythm ({features['tempo']:.1f} BPM)",
-            "meaning": f"This pace is {self._describe_tempo(features['tempo'])}—it's perfect for {self._get_tempo_use_case(features['tempo'])}.",
-            "suggestion": self._get_tempo_suggestion(features['tempo'])
-        }
-        insights.append(tempo_insight)
-
-        # 2. Energy
-        energy_insight = {
-            "title": f"Energy ({features['energy']:.2f}/1.0)",
-            "meaning": f"Your song has {self._describe_energy(features['energy'])}, but there's room to play with dynamics.",
-            "suggestion": self._get_energy_suggestion(features['energy'])
-        }
-        insights.append(energy_insight)
-
-        # 3. Vocal Clarity
-        vocal_clarity = features.get('vocal_clarity', 0.75)
-        vocal_insight = {
-            "title": f"Vocal Clarity ({vocal_clarity:.2f}/1.0)",
-            "meaning": f"The vocals {self._describe_vocal_clarity(vocal_clarity)}.",
-            "suggestion": self._get_vocal_suggestion(vocal_clarity)
-        }
-        insights.append(vocal_insight)
-
-        # 4. Instrumental Complexity
-        complexity = features.get('instrumental_complexity', 0.65)
-        complexity_insight = {
-            "title": f"Instrumental Complexity ({complexity:.2f}/1.0)",
-            "meaning": f"The instruments {self._describe_complexity(complexity)}.",
-            "suggestion": self._get_complexity_suggestion(complexity, song_name)
-        }
-        insights.append(complexity_insight)
 
-        # 5. Mood & Genre
-        mood_insight = {
-            "title": f"Mood & Genre Fit ({features['mood']}, {self._suggest_primary_genre(features)})",
-            "meaning": self._describe_mood_fit(features),
-            "suggestion": self._get_mood_suggestion(features)
-        }
-        insights.append(mood_insight)
+    def generate_reports(self, tracks: Sequence[Tuple[str, str, dict]]) -> List[dict]:
+        """Build reports for many (song_name, composer, features) tracks at once.
 
-        # 6. Music Theory
-        theory_insight = {
-            "title": f"Music Theory (Key: {features['key']})",
-            "meaning": f"Your song's in {features['key']}, {self._describe_key_character(features['key'])}.",
-            "suggestion": self._get_theory_suggestion(features['key'])
-        }
-        insights.append(theory_insight)
+        Thresholds, scores and phrase choices are worked out for the whole batch
+        in derive_metrics and _value_columns; per track, only the templates
+        are filled in.
+        """
+        try:
+            if not tracks:
+                return []
+            if self.reception is not None:
+                tracks = self._with_reception(tracks)
+            features_list = [features for _, _, features in tracks]
+            columns = self._value_columns(tracks, self.derive_metrics(features_list))
+            names = list(columns)
+            analysis_date = time.strftime("%B %d, %Y")
+            return [self._render(dict(zip(names, row)), analysis_date) for row in zip(*columns.values())]
 
-        # 7. Mixing Quality
-        mixing_insight = {
-            "title": "Mixing Quality",
-            "meaning": self._analyze_mix_quality(features),
-            "suggestion": self._get_mixing_suggestion(features)
-        }
-        insights.append(mixing_insight)
-
-        return insights
-
-    def _describe_tempo(self, tempo):
-        if tempo > 125:
-            return "energetic and perfect for dance music"
-        elif tempo > 110:
-            return "upbeat and engaging"
-        elif tempo > 90:
-            return "steady and comfortable"
-        else:
-            return "relaxed and intimate"
-
-    def _get_tempo_use_case(self, tempo):
-        if tempo > 125:
-            return "club tracks and high-energy content"
-        elif tempo > 110:
-            return "casual listening or upbeat scenes"
-        elif tempo > 90:
-            return "background music or relaxed content"
-        else:
-            return "intimate scenes or atmospheric moments"
-
-    def _get_tempo_suggestion(self, tempo):
-        if tempo > 125:
-            return "Try adding breaks or slower sections (around 100 BPM) for dynamic contrast. This will give dancers a moment to catch their breath."
-        elif tempo > 110:
-            return "If you're aiming for a dancefloor hit, try speeding up to 128 BPM. That's a sweet spot for club tracks."
-        elif tempo > 90:
-            return "Experiment with double-time sections to add energy without changing the fundamental groove."
-        else:
-            return "Consider adding subtle percussion or a faster counter-melody to maintain interest while keeping the relaxed vibe."
-
-    def _describe_energy(self, energy):
-        if energy > 0.7:
-            return "a powerful, driving feel that commands attention"
-        elif energy > 0.4:
-            return "a balanced, engaging energy level"
-        else:
-            return "a subtle, atmospheric quality"
-
-    def _get_energy_suggestion(self, energy):
-        if energy > 0.7:
-            return "Add a quiet bridge or breakdown section—like a stripped-down verse with just vocals and a simple beat—before ramping back up. This contrast will make the loud parts hit harder."
-        elif energy > 0.4:
-            return "Try building to a more intense chorus by gradually adding layers of instruments and effects. This creates natural excitement."
-        else:
-            return "Experiment with adding subtle layers of percussion or pads to build tension without losing the intimate feel."
-
-    def _describe_vocal_clarity(self, clarity):
-        if clarity > 0.7:
-            return "stand out nicely, making lyrics easy to hear—great for storytelling or catchy hooks"
-        elif clarity > 0.4:
-            return "blend well with the instruments, creating a balanced mix"
-        else:
-            return "sit back in the mix, creating an atmospheric effect"
-
-    def _get_vocal_suggestion(self, clarity):
-        if clarity > 0.7:
-            return "Experiment with a touch of reverb (10-20%) on the vocals to add space without losing clarity. Also try subtle delay effects on specific phrases to create depth."
-        elif clarity > 0.4:
-            return "Use careful EQ around 2-4kHz to lift the vocals slightly without making them harsh. A gentle compressor can also help them cut through."
-        else:
-            return "If you want the vocals more upfront, try reducing reverb and bringing up the mid-range frequencies. For the current style, add textural vocal harmonies."
-
-    def _describe_complexity(self, complexity):
-        if complexity > 0.7:
-            return "create a rich, detailed soundscape that rewards repeated listening"
-        elif complexity > 0.4:
-            return "blend well—not too empty, not too crowded—leaving space for everything to breathe"
-        else:
-            return "maintain a clean, minimalist arrangement that emphasizes key elements"
-
-    def _get_complexity_suggestion(self, complexity, song_name):
-        if complexity > 0.7:
-            return f"Consider simplifying some sections to give listeners a break. You could strip back verses to core elements, saving the full complexity for chorus and bridge."
-        elif complexity > 0.4:
-            return f"Introduce a signature sound—like a unique synthesizer melody or distinctive bassline—to give '{song_name}' its own character."
-        else:
-            return "Try adding subtle counter-melodies or textural elements in specific sections to create more interest while maintaining clarity."
-
-    def _suggest_primary_genre(self, features):
-        if features['tempo'] > 125 and features['energy'] > 0.7:
-            return "EDM-Leaning"
-        elif features['tempo'] > 110 and features['energy'] > 0.6:
-            return "Pop-Leaning"
-        elif features['tempo'] < 90 and features['energy'] < 0.4:
-            return "Ambient-Leaning"
-        else:
-            return "Pop-Leaning"
-
-    def _describe_mood_fit(self, features):
-        mood = features['mood'].lower()
-        if mood in ['happy', 'energetic']:
-            return "The song feels uplifting and positive, perfect for feel-good playlists or upbeat content"
-        elif mood in ['relaxed', 'calm']:
-            return "The track creates a peaceful atmosphere, ideal for relaxation or background music"
-        else:
-            return f"The {mood} mood gives the song a distinctive character that could work well in specific contexts"
-
-    def _get_mood_suggestion(self, features):
-        mood = features['mood'].lower()
-        if mood in ['happy', 'energetic']:
-            return "Add a catchy, singable hook in the chorus—something simple like a repeated phrase or melodic riff that listeners can easily remember."
-        elif mood in ['relaxed', 'calm']:
-            return "Try introducing subtle variations in texture and harmony to maintain interest while preserving the peaceful mood."
-        else:
-            return "Consider emphasizing the unique mood with complementary sound design or effects that enhance the emotional impact."
-
-    def _describe_key_character(self, key):
-        characters = {
-            'C': 'which has a pure, open quality',
-            'G': 'perfect for bright, optimistic feelings',
-            'D': 'great for energetic, driving songs',
-            'A': 'which can sound warm and engaging',
-            'E': 'which often feels bright and assertive',
-            'F': 'which has a warm, balanced character',
-            'Bb': 'which can sound smooth and mellow'
-        }
-        return characters.get(key, 'which offers versatile possibilities')
+        except Exception as e:
+            print(f"Error generating report: {str(e)}")
+            raise
 
-    def _get_theory_suggestion(self, key):
-        relative_keys = {
-            'C': 'G or Am', 'G': 'D or Em', 'D': 'A or Bm',
-            'A': 'E or F#m', 'E': 'B or C#m', 'F': 'C or Dm',
-            'Bb': 'F or Gm'
-        }
-        return f"For an interesting twist, try modulating to {relative_keys.get(key, 'a related key')} in the bridge section. This can add emotional depth and keep listeners engaged."
-
-    def _analyze_mix_quality(self, features):
-        spectral_centroid = features.get('spectral_centroid', 2000)
-        if spectral_centroid > 3000:
-            return "The mix is bright, possibly with some high-frequency emphasis that could be smoothed out"
-        elif spectral_centroid > 2000:
-            return "The mix has good clarity and balance across frequencies"
-        else:
-            return "The mix has a warmer character that might benefit from some high-end enhancement"
-
-    def _get_mixing_suggestion(self, features):
-        spectral_centroid = features.get('spectral_centroid', 2000)
-        if spectral_centroid > 3000:
-            return "Use an equalizer to gently reduce frequencies above 10kHz by 1-2dB. This will maintain clarity while reducing any potential harshness."
-        elif spectral_centroid > 2000:
-            return "Try adding subtle saturation to the mid-range elements to enhance warmth without losing clarity."
-        else:
-            return "Consider a gentle high-shelf boost around 10kHz to add air and sparkle to the mix."
-
-    def _generate_target_audience(self, song_name, features):
-        sections = {
-            "composers": self._get_composer_advice(song_name, features),
-            "supervisors": self._get_supervisor_advice(features),
-            "labels": self._get_label_advice(song_name, features)
-        }
-        return sections
-
-    def _get_composer_advice(self, song_name, features):
-        # Calculate key metrics
-        engagement = features.get('engagement', 0.7)
-        production_quality = features.get('production_quality', 0.8)
-        vocal_clarity = features.get('vocal_clarity', 0.75)
-
-        benefits = [
-            "Creative & Technical Feedback: " +
-            f"The report clearly shows that '{song_name}' already has a " +
-            (f"strong rhythmic foundation and vocal delivery (clarity: {vocal_clarity:.2f}). " if vocal_clarity > 0.7
-             else "developing foundation that can be enhanced. ") +
-            "This data validates your compositional style and highlights areas for growth.",
-
-            "Fine-tuning Arrangements: " +
-            f"With {self._describe_complexity(features.get('instrumental_complexity', 0.65))}, you have a flexible canvas. " +
-            "The report suggests that adding subtle dynamic variations or instrumental breaks could enhance the arrangement " +
-            "without compromising its current clarity.",
-
-            "Mixing Direction: " +
-            f"Your vocals are effectively highlighted (clarity: {vocal_clarity:.2f}). " +
-            (f"The noted {self._get_mixing_issues(features)} offers a specific target for your next mix revision, "
-             "ensuring every sonic detail complements your creative vision.")
-        ]
-
-        specific_insights = [
-            f"The clear rhythmic structure and {features['mood'].lower()} mood support your artistic intent. " +
-            f"Your song's {features['key']} key signature ensures accessibility, making it an excellent candidate for " +
-            "further experimentation with slight dynamic fluctuations—helping you maintain listener interest.",
-
-            f"The {self._describe_tempo(features['tempo'])} tempo ({features['tempo']:.1f} BPM) and " +
-            f"engagement score ({engagement:.2f}) indicate strong potential. Consider adding {self._get_arrangement_suggestion(features)} " +
-            "to further enhance the emotional journey.",
-
-            f"Production quality ({production_quality:.2f}) suggests " +
-            (f"your mix is nearly broadcast-ready. Focus on {self._get_final_polish_suggestion(features)}"
-             if production_quality > 0.75 else
-             f"room for improvement. Prioritize {self._get_mix_improvement_priorities(features)}")
-        ]
+    def _with_reception(self, tracks: Sequence[Tuple[str, str, dict]]) -> List[Tuple[str, str, dict]]:
+        # Reception scores for the whole batch; values already in the features win
+        scores = self.reception.analyze_batch([features for _, _, features in tracks])
+        return [(song_name, composer, {**track_scores, **features})
+                for (song_name, composer, features), track_scores in zip(tracks, scores)]
+
+    def derive_metrics(self, features_list: Sequence[dict]) -> Dict[str, Any]:
+        # Feature columns, with the same defaults the report has always assumed
+        def column(name, default=None):
+            if default is None:
+                return np.array([features[name] for features in features_list], dtype=float)
+            return np.array([features.get(name, default) for features in features_list], dtype=float)
+
+        def flag(name):
+            return np.array([bool(features.get(name, False)) for features in features_list])
+
+        tempo = column('tempo')
+        energy = column('energy')
+        vocal_clarity = column('vocal_clarity', 0.75)
+        complexity = column('instrumental_complexity', 0.65)
+        production = column('production_quality', 0.8)
+        engagement = column('engagement', 0.7)
+        centroid = column('spectral_centroid', 2000)
+        dynamic_range = column('dynamic_range', 0.7)
+        peak_levels = column('peak_levels', -1.5)
+        stereo_width = column('stereo_width', 0.7)
+        bass_presence = column('bass_presence', 0.7)
+        mids_presence = column('mids_presence', 0.75)
+        high_freq_noise = flag('high_freq_noise')
+        phase_issues = flag('phase_issues')
+        clipping = flag('clipping_detected')
+
+        mood_band = np.array([MOOD_BANDS.get(features['mood'].lower(), 2) for features in features_list], dtype=int)
+
+        # Scores
+        market_score = np.minimum(6.0 + ((tempo >= 115) & (tempo <= 130)) + ((energy >= 0.5) & (energy <= 0.8)), 10.0)
+        potential_score = np.minimum(market_score + 2.5, 10.0)
+
+        # Genre matches: one column per entry in genre_bpm_ranges
+        genres = list(self.genre_bpm_ranges)
+        bounds = np.array([self.genre_bpm_ranges[genre] for genre in genres], dtype=float)
+        in_range = (bounds[:, 0] <= tempo[:, np.newaxis]) & (tempo[:, np.newaxis] <= bounds[:, 1])
+        extra_genres = (['Dance', 'Electronic'], ['Ambient', 'Chill'], [])
+        extra_band = _band([energy > 0.7, energy < 0.3])
+        suggested_genres = [[genre for genre, match in zip(genres, row) if match] + extra_genres[band]
+                            for row, band in zip(in_range.tolist(), extra_band.tolist())]
+
+        upbeat_placement = _band([(tempo > 120) & (energy > 0.7), tempo > 100])
+        speed_up = (tempo < 125) & (energy > 0.6)
 
         return {
-            "benefits": benefits,
-            "specific_insights": specific_insights,
-            "summary": self._generate_composer_summary(song_name, features)
+            "market_score": market_score,
+            "potential_score": potential_score,
+            "energy_level": np.array(ENERGY_LEVELS)[_band([energy > 0.7, energy > 0.4])],
+            "suggested_genres": suggested_genres,
+            "tempo_band": _band([tempo > 125, tempo > 110, tempo > 90]),
+            "overview_tempo_band": _band([tempo > 120, tempo > 90]),
+            "danceable": tempo > 110,
+            "energy_band": _band([energy > 0.7, energy > 0.4]),
+            "vocal_band": _band([vocal_clarity > 0.7, vocal_clarity > 0.4]),
+            "complexity_band": _band([complexity > 0.7, complexity > 0.4]),
+            "polished": production > 0.75,
+            "investment_band": _band([production > 0.85, production > 0.75]),
+            "primary_genre_band": _band([(tempo > 125) & (energy > 0.7), (tempo > 110) & (energy > 0.6),
+                                         (tempo < 90) & (energy < 0.4)]),
+            "mood_band": mood_band,
+            "centroid_band": _band([centroid > 3000, centroid > 2000]),
+            "mixing_adjustment_band": _band([centroid > 3000, centroid < 2000]),
+            "balance_band": _band([(centroid > 1800) & (centroid < 2500), centroid > 2500]),
+            "mixing_issue_band": _band([high_freq_noise, phase_issues, centroid > 2500]),
+            "final_polish_band": _band([high_freq_noise, phase_issues]),
+            "arrangement_band": _band([energy > 0.7, complexity < 0.6]),
+            "placement_band": upbeat_placement,
+            "potential_band": _band([market_score > 8, market_score > 6]),
+            "current_potential_band": _band([market_score >= 8, market_score >= 6]),
+            "market_ready": market_score > 7,
+            "primary_adjustment_band": _band([speed_up, energy < 0.6]),
+            "optimal_tempo_band": _band([tempo < 100, tempo < 120]),
+            "secondary_adjustment_band": _band([vocal_clarity < 0.8, complexity < 0.7]),
+            "dynamics_band": _band([dynamic_range < 0.6, peak_levels > -1]),
+            "stereo_band": _band([stereo_width < 0.6, phase_issues]),
+            "noisy": high_freq_noise,
+            "bass_thin": bass_presence < 0.7,
+            "mids_thin": mids_presence < 0.75,
+            "mix_priorities": _bits(vocal_clarity < 0.7, bass_presence < 0.7, stereo_width < 0.6),
+            "quality_aspects": _bits(vocal_clarity > 0.7, production > 0.75, engagement > 0.7),
+            "enhancement_priorities": _bits(high_freq_noise, dynamic_range < 0.6, stereo_width < 0.6),
+            "potential_steps": _bits(speed_up, vocal_clarity < 0.8, production < 0.85),
+            "production_notes": _bits(high_freq_noise, phase_issues, clipping),
+            "improvement_suggestions": _bits(centroid > 2500, dynamic_range < 0.6, stereo_width < 0.6)
         }
 
-    def _get_supervisor_advice(self, features):
-        # Calculate key metrics
-        engagement = features.get('engagement', 0.7)
-        production_quality = features.get('production_quality', 0.8)
-
-        benefits = [
-            "Quick Suitability Assessment: " +
-            f"The detailed metrics (tempo: {features['tempo']:.1f} BPM, energy: {features['energy']:.2f}, " +
-            f"mood: {features['mood'].lower()}) allow you to quickly determine if this track fits your project's specific " +
-            "emotional and rhythmic requirements.",
 
-            "Context Matching: " +
-            f"The {self._describe_tempo(features['tempo'])} tempo and high engagement score ({engagement:.2f}) mean " +
-            f"the track can effectively complement {self._get_context_suggestions(features)}. " +
-            f"The {features['mood'].lower()} mood adds emotional authenticity.",
+    def _value_columns(self, tracks: Sequence[Tuple[str, str, dict]], m: Dict[str, Any]) -> Dict[str, list]:
+        # One list per template value, in track order; phrases are picked by band for the whole batch
+        features_list = [features for _, _, features in tracks]
+        t = self._templates
 
-            "Technical Clarity Assurance: " +
-            (f"While the report notes {self._get_mixing_issues(features)}, the overall production quality ({production_quality:.2f}) "
-             "suggests broadcast-readiness with just minimal post-production tweaks." if production_quality > 0.75 else
-             f"The production quality ({production_quality:.2f}) indicates some technical refinement may be needed before broadcast use.")
-        ]
+        def get(name, default):
+            return [features.get(name, default) for features in features_list]
 
-        specific_insights = [
-            f"For your placements, this track's {self._describe_vocal_clarity(features.get('vocal_clarity', 0.75))} and " +
-            f"{self._describe_complexity(features.get('instrumental_complexity', 0.65))} serve as strong assets.",
+        def pick(table, index):
+            return [table[i] for i in np.asarray(index, dtype=int).tolist()]
 
-            f"The {features['mood'].lower()} mood and {self._describe_tempo(features['tempo'])} tempo align perfectly with " +
-            f"{self._get_mood_use_cases(features)}. The {features['key']} key adds a {self._describe_key_character(features['key'])}.",
+        def either(condition, when_true, when_false):
+            return pick((when_false, when_true), condition)
 
-            f"Engagement metrics ({engagement:.2f}) assure you that audiences will respond positively, " +
-            f"making it a compelling option for {self._get_specific_placement_suggestions(features)}."
-        ]
+        moods = [features['mood'] for features in features_list]
+        keys = [features['key'] for features in features_list]
 
         return {
-            "benefits": benefits,
-            "specific_insights": specific_insights,
-            "summary": self._generate_supervisor_summary(features)
+            # Values printed in the report, exactly as given
+            "song_name": [song_name for song_name, _, _ in tracks],
+            "composer": [composer for _, composer, _ in tracks],
+            "tempo": [features['tempo'] for features in features_list],
+            "energy": [features['energy'] for features in features_list],
+            "mood": moods,
+            "mood_lower": [mood.lower() for mood in moods],
+            "key": keys,
+            "vocal_clarity": get('vocal_clarity', 0.75),
+            "complexity": get('instrumental_complexity', 0.65),
+            "production_quality": get('production_quality', 0.8),
+            "engagement": get('engagement', 0.7),
+            "bass_presence": get('bass_presence', 0.7),
+            "bass_clarity": get('bass_clarity', 0.65),
+            "mids_presence": get('mids_presence', 0.75),
+            "mids_clarity": get('mids_clarity', 0.7),
+            "highs_presence": get('highs_presence', 0.8),
+            "highs_clarity": get('highs_clarity', 0.75),
+            "high_freq_noise": get('high_freq_noise', False),
+            "dynamic_range": get('dynamic_range', 0.7),
+            "peak_levels": get('peak_levels', -1.5),
+            "average_loudness": get('average_loudness', -14),
+            "stereo_width": get('stereo_width', 0.7),
+            "stereo_balance": get('stereo_balance', 0.5),
+            "phase_issues": get('phase_issues', False),
+            "market_score": m["market_score"].tolist(),
+            "potential_score": m["potential_score"].tolist(),
+
+            # Phrases
+            "overview_tempo": pick(OVERVIEW_TEMPO, m["overview_tempo_band"]),
+            "vibe": either(m["danceable"], "danceable, upbeat", "steady, flowing"),
+            "overview_energy": pick(OVERVIEW_ENERGY, m["energy_band"]),
+            "overview_vocals": either(m["vocal_band"] == 0, "clear", "balanced"),
+            "overview_production": either(m["polished"], "polished", "solid"),
+            "mood_appeal": pick(MOOD_APPEAL, m["mood_band"]),
+            "tempo_description": pick(TEMPO_DESCRIPTIONS, m["tempo_band"]),
+            "tempo_use_case": pick(TEMPO_USE_CASES, m["tempo_band"]),
+            "tempo_suggestion": pick(TEMPO_SUGGESTIONS, m["tempo_band"]),
+            "energy_description": pick(ENERGY_DESCRIPTIONS, m["energy_band"]),
+            "energy_suggestion": pick(ENERGY_SUGGESTIONS, m["energy_band"]),
+            "vocal_description": pick(VOCAL_DESCRIPTIONS, m["vocal_band"]),
+            "vocal_suggestion": pick(VOCAL_SUGGESTIONS, m["vocal_band"]),
+            "complexity_description": pick(COMPLEXITY_DESCRIPTIONS, m["complexity_band"]),
+            "primary_genre": pick(PRIMARY_GENRES, m["primary_genre_band"]),
+            "mood_suggestion": pick(MOOD_SUGGESTIONS, m["mood_band"]),
+            "key_character": [KEY_CHARACTERS.get(key, 'which offers versatile possibilities') for key in keys],
+            "relative_keys": [RELATIVE_KEYS.get(key, 'a related key') for key in keys],
+            "mix_quality": pick(MIX_QUALITIES, m["centroid_band"]),
+            "mixing_suggestion": pick(MIXING_SUGGESTIONS, m["centroid_band"]),
+            "mixing_issues": pick(MIXING_ISSUES, m["mixing_issue_band"]),
+            "final_polish": pick(FINAL_POLISH, m["final_polish_band"]),
+            "arrangement_suggestion": pick(ARRANGEMENT_SUGGESTIONS, m["arrangement_band"]),
+            "mix_priorities": pick(self._mix_priorities, m["mix_priorities"]),
+            "placement": pick(PLACEMENTS, m["placement_band"]),
+            "context": pick(CONTEXTS, m["placement_band"]),
+            "market_positioning": pick(MARKET_POSITIONINGS, m["placement_band"]),
+            "quality_aspects": pick(self._quality_aspects, m["quality_aspects"]),
+            "investment_recommendation": pick(INVESTMENT_RECOMMENDATIONS, m["investment_band"]),
+            "enhancement_priorities": pick(self._enhancement_priorities, m["enhancement_priorities"]),
+            "potential_description": pick(POTENTIAL_DESCRIPTIONS, m["potential_band"]),
+            "label_viability": either(m["market_ready"], *LABEL_VIABILITY),
+            "label_distribution": either(m["polished"], *LABEL_DISTRIBUTION),
+            "label_readiness": either(m["market_ready"], *LABEL_READINESS),
+            "optimal_tempo": pick(OPTIMAL_TEMPOS, m["optimal_tempo_band"]),
+            "potential_steps": pick(self._potential_steps, m["potential_steps"]),
+            "current_potential": pick(CURRENT_POTENTIALS, m["current_potential_band"]),
+            "secondary_adjustment": pick(SECONDARY_ADJUSTMENTS, m["secondary_adjustment_band"]),
+            "mixing_adjustment": pick(MIXING_ADJUSTMENTS, m["mixing_adjustment_band"]),
+            "bass_suggestion": either(m["bass_thin"], "Consider adding subtle bass enhancement around 60-100Hz for more warmth",
+                                      "Bass levels are well-balanced"),
+            "mids_suggestion": either(m["mids_thin"], "Try a gentle boost around 2-4kHz to enhance vocal presence",
+                                      "Mid frequencies are well-represented"),
+            "highs_suggestion": either(m["noisy"], "Use a de-esser or gentle high-shelf EQ cut above 10kHz",
+                                       "High frequencies are clean and clear"),
+            "overall_balance": pick(FREQUENCY_BALANCES, m["balance_band"]),
+            "dynamics_suggestion": pick(DYNAMICS_SUGGESTIONS, m["dynamics_band"]),
+            "stereo_suggestion": pick(STEREO_SUGGESTIONS, m["stereo_band"]),
+            "production_notes": pick(self._production_notes, m["production_notes"]),
+            "improvement_suggestions": pick(self._improvement_suggestions, m["improvement_suggestions"]),
+
+            # Templates that are themselves chosen by band
+            "complexity_suggestion_template": pick(t["complexity_suggestions"], m["complexity_band"]),
+            "mood_fit_template": pick(t["mood_fits"], m["mood_band"]),
+            "mood_use_cases_template": pick(t["mood_use_cases"], m["mood_band"]),
+            "composer_foundation_template": either(m["vocal_band"] == 0, *t["composer_foundations"]),
+            "composer_production_template": either(m["polished"], *t["composer_production"]),
+            "supervisor_production_template": either(m["polished"], *t["supervisor_production"]),
+            "primary_adjustment_template": pick(t["primary_adjustments"], m["primary_adjustment_band"]),
+            "potential_template": either(m["potential_steps"] > 0, t["potential_with_steps"], t["potential_strong"])
         }
 
-    def _get_label_advice(self, song_name, features):
-        # Calculate key metrics
-        engagement = features.get('engagement', 0.7)
-        production_quality = features.get('production_quality', 0.8)
-        market_score = self._calculate_market_score(features)
-
-        benefits = [
-            "Market Readiness: " +
-            f"The high reception scores (engagement: {engagement:.2f}, production: {production_quality:.2f}) signal that " +
-            f"'{song_name}' has strong commercial potential. Market score: {market_score:.1f}/10 indicates " +
-            ("immediate market viability." if market_score > 7 else "potential with strategic improvements."),
-
-            "Quality Control & Investment: " +
-            f"The detailed feedback on {self._get_key_quality_aspects(features)} provides a clear roadmap for " +
-            f"optimization. {self._get_investment_recommendation(features)}",
-
-            "Strategic Marketing: " +
-            "The report's insights help in positioning the song within your catalog. The analysis provides concrete data " +
-            "for making decisions on additional production investments to ensure maximum market impact."
-        ]
-
-        specific_insights = [
-            f"Given the track's solid metrics (engagement: {engagement:.2f}, production: {production_quality:.2f}), " +
-            (f"the song appears ready for wider distribution with only minor refinements needed." if production_quality > 0.75
-             else f"focused improvements could significantly boost market potential."),
-
-            f"The {features['mood'].lower()} mood and {self._describe_tempo(features['tempo'])} tempo make it an attractive " +
-            f"candidate for {self._get_market_positioning(features)}. The {features['key']} key adds commercial appeal.",
-
-            f"Strategic enhancements in {self._get_enhancement_priorities(features)} can optimize both the auditory experience " +
-            "and market performance, boosting the track's competitive edge."
-        ]
-
-        return {
-            "benefits": benefits,
-            "specific_insights": specific_insights,
-            "summary": self._generate_label_summary(song_name, features)
-        }
+    def _render(self, v: Dict[str, Any], analysis_date: str) -> dict:
+        t = self._templates
 
-    def _get_mixing_issues(self, features):
-        if features.get('high_freq_noise', False):
-            return "high-frequency noise"
-        elif features.get('phase_issues', False):
-            return "phase correlation issues"
-        elif features.get('spectral_centroid', 2000) > 2500:
-            return "bright-leaning frequency balance"
-        else:
-            return "minor mixing details"
-
-    def _get_arrangement_suggestion(self, features):
-        if features['energy'] > 0.7:
-            return "dynamic contrasts through quieter bridge sections"
-        elif features.get('instrumental_complexity', 0.65) < 0.6:
-            return "subtle instrumental layers or counter-melodies"
-        else:
-            return "variations in texture between sections"
-
-    def _get_final_polish_suggestion(self, features):
-        if features.get('high_freq_noise', False):
-            return "smoothing out high frequencies above 10kHz"
-        elif features.get('phase_issues', False):
-            return "checking mono compatibility"
-        else:
-            return "fine-tuning the overall frequency balance"
-
-    def _get_mix_improvement_priorities(self, features):
-        priorities = []
-        if features.get('vocal_clarity', 0.75) < 0.7:
-            priorities.append("vocal presence")
-        if features.get('bass_presence', 0.7) < 0.7:
-            priorities.append("low-end balance")
-        if features.get('stereo_width', 0.7) < 0.6:
-            priorities.append("stereo imaging")
-        return " and ".join(priorities) if priorities else "overall mix balance"
-
-    def _get_specific_placement_suggestions(self, features):
-        if features['tempo'] > 120 and features['energy'] > 0.7:
-            return "commercials, sports content, and high-energy media"
-        elif features['tempo'] > 100:
-            return "lifestyle content, brand messaging, and background scoring"
-        else:
-            return "emotional scenes, documentaries, and atmospheric content"
-
-    def _get_key_quality_aspects(self, features):
-        aspects = []
-        if features.get('vocal_clarity', 0.75) > 0.7:
-            aspects.append("vocal clarity")
-        if features.get('production_quality', 0.8) > 0.75:
-            aspects.append("production polish")
-        if features.get('engagement', 0.7) > 0.7:
-            aspects.append("listener engagement")
-        return " and ".join(aspects) if aspects else "core elements"
-
-    def _get_investment_recommendation(self, features):
-        if features.get('production_quality', 0.8) > 0.85:
-            return "Focus investment on marketing and promotion strategy."
-        elif features.get('production_quality', 0.8) > 0.75:
-            return "Consider minimal mixing refinements before full market push."
-        else:
-            return "Prioritize production improvements to maximize market potential."
-
-    def _get_enhancement_priorities(self, features):
-        priorities = []
-        if features.get('high_freq_noise', False):
-            priorities.append("frequency balance")
-        if features.get('dynamic_range', 0.7) < 0.6:
-            priorities.append("dynamic contrast")
-        if features.get('stereo_width', 0.7) < 0.6:
-            priorities.append("stereo imaging")
-        return ", ".join(priorities) if priorities else "final polish"
-
-    def _generate_composer_summary(self, song_name, features):
-        return (f"Your track '{song_name}' shows {self._describe_potential(features)} potential. " +
-                f"Focus on {self._get_primary_adjustment(features).lower()} to enhance its impact further.")
-
-    def _generate_supervisor_summary(self, features):
-        return (f"This track is best suited for {self._get_context_suggestions(features)}. " +
-                f"Its {features['mood'].lower()} mood and {self._describe_tempo(features['tempo'])} tempo " +
-                "make it versatile for various media applications.")
-
-    def _generate_label_summary(self, song_name, features):
-        market_score = self._calculate_market_score(features)
-        return (f"With a market score of {market_score:.1f}/10, '{song_name}' " +
-                ("is ready for market with minimal adjustments" if market_score > 7
-                 else "shows promise with targeted improvements") + ". " +
-                self._get_market_positioning(features))
-
-    def _get_context_suggestions(self, features):
-        if features['tempo'] > 120 and features['energy'] > 0.7:
-            return "ideal for high-energy content, sports segments, or upbeat commercials"
-        elif features['tempo'] > 100:
-            return "suitable for lifestyle content, brand messaging, or background scoring"
-        else:
-            return "perfect for emotional scenes, documentary moments, or atmospheric content"
-
-    def _get_mood_use_cases(self, features):
-        mood = features['mood'].lower()
-        if mood in ['happy', 'energetic']:
-            return "positive brand messaging, lifestyle content, and uplifting scenes"
-        elif mood in ['relaxed', 'calm']:
-            return "reflective moments, nature scenes, and peaceful transitions"
-        else:
-            return f"specific emotional contexts that require a {mood} atmosphere"
-
-    def _get_technical_readiness(self, features):
-        production_quality = features.get('production_quality', 0.8)
-        if production_quality > 0.85:
-            return "Track is broadcast-ready with professional production quality"
-        elif production_quality > 0.75:
-            return "Minor technical adjustments recommended before broadcast use"
-        else:
-            return "Some production refinement needed for professional applications"
-
-    def _get_market_positioning(self, features):
-        if features['tempo'] > 120 and features['energy'] > 0.7:
-            return "Strong potential in the dance/electronic and high-energy playlists"
-        elif features['tempo'] > 100:
-            return "Well-suited for mainstream pop and contemporary playlists"
-        else:
-            return "Ideal for mood-based and atmospheric playlists"
-
-    def _get_distribution_strategy(self, features):
-        engagement = features.get('engagement', 0.7)
-        if engagement > 0.8:
-            return "Priority for playlist pitching and active promotion"
-        elif engagement > 0.6:
-            return "Gradual rollout with focused genre-specific promotion"
-        else:
-            return "Consider niche market focus and targeted promotion"
-
-    def _get_improvement_priority(self, features):
-        production_quality = features.get('production_quality', 0.8)
-        if production_quality > 0.85:
-            return "Focus on marketing and promotion strategy"
-        elif production_quality > 0.75:
-            return "Minor mix refinements before full market push"
-        else:
-            return "Prioritize production improvements for market readiness"
-
-    def _describe_potential(self, features):
-        market_score = self._calculate_market_score(features)
-        if market_score > 8:
-            return "exceptional"
-        elif market_score > 6:
-            return "promising"
-        else:
-            return "developing"
-
-    def _generate_market_potential(self, features):
-        current_score = self._calculate_market_score(features)
-        potential_score = self._calculate_potential_score(features)
+        # Phrases that embed other values are filled in before the templates that use them
+        v["complexity_suggestion"] = v["complexity_suggestion_template"](v)
+        v["mood_fit"] = v["mood_fit_template"](v)
+        v["mood_use_cases"] = v["mood_use_cases_template"](v)
+        v["composer_foundation"] = v["composer_foundation_template"](v)
+        v["composer_production"] = v["composer_production_template"](v)
+        v["supervisor_production"] = v["supervisor_production_template"](v)
+        primary_adjustment = v["primary_adjustment_template"](v)
+        v["primary_adjustment_lower"] = primary_adjustment.lower()
 
         return {
-            "current": {
-                "score": current_score,
-                "description": self._describe_current_potential(current_score)
+            "metadata": {
+                "title": v["song_name"],
+                "composer": v["composer"],
+                "analysis_date": analysis_date,
+                "version": "1.0"
+            },
+            "welcome": t["welcome"](v),
+            "overview": t["overview"](v),
+            "key_insights": [
+                {
+                    "title": title(v),
+                    "meaning": meaning(v),
+                    "suggestion": suggestion(v)
+                }
+                for title, meaning, suggestion in t["insights"]
+            ],
+            "technical_analysis": {
+                "frequency_analysis": {
+                    "bass": {
+                        "presence": v["bass_presence"],
+                        "clarity": v["bass_clarity"],
+                        "suggestion": v["bass_suggestion"]
+                    },
+                    "mids": {
+                        "presence": v["mids_presence"],
+                        "clarity": v["mids_clarity"],
+                        "suggestion": v["mids_suggestion"]
+                    },
+                    "highs": {
+                        "presence": v["highs_presence"],
+                        "clarity": v["highs_clarity"],
+                        "noise_detected": v["high_freq_noise"],
+                        "suggestion": v["highs_suggestion"]
+                    },
+                    "overall_balance": v["overall_balance"]
+                },
+                "dynamics": {
+                    "dynamic_range": v["dynamic_range"],
+                    "peak_levels": v["peak_levels"],
+                    "average_loudness": v["average_loudness"],
+                    "suggestion": v["dynamics_suggestion"]
+                },
+                "stereo_field": {
+                    "width": v["stereo_width"],
+                    "balance": v["stereo_balance"],
+                    "phase_issues": v["phase_issues"],
+                    "suggestion": v["stereo_suggestion"]
+                },
+                "production_notes": list(v["production_notes"])
+            },
+            "target_audience": {
+                "composers": {
+                    "benefits": [fill(v) for fill in t["composer_benefits"]],
+                    "specific_insights": [fill(v) for fill in t["composer_insights"]],
+                    "summary": t["composer_summary"](v)
+                },
+                "supervisors": {
+                    "benefits": [fill(v) for fill in t["supervisor_benefits"]],
+                    "specific_insights": [fill(v) for fill in t["supervisor_insights"]],
+                    "summary": t["supervisor_summary"](v)
+                },
+                "labels": {
+                    "benefits": [fill(v) for fill in t["label_benefits"]],
+                    "specific_insights": [fill(v) for fill in t["label_insights"]],
+                    "summary": t["label_summary"](v)
+                }
+            },
+            "market_potential": {
+                "current": {
+                    "score": v["market_score"],
+                    "description": v["current_potential"]
+                },
+                "potential": {
+                    "score": v["potential_score"],
+                    "description": v["potential_template"](v)
+                }
             },
-            "potential": {
-                "score": potential_score,
-                "description": self._describe_potential_score(potential_score, features)
+            "next_steps": [
+                NEXT_STEPS_INTRO,
+                primary_adjustment,
+                v["secondary_adjustment"],
+                v["mixing_adjustment"],
+                NEXT_STEPS_OUTRO
+            ],
+            "improvement_suggestions": [dict(item) for item in v["improvement_suggestions"]],
+            "numerical_metrics": {
+                "tempo": v["tempo"],
+                "energy": v["energy"],
+                "vocal_clarity": v["vocal_clarity"],
+                "instrumental_complexity": v["complexity"],
+                "production_quality": v["production_quality"],
+                "engagement": v["engagement"]
             }
         }
-
-    def _describe_current_potential(self, score):
-        if score >= 8:
-            return "Ready for release with strong commercial potential"
-        elif score >= 6:
-            return "Solid track with good potential for indie release or sync licensing"
-        else:
-            return "Has unique elements that could work well in specific markets"
-
-    def _describe_potential_score(self, score, features):
-        suggestions = []
-        if features['tempo'] < 125 and features['energy'] > 0.6:
-            suggestions.append("speed it up to 128 BPM")
-        if features.get('vocal_clarity', 0.75) < 0.8:
-            suggestions.append("enhance vocal clarity")
-        if features.get('production_quality', 0.8) < 0.85:
-            suggestions.append("polish the mix")
-
-        if suggestions:
-            return f"Could reach {score:.1f}/10 by: {', '.join(suggestions)}"
-        return f"Already strong at {score:.1f}/10 - focus on marketing and promotion"
-
-    def _generate_next_steps(self, features):
-        steps = [
-            "Open your music software and try these improvements:",
-            self._get_primary_adjustment(features),
-            self._get_secondary_adjustment(features),
-            self._get_mixing_adjustment(features),
-            "Upload the updated version to see how the scores improve!"
-        ]
-        return steps
-
-    def _get_primary_adjustment(self, features):
-        if features['tempo'] < 125 and features['energy'] > 0.6:
-            return f"Adjust tempo to {self._get_optimal_tempo(features['tempo'])} BPM for better danceability"
-        elif features['energy'] < 0.6:
-            return "Add more dynamic contrast between sections"
-        else:
-            return "Fine-tune arrangement for maximum impact"
-
-    def _get_secondary_adjustment(self, features):
-        if features.get('vocal_clarity', 0.75) < 0.8:
-            return "Enhance vocal presence with careful EQ and compression"
-        elif features.get('instrumental_complexity', 0.65) < 0.7:
-            return "Add subtle layers to enrich the arrangement"
-        else:
-            return "Refine existing elements for better blend"
-
-    def _get_mixing_adjustment(self, features):
-        if features.get('spectral_centroid', 2000) > 3000:
-            return "Smooth out high frequencies above 10kHz"
-        elif features.get('spectral_centroid', 2000) < 2000:
-            return "Add gentle air and sparkle to the mix"
-        else:
-            return "Fine-tune overall frequency balance"
-
-    def _get_optimal_tempo(self, current_tempo):
-        if current_tempo < 100:
-            return "100-110"
-        elif current_tempo < 120:
-            return "120-125"
-        else:
-            return "128-130"
-
-    def _get_energy_level(self, energy):
-        if energy > 0.7: return "High"
-        elif energy > 0.4: return "Medium"
-        else: return "Low"
-
-    def _suggest_genres(self, tempo, energy):
-        genres = []
-        for genre, (min_bpm, max_bpm) in self.genre_bpm_ranges.items():
-            if min_bpm <= tempo <= max_bpm:
-                genres.append(genre)
-        if energy > 0.7:
-            genres.extend(['Dance', 'Electronic'])
-        elif energy < 0.3:
-            genres.extend(['Ambient', 'Chill'])
-        return genres
-
-    def _calculate_market_score(self, features):
-        score = 6.0  # Base score
-        if 115 <= features['tempo'] <= 130: score += 1
-        if 0.5 <= features['energy'] <= 0.8: score += 1
-        return min(score, 10.0)
-
-    def _calculate_potential_score(self, features):
-        return min(self._calculate_market_score(features) + 2.5, 10.0)
-
-    def _generate_technical_analysis(self, features):
-        return {
-            "frequency_analysis": self._analyze_frequency_spectrum(features),
-            "dynamics": self._analyze_dynamics(features),
-            "stereo_field": self._analyze_stereo_field(features),
-            "production_notes": self._generate_production_notes(features)
-        }
-
-    def _analyze_frequency_spectrum(self, features):
-        spectral_centroid = features.get('spectral_centroid', 2000)
-        spectral_rolloff = features.get('spectral_rolloff', 8000)
-
-        return {
-            "bass": self._analyze_bass_response(features),
-            "mids": self._analyze_mids_response(features),
-            "highs": self._analyze_highs_response(features),
-            "overall_balance": "Well-balanced across the frequency spectrum" if 1800 < spectral_centroid < 2500 else
-                             "Slightly bright-leaning" if spectral_centroid > 2500 else "Warm-leaning"
-        }
-
-    def _analyze_bass_response(self, features):
-        return {
-            "presence": features.get('bass_presence', 0.7),
-            "clarity": features.get('bass_clarity', 0.65),
-            "suggestion": "Consider adding subtle bass enhancement around 60-100Hz for more warmth" if features.get('bass_presence', 0.7) < 0.7 else
-                        "Bass levels are well-balanced"
-        }
-
-    def _analyze_mids_response(self, features):
-        return {
-            "presence": features.get('mids_presence', 0.75),
-            "clarity": features.get('mids_clarity', 0.7),
-            "suggestion": "Try a gentle boost around 2-4kHz to enhance vocal presence" if features.get('mids_presence', 0.75) < 0.75 else
-                        "Mid frequencies are well-represented"
-        }
-
-    def _analyze_highs_response(self, features):
-        return {
-            "presence": features.get('highs_presence', 0.8),
-            "clarity": features.get('highs_clarity', 0.75),
-            "noise_detected": features.get('high_freq_noise', False),
-            "suggestion": "Use a de-esser or gentle high-shelf EQ cut above 10kHz" if features.get('high_freq_noise', False) else
-                        "High frequencies are clean and clear"
-        }
-
-    def _analyze_dynamics(self, features):
-        return {
-            "dynamic_range": features.get('dynamic_range', 0.7),
-            "peak_levels": features.get('peak_levels', -1.5),
-            "average_loudness": features.get('average_loudness', -14),
-            "suggestion": self._get_dynamics_suggestion(features)
-        }
-
-    def _get_dynamics_suggestion(self, features):
-        if features.get('dynamic_range', 0.7) < 0.6:
-            return "Consider adding more dynamic contrast between sections to enhance emotional impact"
-        elif features.get('peak_levels', -1.5) > -1:
-            return "Reduce peak levels slightly to prevent potential clipping"
-        else:
-            return "Dynamic range is appropriate for the style"
-
-    def _analyze_stereo_field(self, features):
-        return {
-            "width": features.get('stereo_width', 0.7),
-            "balance": features.get('stereo_balance', 0.5),
-            "phase_issues": features.get('phase_issues', False),
-            "suggestion": self._get_stereo_suggestion(features)
-        }
-
-    def _get_stereo_suggestion(self, features):
-        if features.get('stereo_width', 0.7) < 0.6:
-            return "Consider widening the stereo field for more immersive sound"
-        elif features.get('phase_issues', False):
-            return "Check for phase cancellation issues in the low frequencies"
-        else:
-            return "Stereo field is well-balanced"
-
-    def _generate_production_notes(self, features):
-        notes = []
-
-        if features.get('high_freq_noise', False):
-            notes.append("High-frequency noise detected - consider noise reduction")
-
-        if features.get('phase_issues', False):
-            notes.append("Phase correlation issues found - check mono compatibility")
-
-        if features.get('clipping_detected', False):
-            notes.append("Digital clipping detected - reduce levels or apply limiting")
-
-        if not notes:
-            notes.append("Overall production quality is good, with no major technical issues detected")
-
-        return notes
-
-    def _generate_improvement_suggestions(self, features):
-        suggestions = []
-
-        # Frequency balance suggestions
-        if features.get('spectral_centroid', 2000) > 2500:
-            suggestions.append({
-                "category": "Frequency Balance",
-                "issue": "Bright-leaning mix",
-                "solution": "Use a gentle high-shelf EQ cut above 10kHz to reduce brightness",
-                "benefit": "This will create a smoother, more professional sound"
-            })
-
-        # Dynamic range suggestions
-        if features.get('dynamic_range', 0.7) < 0.6:
-            suggestions.append({
-                "category": "Dynamics",
-                "issue": "Limited dynamic range",
-                "solution": "Add quiet sections and build-ups between high-energy parts",
-                "benefit": "This will create more emotional impact and keep listeners engaged"
-            })
-
-        # Stereo field suggestions
-        if features.get('stereo_width', 0.7) < 0.6:
-            suggestions.append({
-                "category": "Stereo Image",
-                "issue": "Narrow stereo field",
-                "solution": "Use stereo widening techniques on specific elements (not bass)",
-                "benefit": "This will create a more immersive listening experience"
-            })
-
-        return suggestions
\ No newline at end of file
@@ -0,0 +1,75 @@
+import os
+import re
+import json
+import tempfile
+from typing import Dict, Any, Iterator, Optional
+
+class ReportStore:
+    """Finished analyses stored as JSON files, one per result id.
+
+    A result never changes once written, so readers can cache it forever and
+    use the file's modification time as Last-Modified.
+    """
+
+    def __init__(self, store_dir: str):
+        self.store_dir = store_dir
+        os.makedirs(store_dir, exist_ok=True)
+
+    def _path(self, result_id: str) -> Optional[str]:
+        # Ids come straight from URLs, so only accept the hex ids the job queue hands out
+        if not re.fullmatch(r'[0-9a-f]{32}', result_id):
+            return None
+        return os.path.join(self.store_dir, result_id[:2], f"{result_id}.json")
+
+    def save(self, result_id: str, record: Dict[str, Any]):
+        path = self._path(result_id)
+        if path is None:
+            raise ValueError(f"Invalid result id: {result_id}")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write atomically so a reader never sees a partial result
+        data = json.dumps(record).encode('utf-8')
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def load(self, result_id: str) -> Optional[Dict[str, Any]]:
+        # Raw JSON bytes, served as-is by the JSON endpoint
+        path = self._path(result_id)
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            modified = os.path.getmtime(path)
+        except OSError:
+            return None
+        return {
+            "data": data,
+            "last_modified": modified
+        }
+
+    def ids(self) -> Iterator[str]:
+        # Every stored result id, from the file names alone
+        for _, _, files in os.walk(self.store_dir):
+            for name in files:
+                if name.endswith('.json') and self._path(name[:-len('.json')]) is not None:
+                    yield name[:-len('.json')]
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        # Every stored result, parsed; unreadable files are skipped
+        for root, _, files in os.walk(self.store_dir):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                try:
+                    with open(os.path.join(root, name), 'r', encoding='utf-8') as f:
+                        yield json.load(f)
+                except (OSError, ValueError):
+                    continue
@@ -0,0 +1,226 @@
+import os
+import threading
+import numpy as np
+from typing import Dict, Any, List, Optional, Sequence
+
+KEYS = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+
+# Embedding layout: four scaled scalar features, then the 12-bin chroma profile.
+# Scalars are centred and scaled by fixed, typical values rather than by catalog
+# statistics, so an embedding never changes once written and the index can grow
+# one track at a time. A tempo octave weighs about as much as a change of key.
+EMBEDDING_SCALARS = {
+    "energy": (0.25, 0.15),
+    "spectral_centroid": (2500.0, 1500.0),
+    "spectral_rolloff": (5000.0, 3000.0)
+}
+EMBEDDING_DIM = 1 + len(EMBEDDING_SCALARS) + len(KEYS)
+
+def embed(features: Dict[str, Any]) -> np.ndarray:
+    """Fixed-length float32 embedding of a feature dict; nearer is more similar."""
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    vector[0] = np.log2(max(float(features.get("tempo") or 0.0), 30.0) / 120.0)
+    for i, (name, (centre, scale)) in enumerate(EMBEDDING_SCALARS.items(), start=1):
+        # Only a missing value takes the centre; a real 0.0 (e.g. a silent track's energy) is kept
+        value = features.get(name)
+        value = centre if value is None else float(value)
+        vector[i] = (value - centre) / scale
+
+    # Results stored before chroma profiles were kept fall back to their key
+    chroma = np.asarray(features.get("chroma_profile") or [0.0] * len(KEYS), dtype=np.float32)
+    if not chroma.any() and features.get("key") in KEYS:
+        chroma[KEYS.index(features["key"])] = 1.0
+    norm = np.linalg.norm(chroma)
+    vector[1 + len(EMBEDDING_SCALARS):] = chroma / norm if norm > 0 else chroma
+    return vector
+
+class SimilarityIndex:
+    """Approximate nearest-neighbour search over track embeddings.
+
+    An inverted-file (IVF) index: k-means centroids split the embeddings into
+    about sqrt(n) lists, and a query only scores the lists whose centroids are
+    nearest to it (`n_probe` of them). Tracks are added one at a time; the
+    centroids are retrained whenever the index has grown fourfold, so lists
+    stay balanced. Small indexes are searched exhaustively.
+
+    Entries are keyed by the audio's content hash, so a later result for the
+    same audio replaces the earlier one instead of showing up next to it.
+
+    With `index_dir`, every embedding is appended to disk as it is added and
+    the index is rebuilt from there on start.
+    """
+
+    def __init__(self, index_dir: Optional[str] = None, n_probe: int = 8, min_train: int = 4096):
+        self.index_dir = index_dir
+        self.n_probe = n_probe
+        self.min_train = min_train  # Below this many tracks, search everything
+        self.lock = threading.Lock()
+        self.ids = []  # Track id of each row
+        self.keys = []  # Content hash (or, without one, track id) of each row
+        self.rows = {}  # Key -> row in vectors
+        self.id_rows = {}  # Track id -> row, for the ids still in the index
+        self.seen = set()  # Every track id ever added, including replaced ones
+        self.vectors = np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+        self.centroids = None
+        self.lists = []  # Rows assigned to each centroid
+        self._list_arrays = {}  # Lists converted to arrays for search, dropped when a list grows
+        self.trained_size = 0
+        if index_dir:
+            os.makedirs(index_dir, exist_ok=True)
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, track_id: str) -> bool:
+        # Also true for ids replaced by a later result for the same audio
+        return track_id in self.seen
+
+    def vector(self, track_id: str) -> Optional[np.ndarray]:
+        row = self.id_rows.get(track_id)
+        return None if row is None else self.vectors[row]
+
+    def key(self, track_id: str) -> Optional[str]:
+        row = self.id_rows.get(track_id)
+        return None if row is None else self.keys[row]
+
+    def add(self, track_id: str, features: Dict[str, Any], content_hash: Optional[str] = None):
+        self.add_vectors([track_id], embed(features)[np.newaxis, :], keys=[content_hash])
+
+    def add_vectors(self, track_ids: Sequence[str], vectors: np.ndarray, persist: bool = True,
+                    keys: Optional[Sequence[Optional[str]]] = None):
+        # keys are content hashes; tracks without one are keyed by their id
+        keys = [key or track_id for track_id, key in zip(track_ids, keys or [None] * len(track_ids))]
+        with self.lock:
+            # Stored results never change, so a track id is only indexed once
+            fresh = [i for i, track_id in enumerate(track_ids) if track_id not in self.seen]
+            if not fresh:
+                return
+            vectors = np.ascontiguousarray(vectors[fresh], dtype=np.float32)
+            if persist and self.index_dir:
+                self._append([track_ids[i] for i in fresh], [keys[i] for i in fresh], vectors)
+
+            start = len(self.ids)
+            self._reserve(start + len(fresh))
+            for i, vector in zip(fresh, vectors):
+                track_id, key = track_ids[i], keys[i]
+                self.seen.add(track_id)
+                row = self.rows.get(key)
+                if row is None:
+                    row = self.rows[key] = len(self.ids)
+                    self.ids.append(track_id)
+                    self.keys.append(key)
+                else:
+                    # Same audio as an indexed track: the newer result takes over its row.
+                    # The vector barely moves, so the row stays in its list
+                    del self.id_rows[self.ids[row]]
+                    self.ids[row] = track_id
+                self.id_rows[track_id] = row
+                self.vectors[row] = vector
+            if len(self.ids) == start:
+                return
+
+            if len(self.ids) >= max(self.min_train, 4 * self.trained_size):
+                self._train()
+            elif self.centroids is not None:
+                self._assign(np.arange(start, len(self.ids)))
+
+    def search(self, query, k: int = 10, exclude: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Nearest tracks to a feature dict or embedding: [{"id", "distance"}], nearest first.
+
+        `exclude` is the key (content hash, or track id) of an entry to leave out.
+        """
+        if isinstance(query, dict):
+            query = embed(query)
+        query = np.asarray(query, dtype=np.float32)
+        with self.lock:
+            n = len(self.ids)
+            if self.centroids is None:
+                candidates = np.arange(n)
+            else:
+                nearest_lists = np.argsort(np.sum((self.centroids - query) ** 2, axis=1))[:self.n_probe]
+                candidates = np.concatenate([self._list_array(i) for i in nearest_lists])
+            distances = np.sum((self.vectors[candidates] - query) ** 2, axis=1)
+
+            # Partial sort: only the best k + 1 (one may be the query itself) are ordered
+            keep = min(k + 1, len(candidates))
+            best = np.argpartition(distances, keep - 1)[:keep] if keep else np.zeros(0, dtype=int)
+            best = best[np.argsort(distances[best])]
+            matches = [{"id": self.ids[candidates[i]], "distance": float(np.sqrt(distances[i]))}
+                       for i in best if self.keys[candidates[i]] != exclude]
+        return matches[:k]
+
+    def _reserve(self, size: int):
+        # Grow geometrically so adding one track at a time stays cheap
+        if size > len(self.vectors):
+            grown = np.zeros((max(size, 2 * len(self.vectors), 1024), EMBEDDING_DIM), dtype=np.float32)
+            grown[:len(self.ids)] = self.vectors[:len(self.ids)]
+            self.vectors = grown
+
+    def _train(self, iterations: int = 10, sample_per_list: int = 64):
+        # k-means on a sample of the embeddings, then every row goes to its nearest centroid
+        n = len(self.ids)
+        n_lists = max(int(np.sqrt(n)), 1)
+        rng = np.random.default_rng(0)
+        sample = self.vectors[rng.choice(n, size=min(n, n_lists * sample_per_list), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            labels = _nearest(sample, centroids)
+            counts = np.bincount(labels, minlength=n_lists)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, np.newaxis]
+
+        self.centroids = centroids
+        self.lists = [[] for _ in range(n_lists)]
+        self._list_arrays = {}
+        self.trained_size = n
+        self._assign(np.arange(n))
+
+    def _assign(self, rows: np.ndarray):
+        labels = _nearest(self.vectors[rows], self.centroids)
+        # Group the rows by list with one sort instead of appending them one by one
+        order = np.argsort(labels, kind='stable')
+        counts = np.bincount(labels, minlength=len(self.lists))
+        ends = np.cumsum(counts)
+        for label in np.flatnonzero(counts):
+            self.lists[label].extend(rows[order[ends[label] - counts[label]:ends[label]]].tolist())
+            self._list_arrays.pop(int(label), None)
+
+    def _list_array(self, i: int) -> np.ndarray:
+        array = self._list_arrays.get(i)
+        if array is None:
+            array = self._list_arrays[i] = np.array(self.lists[i], dtype=np.int64)
+        return array
+
+    def _append(self, ids: List[str], keys: List[str], vectors: np.ndarray):
+        # Vectors first: on restart, ids without a complete vector behind them are dropped.
+        # Lines are "id key"; indexes written before keys were kept have just the id
+        with open(os.path.join(self.index_dir, 'vectors.f32'), 'ab') as f:
+            f.write(vectors.tobytes())
+        with open(os.path.join(self.index_dir, 'ids.txt'), 'a', encoding='utf-8') as f:
+            f.write(''.join(f"{track_id} {key}\n" for track_id, key in zip(ids, keys)))
+
+    def _load(self):
+        ids_path = os.path.join(self.index_dir, 'ids.txt')
+        vectors_path = os.path.join(self.index_dir, 'vectors.f32')
+        if not os.path.exists(ids_path) or not os.path.exists(vectors_path):
+            return
+        with open(ids_path, 'r', encoding='utf-8') as f:
+            lines = [line.rstrip('\n').partition(' ') for line in f if line.endswith('\n')]
+        vectors = np.fromfile(vectors_path, dtype=np.float32)
+        n = min(len(lines), len(vectors) // EMBEDDING_DIM)
+        # Replayed in order, so later results for the same audio replace earlier ones again
+        self.add_vectors([track_id for track_id, _, _ in lines[:n]],
+                         vectors[:n * EMBEDDING_DIM].reshape(n, EMBEDDING_DIM), persist=False,
+                         keys=[key for _, _, key in lines[:n]])
+
+def _nearest(vectors: np.ndarray, centroids: np.ndarray, chunk: int = 65536) -> np.ndarray:
+    # Index of the nearest centroid for every row, in chunks to bound memory
+    centroid_norms = np.sum(centroids ** 2, axis=1)
+    labels = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk):
+        block = vectors[start:start + chunk]
+        labels[start:start + chunk] = np.argmin(centroid_norms - 2.0 * block @ centroids.T, axis=1)
+    return labels
@@ -0,0 +1,93 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Any, Callable, List, Optional, Sequence
+from modules import metrics
+
+class StageGraph:
+    """Analysis stages declared with their inputs, each run as soon as its inputs are ready.
+
+    A stage is a function of the values its inputs name: values passed to
+    run(), or results of the stages added before it. With more than one
+    thread, stages that do not depend on each other run at the same time
+    (numpy's FFTs, scipy's filters and soxr release the GIL for most of their
+    work). Every value is dropped once all the stages reading it have run, so
+    a shared buffer like the decoded audio is held no longer than it is
+    needed. With one thread, stages run one by one in the order they were added.
+    """
+
+    def __init__(self):
+        self.stages = {}  # Name -> (function, input names, span or None)
+
+    def add(self, name: str, func: Callable, inputs: Sequence[str] = (), span: Optional[str] = None) -> 'StageGraph':
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        self.stages[name] = (func, tuple(inputs), span)
+        return self
+
+    def run(self, values: Dict[str, Any], outputs: Sequence[str], threads: int = 1) -> Dict[str, Any]:
+        # `values` is consumed: the caller's dict loses each value once it is read,
+        # so its reference does not keep the value alive either
+        # Inputs must be given values or stages added earlier, which also rules out cycles
+        available = set(values)
+        for name, (_, inputs, _) in self.stages.items():
+            missing = [source for source in inputs if source not in available]
+            if missing:
+                raise ValueError(f"Stage {name} reads {', '.join(missing)}, which no earlier stage produces")
+            available.add(name)
+
+        # Readers left per value; outputs count as one more so they are kept
+        readers = {}
+        for _, inputs, _ in self.stages.values():
+            for source in inputs:
+                readers[source] = readers.get(source, 0) + 1
+        for name in outputs:
+            readers[name] = readers.get(name, 0) + 1
+
+        # Spans from the pool's threads go wherever the caller is recording them
+        recorder = metrics.active_recording()
+
+        def finished(name: str, result: Any):
+            values[name] = result
+            for source in self.stages[name][1]:
+                readers[source] -= 1
+                if readers[source] == 0:
+                    del values[source]
+            if not readers.get(name):
+                del values[name]
+
+        if threads <= 1:
+            for name in self.stages:
+                finished(name, self._call(name, self._args(name, values), recorder))
+        else:
+            self._run_parallel(values, finished, recorder, threads)
+        return {name: values[name] for name in outputs}
+
+    def _run_parallel(self, values: Dict[str, Any], finished: Callable, recorder: Optional[List], threads: int):
+        waiting = list(self.stages)
+        running = {}
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='stage') as executor:
+            try:
+                while waiting or running:
+                    # Start every stage whose inputs are all there, in the order added
+                    for name in [name for name in waiting
+                                 if all(source in values for source in self.stages[name][1])]:
+                        waiting.remove(name)
+                        running[executor.submit(self._call, name, self._args(name, values), recorder)] = name
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        # A failed stage fails the graph; stages not started yet never are
+                        finished(running.pop(future), future.result())
+            except BaseException:
+                for future in running:
+                    future.cancel()
+                raise
+
+    def _args(self, name: str, values: Dict[str, Any]) -> List[Any]:
+        return [values[source] for source in self.stages[name][1]]
+
+    def _call(self, name: str, args: List[Any], recorder: Optional[List]) -> Any:
+        func, _, span = self.stages[name]
+        with metrics.recording_into(recorder):
+            if span is None:
+                return func(*args)
+            with metrics.span(span):
+                return func(*args)
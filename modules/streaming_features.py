@@ -0,0 +1,166 @@
+import librosa
+import numpy as np
+import scipy.signal
+from typing import Dict, Any
+
+class StreamingFeatureAccumulator:
+    """Accumulates frame-level features from audio that arrives in blocks.
+
+    Only running sums, a short sample tail and the onset envelope (one float
+    per frame) are kept, so memory stays flat however long the track is.
+    With keep_frames, the per-frame features are kept too (16 floats per frame).
+    """
+
+    def __init__(self, sr: int, n_fft: int = 2048, hop_length: int = 512,
+                 tuning_frames: int = 1024, brightness_bins: int = None, keep_frames: bool = False):
+        self.sr = sr
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.tuning_frames = tuning_frames  # Frames used to estimate tuning before chroma starts
+
+        # Same window, frequencies and filter banks librosa uses for a 2048/512 STFT
+        self.window = scipy.signal.get_window('hann', n_fft, fftbins=True)[:, np.newaxis]
+        self.freqs = librosa.fft_frequencies(sr=sr, n_fft=n_fft)[:, np.newaxis]
+        self.brightness_bins = brightness_bins or len(self.freqs)  # Bins that centroid and rolloff see
+        self.mel_basis = librosa.filters.mel(sr=sr, n_fft=n_fft)
+        self.chroma_basis = None
+
+        # Start with half a window of silence, like librosa's centered STFT
+        self.tail = np.zeros(n_fft // 2, dtype=np.float32)
+        self.pending_power = []
+
+        self.n_frames = 0
+        self.peak = 0.0
+        self.rms_sum = 0.0
+        self.centroid_sum = 0.0
+        self.rolloff_sum = 0.0
+        self.chroma_sum = np.zeros(12)
+        self.chroma_frames = 0
+        self.onset_envelope = [0.0]
+        self.previous_mel_db = None
+        self.mel_db_max = -np.inf
+        self.kept = {"rms": [], "spectral_centroid": [], "spectral_rolloff": [], "chroma": []} if keep_frames else None
+
+    def update(self, y_block: np.ndarray):
+        if y_block.size:
+            self.peak = max(self.peak, float(np.max(np.abs(y_block))))
+        buffer = np.concatenate([self.tail, y_block.astype(np.float32, copy=False)])
+        if len(buffer) < self.n_fft:
+            self.tail = buffer
+            return
+
+        frames = librosa.util.frame(buffer, frame_length=self.n_fft, hop_length=self.hop_length)
+        self.tail = buffer[frames.shape[1] * self.hop_length:]
+        self._accumulate(frames)
+
+    def _accumulate(self, frames: np.ndarray):
+        magnitude = np.abs(np.fft.rfft(frames * self.window, axis=0))
+        power = magnitude ** 2
+        self.n_frames += frames.shape[1]
+
+        # RMS, centroid and rolloff per frame, reduced to running sums
+        rms = np.sqrt(np.mean(frames ** 2, axis=0))
+        self.rms_sum += float(np.sum(rms))
+        band = magnitude[:self.brightness_bins]
+        weighted = self.freqs[:self.brightness_bins] * librosa.util.normalize(band, norm=1, axis=0)
+        self.centroid_sum += float(np.sum(weighted))
+        cumulative = np.cumsum(band, axis=0)
+        rolloff_bins = np.argmax(cumulative >= 0.85 * cumulative[-1], axis=0)
+        rolloff = self.freqs[rolloff_bins, 0]
+        self.rolloff_sum += float(np.sum(rolloff))
+        if self.kept is not None:
+            self.kept["rms"].append(rms)
+            self.kept["spectral_centroid"].append(np.sum(weighted, axis=0))
+            self.kept["spectral_rolloff"].append(rolloff)
+
+        # Chroma waits for enough frames to estimate the tuning once
+        if self.chroma_basis is None:
+            self.pending_power.append(power)
+            if sum(p.shape[1] for p in self.pending_power) >= self.tuning_frames:
+                self._flush_pending_chroma()
+        else:
+            self._accumulate_chroma(power)
+
+        # Log-mel onset strength; the dB floor follows the loudest frame seen so far
+        mel_db = librosa.power_to_db(self.mel_basis @ power, top_db=None)
+        self.mel_db_max = max(self.mel_db_max, float(np.max(mel_db)))
+        mel_db = np.maximum(mel_db, self.mel_db_max - 80.0)
+        if self.previous_mel_db is not None:
+            mel_db_lagged = np.concatenate([self.previous_mel_db, mel_db[:, :-1]], axis=1)
+        else:
+            mel_db_lagged = mel_db[:, :-1]
+            mel_db = mel_db[:, 1:]
+        self.previous_mel_db = mel_db[:, -1:]
+        if mel_db.shape[1]:
+            self.onset_envelope.extend(np.median(np.maximum(0.0, mel_db - mel_db_lagged), axis=0))
+
+    def _flush_pending_chroma(self):
+        power = np.concatenate(self.pending_power, axis=1)
+        self.pending_power = []
+        tuning = librosa.estimate_tuning(S=power, sr=self.sr, bins_per_octave=12)
+        self.chroma_basis = librosa.filters.chroma(sr=self.sr, n_fft=self.n_fft, tuning=tuning)
+        self._accumulate_chroma(power)
+
+    def _accumulate_chroma(self, power: np.ndarray):
+        chroma = librosa.util.normalize(self.chroma_basis @ power, norm=np.inf, axis=0)
+        self.chroma_sum += np.sum(chroma, axis=1)
+        self.chroma_frames += chroma.shape[1]
+        if self.kept is not None:
+            self.kept["chroma"].append(chroma)
+
+    def finalize(self) -> Dict[str, Any]:
+        # Close the stream with half a window of silence, like librosa's centered STFT
+        self.update(np.zeros(self._closing_samples(), dtype=np.float32))
+        if self.pending_power:
+            self._flush_pending_chroma()
+        if self.n_frames == 0:
+            raise ValueError("Audio stream is too short to analyze")
+
+        tempo = self._estimate_tempo(np.asarray(self.onset_envelope))
+
+        # The standard path peak-normalizes before analysis; RMS is the only feature that scales with gain
+        gain = 1.0 / self.peak if self.peak > 0 else 1.0
+
+        summary = {
+            "tempo": tempo,
+            "energy": self.rms_sum / self.n_frames * gain,
+            "spectral_centroid": self.centroid_sum / self.n_frames,
+            "spectral_rolloff": self.rolloff_sum / self.n_frames,
+            "chroma_mean": self.chroma_sum / max(self.chroma_frames, 1)
+        }
+        if self.kept is not None:
+            summary["frames"] = {
+                "rms": np.concatenate(self.kept["rms"]) * gain,
+                "spectral_centroid": np.concatenate(self.kept["spectral_centroid"]),
+                "spectral_rolloff": np.concatenate(self.kept["spectral_rolloff"]),
+                "onset_strength": np.asarray(self.onset_envelope),
+                "chroma": np.concatenate(self.kept["chroma"], axis=1)
+            }
+        return summary
+
+    def _estimate_tempo(self, onset_envelope: np.ndarray, chunk_frames: int = 4096) -> float:
+        # beat_track's tempo estimate, with the mean tempogram built chunk by chunk
+        # instead of materializing a window-by-frames matrix for the whole track
+        if not onset_envelope.any():
+            return 0.0
+        win_length = librosa.time_to_frames(8.0, sr=self.sr, hop_length=self.hop_length).item()
+        window = scipy.signal.get_window('hann', win_length, fftbins=True)[:, np.newaxis]
+        padded = np.pad(onset_envelope, int(win_length // 2), mode='linear_ramp', end_values=[0, 0])
+
+        n = len(onset_envelope)
+        tempogram_sum = np.zeros(win_length)
+        for start in range(0, n, chunk_frames):
+            stop = min(n, start + chunk_frames)
+            frames = librosa.util.frame(padded[start:stop + win_length - 1], frame_length=win_length, hop_length=1)
+            autocorrelation = librosa.autocorrelate(frames * window, axis=0)
+            tempogram_sum += np.sum(librosa.util.normalize(autocorrelation, norm=np.inf, axis=0), axis=1)
+
+        tempo = librosa.feature.tempo(tg=(tempogram_sum / n)[:, np.newaxis], sr=self.sr, hop_length=self.hop_length)
+        return float(tempo[0])
+
+    def _closing_samples(self) -> int:
+        # Pad so the last centered frame starts at the final sample, as librosa's frame count does
+        n_samples = self.n_frames * self.hop_length + len(self.tail) - self.n_fft // 2
+        total_frames = 1 + n_samples // self.hop_length
+        needed = (total_frames - self.n_frames - 1) * self.hop_length + self.n_fft - len(self.tail)
+        return max(needed, 0)
@@ -1,15 +1,29 @@
 import librosa
 import numpy as np
 import soundfile as sf
+import soxr
+import os
+from modules.audio_decoder import AudioDecoder
 
 class VocalSeparator:
     def __init__(self):
         self.sample_rate = 44100
+        self.n_fft = 2048
+        self.hop_length = 512
+        self.n_mels = 128
+        self.chunk_seconds = 30.0    # Audio separated per chunk in chunked mode
+        self.overlap_seconds = 1.0   # Crossfade between neighbouring chunks
+        self.nn_backend = 'windowed'  # 'windowed' (linear time) or 'exact' (librosa, quadratic)
+        self.nn_window_seconds = 30.0  # Neighbours are searched within this distance of each frame
+        self.nn_memory_budget = 64 * 1024 * 1024  # Bytes of scratch memory per block of frames
+        self.decoder = AudioDecoder()
+        self._mel_basis = None
+        self._mel_inverse = None
 
     def separate(self, audio_path):
         try:
             # Load the audio file
-            y, sr = librosa.load(audio_path, sr=self.sample_rate)
+            y, sr = self.decoder.load(audio_path, self.sample_rate)
 
             # Compute the spectrogram
             S_full, phase = librosa.magphase(librosa.stft(y))
@@ -18,9 +32,7 @@ class VocalSeparator:
             S_mel = librosa.feature.melspectrogram(S=S_full, sr=sr)
 
             # Find the most prominent frequencies (likely to be vocals)
-            S_filter = librosa.decompose.nn_filter(S_mel,
-                                                 aggregate=np.median,
-                                                 metric='cosine')
+            S_filter = self._nn_filter(S_mel)
 
             # Compute a mask based on the filtered spectrogram
             mask_mel = librosa.util.softmask(S_mel, S_filter)
@@ -37,8 +49,7 @@ class VocalSeparator:
             y_inst = librosa.istft(S_inst * phase)
 
             # Save the separated tracks
-            vocal_path = audio_path.replace('.mp3', '_vocals.wav').replace('.wav', '_vocals.wav')
-            inst_path = audio_path.replace('.mp3', '_inst.wav').replace('.wav', '_inst.wav')
+            vocal_path, inst_path = self._stem_paths(audio_path)
 
             sf.write(vocal_path, y_vocal, sr)
             sf.write(inst_path, y_inst, sr)
@@ -46,4 +57,167 @@ class VocalSeparator:
             return vocal_path, inst_path
         except Exception as e:
             print(f"Error separating vocals: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    def separate_chunked(self, audio_path):
+        try:
+            chunk = int(self.chunk_seconds * self.sample_rate)
+            overlap = int(self.overlap_seconds * self.sample_rate)
+            fade_in = np.linspace(0.0, 1.0, overlap, endpoint=False, dtype=np.float32)
+
+            vocal_path, inst_path = self._stem_paths(audio_path)
+            with sf.SoundFile(vocal_path, 'w', self.sample_rate, 1) as vocal_out, \
+                    sf.SoundFile(inst_path, 'w', self.sample_rate, 1) as inst_out:
+                buffer = np.zeros(0, dtype=np.float32)
+                previous_tail = None
+
+                # Each chunk covers chunk + overlap samples; the overlap is crossfaded with the next one
+                for block in self._stream_mono(audio_path):
+                    buffer = np.concatenate([buffer, block])
+                    while len(buffer) >= chunk + overlap:
+                        previous_tail = self._write_chunk(buffer[:chunk + overlap], previous_tail,
+                                                          fade_in, chunk, vocal_out, inst_out)
+                        buffer = buffer[chunk:]
+
+                # Whatever is left is the final chunk, written out in full
+                if len(buffer) > (overlap if previous_tail is not None else 0):
+                    self._write_chunk(buffer, previous_tail, fade_in, None, vocal_out, inst_out)
+                elif previous_tail is not None:
+                    vocal_out.write(previous_tail[0])
+                    inst_out.write(previous_tail[1])
+
+            return vocal_path, inst_path
+        except Exception as e:
+            print(f"Error separating vocals: {str(e)}")
+            raise
+
+    def _write_chunk(self, y, previous_tail, fade_in, chunk, vocal_out, inst_out):
+        y_vocal, y_inst = self._separate_array(y)
+        overlap = len(fade_in)
+
+        # Crossfade the head of this chunk with the tail of the previous one
+        if previous_tail is not None:
+            y_vocal[:overlap] = y_vocal[:overlap] * fade_in + previous_tail[0] * (1.0 - fade_in)
+            y_inst[:overlap] = y_inst[:overlap] * fade_in + previous_tail[1] * (1.0 - fade_in)
+
+        if chunk is None:
+            vocal_out.write(y_vocal)
+            inst_out.write(y_inst)
+            return None
+
+        vocal_out.write(y_vocal[:chunk])
+        inst_out.write(y_inst[:chunk])
+        return y_vocal[chunk:], y_inst[chunk:]
+
+    def _separate_array(self, y):
+        # Same magnitude mel mask as separate(), on one chunk. It is mapped back to linear
+        # bins with the precomputed weighted average rather than mel_to_stft's NNLS, which
+        # can leave the mask above 1 (and the instrumental stem with negative gain)
+        stft = librosa.stft(y, n_fft=self.n_fft, hop_length=self.hop_length)
+        S_full, phase = librosa.magphase(stft)
+        mel_basis, mel_inverse = self._mel_matrices()
+
+        S_mel = mel_basis @ S_full
+        S_filter = self._nn_filter(S_mel)
+        mask_mel = librosa.util.softmask(S_mel, S_filter)
+        mask = mel_inverse @ mask_mel
+
+        y_vocal = librosa.istft(S_full * mask * phase, hop_length=self.hop_length, length=len(y))
+        y_inst = librosa.istft(S_full * (1 - mask) * phase, hop_length=self.hop_length, length=len(y))
+        return y_vocal.astype(np.float32), y_inst.astype(np.float32)
+
+    def _nn_filter(self, S):
+        if self.nn_backend == 'exact':
+            # Distance mode keeps each frame's k nearest frames (connectivity mode keeps
+            # k of the k + 2 nearest by position), so both backends pick the same neighbours
+            return librosa.decompose.nn_filter(S, aggregate=np.median, metric='cosine', mode='distance')
+        return self._nn_filter_windowed(S)
+
+    def _nn_filter_windowed(self, S):
+        # Median of each frame's k most cosine-similar frames, like nn_filter, but
+        # neighbours are only searched within a window so cost grows linearly.
+        # Equally similar frames are taken earliest first. Silent frames have no
+        # direction to compare: they are never a neighbour and stay silent
+        n_features, t = S.shape
+        window = min(int(self.nn_window_seconds * self.sample_rate / self.hop_length), t - 1)
+        if window < 1:
+            return S.copy()
+        # Same k librosa's recurrence_matrix picks
+        k = min(int(2 * np.ceil(np.sqrt(min(t - 1, 2 * window)))), 2 * window, t - 1)
+
+        # Size blocks so the similarity scratch arrays and gathered neighbours fit in the memory budget
+        bytes_per_frame = 32 * (4 * window + 1) + 2 * S.itemsize * n_features * k
+        block = int(max(1, min(t, 2 * window + 1, self.nn_memory_budget // bytes_per_frame)))
+
+        norms = np.linalg.norm(S, axis=0)
+        silent = norms == 0
+        unit = S / np.where(silent, 1.0, norms)
+        S_filter = np.empty_like(S)
+
+        for start in range(0, t, block):
+            stop = min(t, start + block)
+            lo, hi = max(0, start - window), min(t, stop + window)
+            similarity = unit[:, start:stop].T @ unit[:, lo:hi]
+
+            # Only frames within the window count, and never the frame itself or a silent one
+            offsets = np.arange(lo, hi)[np.newaxis, :] - np.arange(start, stop)[:, np.newaxis]
+            similarity[(np.abs(offsets) > window) | (offsets == 0) | silent[lo:hi]] = -np.inf
+
+            neighbours, complete = _nearest(similarity, k)
+            S_filter[:, start:stop] = np.median(S[:, neighbours + lo], axis=2)
+
+            # Frames with fewer than k candidates (many silent frames nearby) use those they have
+            for row in np.flatnonzero(~complete):
+                candidates = np.flatnonzero(similarity[row] > -np.inf) + lo
+                S_filter[:, start + row] = np.median(S[:, candidates], axis=1) if len(candidates) else S[:, start + row]
+
+        S_filter[:, silent] = S[:, silent]
+        return S_filter
+
+    def _mel_matrices(self):
+        if self._mel_basis is None:
+            mel_basis = librosa.filters.mel(sr=self.sample_rate, n_fft=self.n_fft, n_mels=self.n_mels)
+
+            # Each linear bin takes the filter-weighted average of the mel bands covering it,
+            # so a mask in [0, 1] stays in [0, 1] without solving NNLS per frame
+            weights = mel_basis.T.copy()
+            totals = weights.sum(axis=1, keepdims=True)
+            uncovered = totals[:, 0] == 0
+            if np.any(uncovered):
+                mel_centers = librosa.mel_frequencies(n_mels=self.n_mels + 2, fmax=self.sample_rate / 2)[1:-1]
+                freqs = librosa.fft_frequencies(sr=self.sample_rate, n_fft=self.n_fft)
+                nearest = np.argmin(np.abs(freqs[uncovered, np.newaxis] - mel_centers), axis=1)
+                weights[uncovered, nearest] = 1.0
+                totals = weights.sum(axis=1, keepdims=True)
+
+            self._mel_basis = mel_basis
+            self._mel_inverse = weights / totals
+        return self._mel_basis, self._mel_inverse
+
+    def _stream_mono(self, audio_path, block_size=262144):
+        # Read, downmix and resample block by block so the whole track is never in memory
+        native_sr = sf.info(audio_path).samplerate
+        resampler = None
+        if native_sr != self.sample_rate:
+            resampler = soxr.ResampleStream(native_sr, self.sample_rate, 1, dtype='float32', quality='HQ')
+
+        for block in sf.blocks(audio_path, blocksize=block_size, dtype='float32', always_2d=True):
+            y_block = np.mean(block, axis=1)
+            if resampler is not None:
+                y_block = resampler.resample_chunk(y_block)
+            yield y_block
+        if resampler is not None:
+            yield resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+
+    def _stem_paths(self, audio_path):
+        filename, _ = os.path.splitext(audio_path)
+        return f"{filename}_vocals.wav", f"{filename}_inst.wav"
+
+def _nearest(similarity, k):
+    # Columns of the k largest values in each row, in column order; of equal values the
+    # earliest columns are taken. Also whether each row had k values above -inf
+    kth = np.partition(similarity, -k, axis=1)[:, -k, np.newaxis]
+    above = similarity > kth
+    tied = similarity == kth
+    chosen = above | (tied & (np.cumsum(tied, axis=1) <= k - above.sum(axis=1, keepdims=True)))
+    return np.nonzero(chosen)[1].reshape(len(similarity), k), kth[:, 0] > -np.inf
@@ -0,0 +1,44 @@
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+# Import the app's modules the same way app.py does, from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# config.py reads these when it is first imported: one cold worker, and every store in a scratch directory
+_STATE_DIR = tempfile.mkdtemp(prefix='songscope-tests-')
+os.environ.update({
+    'SONGSCOPE_WARM_UP': '0',
+    'SONGSCOPE_ANALYSIS_WORKERS': '1',
+    'SONGSCOPE_RESULT_CACHE_DIR': '',
+    'SONGSCOPE_FRAME_STORE_DIR': '',
+    'SONGSCOPE_SIMILARITY_INDEX_DIR': '',
+    'SONGSCOPE_REPORT_STORE_DIR': os.path.join(_STATE_DIR, 'results'),
+    'SONGSCOPE_NUMBA_CACHE_DIR': os.path.join(_STATE_DIR, 'numba')
+})
+
+
+def write_track(path, seconds, sr=44100, seed=0):
+    # Stereo test track: a chord, noise bursts on the beat (120 BPM) and a little hiss
+    rng = np.random.default_rng(seed)
+    n = int(seconds * sr)
+    t = np.arange(n) / sr
+    y = 0.2 * np.sin(2 * np.pi * 220 * t) + 0.1 * np.sin(2 * np.pi * 330 * t) + 0.02 * rng.standard_normal(n)
+    y += 0.3 * ((np.arange(n) % (sr // 2)) < 800) * rng.standard_normal(n)
+    stereo = np.stack([y, 0.8 * y + 0.01 * rng.standard_normal(n)], axis=1) * 0.5
+    sf.write(str(path), stereo.astype(np.float32), sr, subtype='PCM_16')
+    return str(path)
+
+
+@pytest.fixture(scope='session')
+def make_track():
+    return write_track
+
+
+@pytest.fixture(scope='session')
+def track(tmp_path_factory):
+    return write_track(tmp_path_factory.mktemp('audio') / 'track.wav', 20)
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from modules import memory_model
+from modules.analysis_pipeline import AnalysisPipeline, MemoryBudgetExceeded
+
+
+def test_stage_threads_do_not_change_features(track):
+    single = AnalysisPipeline().extract_features(track, None, {"mode": "whole", "threads": 1})
+    threaded = AnalysisPipeline(stage_threads=2).extract_features(track, None, {"mode": "whole", "threads": 2})
+    assert threaded == single
+
+
+@pytest.mark.parametrize("profile", ["standard", "precise"])
+def test_streaming_features_match_whole_track(track, profile):
+    pipeline = AnalysisPipeline(profile=profile)
+    whole = pipeline.extract_features(track, None, {"mode": "whole", "threads": 1})
+    streamed = pipeline.extract_features(track, None, {"mode": "streaming", "threads": 1})
+
+    assert set(streamed) == set(whole)
+    for name, value in whole.items():
+        if isinstance(value, float):
+            assert streamed[name] == pytest.approx(value, rel=1e-5), name
+        elif isinstance(value, list):
+            np.testing.assert_allclose(streamed[name], value, atol=1e-5, err_msg=name)
+        else:
+            assert streamed[name] == value, name
+
+
+def _whole_peak(pipeline, seconds, threads=1):
+    settings = pipeline.settings
+    return memory_model.peak(memory_model.predict_stages(
+        seconds, 44100, 2, settings["sample_rate"], settings["hop_length"], settings["n_fft"],
+        "whole", False, threads))
+
+
+def test_plan_without_budget():
+    pipeline = AnalysisPipeline(stage_threads=2)
+    plan = pipeline._plan(180.0, 44100, 2)
+    assert (plan["mode"], plan["threads"]) == ("whole", 2)
+    assert plan["peak_bytes"] == memory_model.peak(plan["stages"])
+
+    # Long recordings are streamed whatever the budget
+    assert pipeline._plan(pipeline.streaming_min_duration, 44100, 2)["mode"] == "streaming"
+
+
+def test_plan_follows_the_memory_budget():
+    # Just under what two stage threads need: the whole track still fits on one thread
+    pipeline = AnalysisPipeline(stage_threads=2, memory_budget=_whole_peak(AnalysisPipeline(), 180.0, 2) - 1)
+    plan = pipeline._plan(180.0, 44100, 2)
+    assert (plan["mode"], plan["threads"]) == ("whole", 1)
+    assert plan["peak_bytes"] <= pipeline.memory_budget
+
+    # Under what one thread needs, the track is streamed
+    pipeline.memory_budget = _whole_peak(pipeline, 180.0) - 1
+    plan = pipeline._plan(180.0, 44100, 2)
+    assert (plan["mode"], plan["threads"]) == ("streaming", 1)
+    assert plan["peak_bytes"] <= pipeline.memory_budget
+
+    # Streaming memory does not grow with length, so a longer track gets the same plan
+    assert pipeline._plan(360.0, 44100, 2)["peak_bytes"] == pytest.approx(plan["peak_bytes"], rel=0.01)
+
+    # And when not even that fits, the track is refused
+    pipeline.memory_budget = plan["peak_bytes"] - 1
+    with pytest.raises(MemoryBudgetExceeded):
+        pipeline._plan(180.0, 44100, 2)
+
+
+def test_plan_reads_the_header(track):
+    plan = AnalysisPipeline().plan(track)
+    assert plan["mode"] == "whole"
+    assert plan["duration"] == pytest.approx(20.0)
+
+
+def test_plan_budgets_files_soundfile_cannot_read(tmp_path, monkeypatch):
+    # No header soundfile can read and no ffprobe: 64 kbit/s over the file size gives 60 s
+    path = tmp_path / 'song.m4a'
+    path.write_bytes(b'\0' * (60 * 64000 // 8))
+    pipeline = AnalysisPipeline()
+    monkeypatch.setattr(pipeline.audio_processor.decoder, 'ffprobe_path', None)
+
+    plan = pipeline.plan(str(path))
+    assert (plan["mode"], plan["seekable"]) == ("whole", False)
+    assert plan["duration"] == pytest.approx(60.0)
+    assert plan["stages"] == memory_model.predict_stages(
+        60.0, 48000, 2, pipeline.settings["sample_rate"], pipeline.settings["hop_length"],
+        pipeline.settings["n_fft"], "whole", False, 1)
+
+    # Such files are decoded whole, so there is no streaming to fall back on
+    pipeline.memory_budget = plan["peak_bytes"] - 1
+    with pytest.raises(MemoryBudgetExceeded):
+        pipeline.plan(str(path))
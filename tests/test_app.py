@@ -0,0 +1,123 @@
+import gzip
+import io
+import json
+import uuid
+
+import pytest
+
+import app as songscope
+from modules.chunked_upload import UploadManager
+from modules.report_store import ReportStore
+from modules.similarity_index import SimilarityIndex
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    # Uploads go to a scratch directory; the job queue is the app's own, with one worker
+    monkeypatch.setitem(songscope.app.config, 'UPLOAD_FOLDER', str(tmp_path))
+    monkeypatch.setattr(songscope, 'uploads', UploadManager(str(tmp_path), songscope.app.config['MAX_CONTENT_LENGTH']))
+    yield songscope.app.test_client()
+
+
+@pytest.fixture(scope='module', autouse=True)
+def stop_workers():
+    yield
+    songscope.job_queue.shutdown()
+
+
+def _create(client, filename, length):
+    response = client.post('/uploads', json={"filename": filename, "length": length,
+                                             "song_name": "Song", "composer": "Composer"})
+    assert response.status_code == 201
+    return response.headers['Location']
+
+
+def test_chunk_at_the_wrong_offset_gets_409(client):
+    url = _create(client, 'song.mp3', 1000)
+
+    response = client.patch(url, data=b'x' * 100, headers={"Upload-Offset": "0"})
+    assert response.status_code == 200
+    assert response.headers['Upload-Offset'] == '100'
+
+    # A retried chunk and one from the wrong place are both refused with the current offset
+    for offset in ("0", "50", "200"):
+        response = client.patch(url, data=b'x' * 100, headers={"Upload-Offset": offset})
+        assert response.status_code == 409
+        assert response.headers['Upload-Offset'] == '100'
+        assert response.get_json()["offset"] == 100
+
+    assert client.get(url).get_json()["offset"] == 100
+    assert client.patch(url, data=b'x', headers={}).status_code == 400
+    assert client.delete(url).status_code == 204
+    assert client.get(url).status_code == 404
+
+
+def test_upload_over_the_memory_budget_gets_413(client, tmp_path, monkeypatch, make_track):
+    monkeypatch.setattr(songscope.job_queue.pipeline, 'memory_budget', 1)
+    with open(make_track(tmp_path / 'source.wav', 1), 'rb') as f:
+        data = f.read()
+    url = _create(client, 'song.wav', len(data))
+
+    response = client.patch(url, data=data, headers={"Upload-Offset": "0"})
+    assert response.status_code == 413
+    assert "memory budget" in response.get_json()["error"]
+    # Nothing is kept for a retry that could never succeed
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['source.wav']
+    assert client.get(url).status_code == 404
+
+
+@pytest.mark.parametrize("accept_encoding", ["identity", "gzip"])
+def test_api_analyze_streams_one_ndjson_line_per_track(client, tmp_path, make_track, accept_encoding):
+    tracks = [make_track(tmp_path / f'source{i}.wav', 3, seed=i) for i in range(2)]
+    files = []
+    for i, path in enumerate(tracks):
+        with open(path, 'rb') as f:
+            files.append((io.BytesIO(f.read()), f'track{i}.wav'))
+    files.append((io.BytesIO(b'RIFF' + b'\0' * 64), 'broken.wav'))
+
+    response = client.post('/api/analyze', data={"files": files, "song_name": ["First"]},
+                           content_type='multipart/form-data', headers={"Accept-Encoding": accept_encoding})
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    body = response.get_data()
+    if accept_encoding == "gzip":
+        assert response.headers['Content-Encoding'] == 'gzip'
+        body = gzip.decompress(body)
+
+    lines = [json.loads(line) for line in body.decode('utf-8').splitlines()]
+    records = {record["index"]: record for record in lines}
+    assert len(lines) == 3 and sorted(records) == [0, 1, 2]
+
+    for index in (0, 1):
+        assert records[index]["status"] == "done"
+        assert records[index]["filename"] == f"track{index}.wav"
+        assert set(records[index]["features"]) >= {"tempo", "key", "average_loudness"}
+        assert records[index]["report"]["metadata"]["title"] == ("First" if index == 0 else "track1")
+
+    # A track that fails says why, without the server's path for it
+    assert records[2]["status"] == "failed"
+    assert "broken.wav" in records[2]["error"]
+    assert str(tmp_path) not in records[2]["error"] and "_broken.wav" not in records[2]["error"]
+
+
+def test_similar_results_cover_published_results_and_leave_out_the_same_audio(client, tmp_path, monkeypatch):
+    # Results stored outside the app, as batch_analyze.py --publish does, are indexed on start
+    store = ReportStore(str(tmp_path / 'results'))
+    monkeypatch.setattr(songscope, 'report_store', store)
+    monkeypatch.setattr(songscope, 'similarity_index', SimilarityIndex())
+    ids = {}
+    for name, content_hash, created_at, tempo in [("first", "hash-a", 1.0, 120.0), ("again", "hash-a", 2.0, 120.0),
+                                                  ("other", "hash-b", 3.0, 124.0)]:
+        ids[name] = uuid.uuid4().hex
+        store.save(ids[name], {"id": ids[name], "song_name": name, "composer": "Composer", "created_at": created_at,
+                               "features": {"tempo": tempo, "chroma_profile": [1.0] + [0.0] * 11},
+                               "report": {}, "frames_id": None, "content_hash": content_hash})
+    songscope.build_similarity_index()
+    assert len(songscope.similarity_index) == 2
+
+    # Neither result for the same audio lists the other
+    for name in ("first", "again"):
+        matches = client.get(f'/results/{ids[name]}/similar').get_json()["matches"]
+        assert [match["song_name"] for match in matches] == ["other"]
+    matches = client.get(f'/results/{ids["other"]}/similar').get_json()["matches"]
+    assert [match["song_name"] for match in matches] == ["again"]
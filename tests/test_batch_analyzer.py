@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from modules.batch_analyzer import BatchAnalyzer, JsonlResultWriter, ParquetResultWriter
+from modules.report_store import ReportStore
+from modules.result_cache import content_hash
+
+
+def _record(path, status="ok"):
+    return {"path": path, "song_name": path, "composer": "Unknown", "status": status, "seconds": 1.0}
+
+
+def test_jsonl_resume_drops_a_line_cut_short_by_a_crash(tmp_path):
+    path = tmp_path / 'results.jsonl'
+    path.write_text(json.dumps(_record("a.wav")) + '\n' + json.dumps(_record("b.wav"))[:30], encoding='utf-8')
+
+    writer = JsonlResultWriter(str(path))
+    assert writer.completed_paths() == {"a.wav"}
+    writer.write(_record("b.wav"))
+    writer.close()
+
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert [json.loads(line)["path"] for line in lines] == ["a.wav", "b.wav"]
+    assert writer.completed_paths() == {"a.wav", "b.wav"}
+
+
+def test_parquet_rows_are_written_after_flush_seconds(tmp_path, monkeypatch):
+    pq = pytest.importorskip("pyarrow.parquet")
+    clock = [1000.0]
+    monkeypatch.setattr('modules.batch_analyzer.time.time', lambda: clock[0])
+    writer = ParquetResultWriter(str(tmp_path), rows_per_part=100, flush_seconds=60)
+
+    writer.write(_record("a.wav"))
+    assert writer.completed_paths() == set()
+    clock[0] += 60
+    writer.write(_record("b.wav"))
+    # Both rows are on disk before close, so a crash now would not lose them
+    assert writer.completed_paths() == {"a.wav", "b.wav"}
+    assert pq.read_table(str(tmp_path)).num_rows == 2
+
+
+def test_parquet_parts_keep_columns_missing_from_the_first_row(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    writer = ParquetResultWriter(str(tmp_path), rows_per_part=2)
+    writer.write({"path": "bad.mp3", "song_name": "bad", "composer": "Unknown",
+                  "status": "failed", "error": "Could not decode bad.mp3", "seconds": 0.1})
+    writer.write({"path": "good.wav", "song_name": "good", "composer": "Unknown", "status": "ok",
+                  "mode": "standard", "seconds": 1.5,
+                  "features": {"tempo": 120.0, "key": "A", "chroma_profile": [0.5] * 12,
+                               "clipping_detected": False},
+                  "report": {"summary": "ok"}})
+    writer.write({"path": "other.wav", "song_name": "other", "composer": "Unknown", "status": "ok",
+                  "features": {"tempo": 90.0}})
+    writer.close()
+
+    table = pq.read_table(str(tmp_path))
+    rows = sorted(table.to_pylist(), key=lambda row: row["path"])
+    assert [row["tempo"] for row in rows] == [None, 120.0, 90.0]
+    assert rows[0]["error"] == "Could not decode bad.mp3"
+    assert rows[1]["chroma_profile"] == [0.5] * 12
+    assert rows[1]["report"] == '{"summary": "ok"}'
+    assert writer.completed_paths() == {"good.wav", "other.wav"}
+
+
+def test_published_tracks_are_stored_with_their_content_hash(tmp_path, make_track):
+    path = make_track(tmp_path / 'song.wav', 2)
+    store = ReportStore(str(tmp_path / 'results'))
+    writer = JsonlResultWriter(str(tmp_path / 'results.jsonl'))
+    tracks = [{"path": path, "song_name": "Song", "composer": "Composer"}]
+
+    summary = BatchAnalyzer(max_workers=1, with_report=True, store=store).run(tracks, writer)
+    assert summary["ok"] == 1
+    [record] = store.records()
+    assert record["song_name"] == "Song" and record["report"]
+    assert record["content_hash"] == content_hash(path)
@@ -0,0 +1,34 @@
+import io
+
+import pytest
+
+from modules.chunked_upload import OffsetMismatch, UploadManager
+
+
+def test_upload_manager_resumes_from_its_offset(tmp_path):
+    uploads = UploadManager(str(tmp_path), 1024)
+    session = uploads.create('a.mp3', 10, 'Song', 'Composer')
+
+    assert uploads.append(session, 0, io.BytesIO(b'abcd')) == 4
+    with pytest.raises(OffsetMismatch) as mismatch:
+        uploads.append(session, 0, io.BytesIO(b'abcd'))
+    assert mismatch.value.offset == 4
+
+    assert uploads.append(session, 4, io.BytesIO(b'efghij')) == 10
+    assert uploads.complete(session)
+    with open(session["path"], 'rb') as f:
+        assert f.read() == b'abcdefghij'
+
+
+def test_streaming_waits_for_the_header_and_a_first_stretch(tmp_path, make_track):
+    with open(make_track(tmp_path / 'source.wav', 2), 'rb') as f:
+        data = f.read()
+    uploads = UploadManager(str(tmp_path), len(data))
+    session = uploads.create('song.wav', len(data), 'Song', 'Composer')
+
+    uploads.append(session, 0, io.BytesIO(data[:20]))
+    assert not uploads.stream_ready(session, 1024)  # Header not in yet
+    uploads.append(session, 20, io.BytesIO(data[20:512]))
+    assert not uploads.stream_ready(session, 1024)
+    uploads.append(session, 512, io.BytesIO(data[512:2048]))
+    assert uploads.stream_ready(session, 1024)
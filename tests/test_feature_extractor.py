@@ -0,0 +1,38 @@
+import librosa
+import numpy as np
+import pytest
+
+from benchmarks.stacked_features import check, excerpts, extract_stacked
+from modules.feature_extractor import FeatureExtractor
+
+
+@pytest.fixture(scope='module')
+def audio(track):
+    y, sr = librosa.load(track, sr=22050, mono=True)
+    return y, sr
+
+
+def test_shared_stft_matches_one_librosa_call_per_feature(audio):
+    # The values the extractor produced when every feature ran its own STFT
+    y, sr = audio
+    tempo, _ = librosa.beat.beat_track(y=y, sr=sr, hop_length=512)
+    energy = np.mean(librosa.feature.rms(y=y, hop_length=512))
+    centroid = np.mean(librosa.feature.spectral_centroid(y=y, sr=sr, n_fft=2048, hop_length=512))
+    rolloff = np.mean(librosa.feature.spectral_rolloff(y=y, sr=sr, n_fft=2048, hop_length=512))
+    chroma = np.mean(librosa.feature.chroma_stft(y=y, sr=sr, n_fft=2048, hop_length=512), axis=1)
+
+    features = FeatureExtractor().extract_features_from_array(y, sr)
+    assert features["tempo"] == pytest.approx(float(tempo))
+    assert features["energy"] == pytest.approx(float(energy), rel=1e-6)
+    assert features["spectral_centroid"] == pytest.approx(float(centroid), rel=1e-6)
+    assert features["spectral_rolloff"] == pytest.approx(float(rolloff), rel=1e-6)
+    np.testing.assert_allclose(features["chroma_profile"], chroma, rtol=1e-5, atol=1e-6)
+    assert features["key"] == ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B'][np.argmax(chroma)]
+
+
+def test_stacked_benchmark_computes_the_same_features_as_the_loop():
+    # The stacked-vs-loop timing only means something if both give the same features
+    extractor = FeatureExtractor()
+    ys = excerpts(3, 5.0, extractor.sample_rate)
+    check([extractor.extract_features_from_array(y, extractor.sample_rate) for y in ys],
+          extract_stacked(extractor, ys, extractor.sample_rate))
@@ -0,0 +1,49 @@
+from concurrent.futures import Future
+
+import pytest
+
+from modules.job_queue import JobQueue
+from modules.result_cache import ResultCache
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(max_workers=1, cache=ResultCache(str(tmp_path / 'cache')))
+    yield queue
+    queue.shutdown()
+
+
+def _done(features):
+    future = Future()
+    future.set_result({"features": features, "frames_id": None})
+    return future
+
+
+def test_store_caches_the_result_before_dropping_the_inflight_entry(queue):
+    class Inflight(dict):
+        def pop(self, key, *default):
+            # An upload arriving now must find the result in the cache
+            assert queue.cache.get(key) is not None
+            return super().pop(key, *default)
+
+    queue.inflight = Inflight({"key": object()})
+    queue._store("key", {}, _done({"tempo": 120.0}))
+    assert "key" not in queue.inflight
+    assert queue.cache.get("key")["features"] == {"tempo": 120.0}
+
+
+def test_upload_matching_a_just_stored_result_is_not_analyzed_again(queue, tmp_path, monkeypatch, make_track):
+    path = make_track(tmp_path / 'song.wav', 2)
+    key = ResultCache.make_key(path, queue.pipeline.cache_params())
+    features = queue.pipeline.extract_features(path)
+    queue.cache.put(key, {"params": {}, "features": features, "frames_id": None})
+
+    # The first lookup misses, as if the identical analysis was stored right after it
+    lookups = []
+    get = queue.cache.get
+    monkeypatch.setattr(queue.cache, 'get', lambda k: lookups.append(k) or (get(k) if len(lookups) > 1 else None))
+
+    job_id = queue.submit(path, "Song", "Composer")
+    job = next(queue.as_completed([job_id], timeout=30))
+    assert queue._executor is None
+    assert job["cached"] and job["status"] == "done"
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from modules.loudness_meter import LoudnessMeter
+
+
+def _tone(sr, seconds, dbfs, frequency=997.0):
+    t = np.arange(int(sr * seconds)) / sr
+    return 10 ** (dbfs / 20) * np.sin(2 * np.pi * frequency * t)
+
+
+def test_k_weighting_matches_bs1770_coefficients_at_48k():
+    sos = LoudnessMeter()._k_weighting(48000)
+
+    # BS.1770-4 Table 1 (pre-filter) and Table 2 (RLB filter)
+    np.testing.assert_allclose(sos[0], [1.53512485958697, -2.69169618940638, 1.19839281085285,
+                                        1.0, -1.69065929318241, 0.73248077421585], atol=1e-10)
+    np.testing.assert_allclose(sos[1], [1.0, -2.0, 1.0,
+                                        1.0, -1.99004745483398, 0.99007225036621], atol=1e-10)
+
+
+@pytest.mark.parametrize("sr", [48000, 44100])
+def test_reference_tone_readings(sr):
+    meter = LoudnessMeter()
+    tone = _tone(sr, 10, 0.0)
+
+    # A 0 dBFS 997 Hz tone in both channels reads 0 LUFS; at -20 dBFS in one channel, -23 LUFS
+    assert meter.measure(np.vstack([tone, tone]), sr)["average_loudness"] == pytest.approx(0.0, abs=0.1)
+    assert meter.measure(_tone(sr, 10, -20.0), sr)["average_loudness"] == pytest.approx(-23.0, abs=0.1)
+
+
+def test_true_peak_matches_direct_convolution():
+    # Blocks of odd length, so filter windows straddle block edges
+    meter = LoudnessMeter()
+    meter.block_size = 10007
+    y = np.random.default_rng(0).standard_normal((2, 44100)).astype(np.float32) * 0.3
+
+    padded = np.pad(y.astype(np.float64), ((0, 0), (meter.taps_per_phase - 1,) * 2))
+    expected = max(np.abs(np.convolve(channel, phase.astype(np.float64), 'valid')).max()
+                   for channel in padded for phase in meter._phases)
+    assert meter.measure(y, 44100)["peak_levels"] == round(20 * np.log10(expected), 1)
@@ -0,0 +1,33 @@
+import json
+import os
+import time
+
+import pytest
+
+from modules.report_generator import ReportGenerator
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+@pytest.fixture
+def tracks(monkeypatch):
+    # reports.json was written by the original per-track generator, dated January 01, 2026
+    monkeypatch.setattr(time, 'strftime', lambda *args: "January 01, 2026")
+    with open(os.path.join(DATA_DIR, 'report_tracks.json'), 'r', encoding='utf-8') as f:
+        return [(track["song_name"], track["composer"], track["features"]) for track in json.load(f)["tracks"]]
+
+
+def _golden():
+    with open(os.path.join(DATA_DIR, 'reports.json'), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def test_batch_reports_are_byte_identical_to_the_original(tracks):
+    reports = ReportGenerator().generate_reports(tracks)
+    assert json.dumps(reports, indent=1) + "\n" == _golden()
+
+
+def test_single_reports_match_the_batch(tracks):
+    generator = ReportGenerator()
+    reports = [generator.generate_report(*track) for track in tracks]
+    assert json.dumps(reports, indent=1) + "\n" == _golden()
@@ -0,0 +1,31 @@
+import pytest
+
+from modules.similarity_index import EMBEDDING_SCALARS, SimilarityIndex, embed
+
+
+def test_zero_features_are_not_treated_as_missing():
+    centre, scale = EMBEDDING_SCALARS["energy"]
+    assert embed({"energy": 0.0})[1] == pytest.approx(-centre / scale)
+    assert embed({})[1] == 0.0
+
+
+def _features(tempo):
+    return {"tempo": tempo, "energy": 0.2, "spectral_centroid": 2000.0, "spectral_rolloff": 4000.0,
+            "chroma_profile": [1.0] + [0.0] * 11}
+
+
+def test_a_later_result_for_the_same_audio_replaces_the_earlier_one(tmp_path):
+    index = SimilarityIndex(str(tmp_path))
+    index.add("a" * 32, _features(120.0), "hash-a")
+    index.add("b" * 32, _features(121.0), "hash-b")
+    index.add("c" * 32, _features(120.0), "hash-a")
+
+    assert len(index) == 2
+    assert "a" * 32 in index and index.vector("a" * 32) is None
+    assert [match["id"] for match in index.search(_features(120.0))] == ["c" * 32, "b" * 32]
+    # Leaving out the query's own audio leaves out every result for it
+    assert [match["id"] for match in index.search(_features(120.0), exclude="hash-a")] == ["b" * 32]
+
+    # The replacement survives a restart
+    reloaded = SimilarityIndex(str(tmp_path))
+    assert len(reloaded) == 2 and reloaded.key("c" * 32) == "hash-a" and reloaded.vector("a" * 32) is None
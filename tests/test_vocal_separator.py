@@ -0,0 +1,48 @@
+import librosa
+import numpy as np
+import pytest
+
+from modules.vocal_separator import VocalSeparator
+
+
+def _reference(S, k):
+    # The windowed filter's rule over the whole spectrogram, one frame at a time
+    norms = np.linalg.norm(S, axis=0)
+    S_filter = S.copy()
+    for frame in np.flatnonzero(norms > 0):
+        candidates = np.flatnonzero((norms > 0) & (np.arange(S.shape[1]) != frame))
+        similarity = S[:, candidates].T @ S[:, frame] / (norms[candidates] * norms[frame])
+        nearest = candidates[np.argsort(-similarity, kind='stable')[:k]]
+        S_filter[:, frame] = np.median(S[:, nearest], axis=1)
+    return S_filter
+
+
+@pytest.mark.parametrize("frames", [8, 20, 33, 50, 120, 517])
+def test_windowed_nn_filter_matches_librosa(frames):
+    # With the window covering the whole spectrogram and no ties, the windowed
+    # filter picks the same k nearest frames as nn_filter
+    S = np.abs(np.random.default_rng(frames).standard_normal((24, frames))).astype(np.float32)
+
+    expected = librosa.decompose.nn_filter(S, aggregate=np.median, metric='cosine', mode='distance')
+    np.testing.assert_allclose(VocalSeparator()._nn_filter_windowed(S), expected, rtol=1e-6)
+
+
+def test_silent_frames_are_never_neighbours():
+    S = np.abs(np.random.default_rng(0).standard_normal((24, 60))).astype(np.float32)
+    S[:, [0, 17, 18, 19, 20, 59]] = 0
+
+    S_filter = VocalSeparator()._nn_filter_windowed(S)
+    k = int(2 * np.ceil(np.sqrt(59)))
+    np.testing.assert_allclose(S_filter, _reference(S, k), rtol=1e-6)
+    assert not S_filter[:, [0, 17, 18, 19, 20, 59]].any()
+
+
+def test_equally_similar_frames_are_taken_earliest_first():
+    # Three distinct spectra repeated at power-of-two gains: every frame has many
+    # neighbours of exactly the same direction but different magnitudes
+    rng = np.random.default_rng(1)
+    S = np.abs(rng.standard_normal((24, 3))).astype(np.float32)[:, rng.integers(0, 3, 40)]
+    S *= 2.0 ** rng.integers(0, 4, 40).astype(np.float32)
+
+    k = int(2 * np.ceil(np.sqrt(39)))
+    np.testing.assert_allclose(VocalSeparator()._nn_filter_windowed(S), _reference(S, k), rtol=1e-6)
@@ -0,0 +1,2 @@
+# Production entry point: gunicorn -c gunicorn.conf.py wsgi:app
+from app import app, start_warm_up  # noqa: F401 - start_warm_up is called by gunicorn.conf.py after the fork